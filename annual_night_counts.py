@@ -3,44 +3,37 @@
 # Standard library imports
 from datetime import date
 from pathlib import Path
-from typing import cast
 
 # Third-party imports
 import argparse
-import pandas as pd
 
 # First-party imports
-from lodging_data_utils import LodgingLog
+from lodging_data_utils import LodgingLog, profiling
 
-def create_annual_night_counts(output_csv: Path) -> None:
+@profiling.profiled
+def create_annual_night_counts(output_csv: Path, log=None) -> None:
     """Create a CSV file with night counts for each year in the dataset."""
     # Get lodging log data.
-    log = LodgingLog()
-    mornings = log.mornings()
-    mornings['year'] = cast(pd.DatetimeIndex, mornings.index).year
-    mornings = mornings[['year', 'purpose']].reset_index()
+    log = LodgingLog() if log is None else log
+    counts = log.night_counter().count('year', by=['purpose'])
 
-    # Create a pivot table for year and purpose counts.
-    annual_counts = pd.pivot_table(mornings,
+    # Create a table of year and purpose counts. Reindex from the
+    # minimum year to the current year, so that all years are
+    # represented in the output, even if there are no entries for some
+    # years.
+    year_range = range(counts['year'].min(), date.today().year + 1)
+    all_annual_counts = counts.pivot(
         index='year',
         columns='purpose',
-        values='morning',
-        aggfunc='count',
+        values='night_count',
+    ).reindex(
+        index=year_range,
+        columns=['Business', 'Personal'],
         fill_value=0,
-    )
-
-    # Create a date range from the minimum year to the current year.
-    # This ensures that all years are represented in the output, even if
-    # there are no entries for some years.
-    year_range = range(mornings['year'].min(), date.today().year + 1)
-    all_annual_counts = pd.DataFrame(year_range, columns=['year'])
-
-    # Merge the date DataFrame with the annual counts
-    all_annual_counts = all_annual_counts.merge(
-        annual_counts,
-        on='year',
-        how='left'
     ).fillna(0)
+    all_annual_counts = all_annual_counts.rename_axis(
+        index='year', columns=None
+    ).reset_index()
     all_annual_counts.rename(columns={
         'Business': 'business_night_count',
         'Personal': 'personal_night_count',
@@ -53,7 +46,13 @@ def create_annual_night_counts(output_csv: Path) -> None:
     all_annual_counts.to_csv(output_csv, index=False)
     print(f"Annual night counts saved to {output_csv}")
 
-if __name__ == "__main__":
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
     parser = argparse.ArgumentParser(
         description="Create a CSV file with annual night counts."
     )
@@ -61,5 +60,10 @@ if __name__ == "__main__":
         type=Path,
         help="Path to the output CSV file for annual night counts."
     )
-    args = parser.parse_args()
-    create_annual_night_counts(args.output_csv)
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    create_annual_night_counts(args.output_csv, log=log)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Runs a report script against many lodging GeoPackages (one per
+traveler) in parallel, one process per log, and writes a consolidated
+summary of nights per traveler per year.
+"""
+
+# Standard library imports
+import contextlib
+import importlib
+import io
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Third-party imports
+import argparse
+import matplotlib
+import pandas as pd
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+from report_server import SCRIPTS
+
+matplotlib.use('Agg')
+
+def batch_reports(
+    logs, script, args=(), jobs=None, summary_csv=None
+) -> list[dict]:
+    """Runs a report script against each log and prints a summary.
+
+    Each log runs in its own process, so a failure (or crash) only
+    affects its own output. Each process also returns the log's nights
+    per year, which are merged into one summary at the end.
+
+    Args:
+        logs (Path): A folder of GeoPackages, or a TOML manifest with a
+            `[[logs]]` table for each log, with a `path` (relative to
+            the manifest) and an optional unique `name`, which defaults
+            to the file name without its extension.
+        script (str): The script name, such as `annual_night_counts`.
+        args (list[str]): The script's command line arguments. `{name}`
+            in an argument is replaced with each log's name, so each log
+            can write to its own output path.
+        jobs (int): The number of logs to process at once. Defaults to
+            the number of processors.
+        summary_csv (Path): If provided, write the nights per traveler
+            per year to this CSV file.
+
+    Returns:
+        list[dict]: A list of dicts with name, path, seconds, output,
+        and error (None if the script succeeded) keys, one for each log.
+    """
+    if script not in SCRIPTS:
+        raise ValueError(f"Invalid script: {script}")
+    log_paths = load_logs(logs)
+    if not log_paths:
+        raise ValueError(f"No GeoPackages found in {logs}")
+
+    start = time.perf_counter()
+    results = []
+    summaries = []
+    with ProcessPoolExecutor(
+        max_workers=jobs, max_tasks_per_child=1
+    ) as executor:
+        futures = {
+            name: executor.submit(run_log, name, path, script, list(args))
+            for name, path in log_paths.items()
+        }
+        for name, future in futures.items():
+            try:
+                result, summary = future.result()
+            except Exception as e: # pylint: disable=broad-except
+                # The worker process itself failed.
+                result = {
+                    'name': name,
+                    'path': str(log_paths[name]),
+                    'seconds': None,
+                    'output': "",
+                    'error': f"{type(e).__name__}: {e}",
+                }
+                summary = None
+            results.append(result)
+            if summary is not None:
+                summaries.append(summary)
+
+    print(f"\n{'log':<30} {'seconds':>9}  status")
+    for result in results:
+        seconds = (
+            "" if result['seconds'] is None else f"{result['seconds']:.3f}"
+        )
+        status = "ok" if result['error'] is None else result['error']
+        print(f"{result['name']:<30} {seconds:>9}  {status}")
+    print(f"{'total':<30} {time.perf_counter() - start:>9.3f}")
+
+    if summary_csv is not None:
+        summary = nights_summary(summaries)
+        summary.to_csv(summary_csv)
+        print(f"Saved nights per traveler per year to {summary_csv}")
+    return results
+
+def load_logs(logs) -> dict:
+    """Returns a dict of log names to GeoPackage paths.
+
+    Args:
+        logs (Path): A folder of GeoPackages, or a TOML manifest. See
+            batch_reports().
+    """
+    logs = Path(logs)
+    if logs.is_dir():
+        return {path.stem: path for path in sorted(logs.glob("*.gpkg"))}
+    with open(logs, 'rb') as f:
+        manifest = tomllib.load(f)
+    log_paths = {}
+    for entry in manifest.get('logs', []):
+        if 'path' not in entry:
+            raise ValueError(f"Log without a path in manifest: {entry}")
+        path = logs.parent / Path(entry['path']).expanduser()
+        name = entry.get('name', path.stem)
+        if name in log_paths:
+            raise ValueError(f"Duplicate log name in manifest: {name}")
+        log_paths[name] = path
+    return log_paths
+
+def nights_summary(summaries) -> pd.DataFrame:
+    """Returns a DataFrame of nights with a row for each traveler and a
+    column for each year.
+
+    Args:
+        summaries (list[DataFrame]): The nights per year of each log, as
+            returned by run_log().
+    """
+    if not summaries:
+        return pd.DataFrame(index=pd.Index([], name='traveler'))
+    return pd.concat(summaries, ignore_index=True).pivot(
+        index='traveler', columns='year', values='night_count'
+    ).fillna(0).astype('int64')
+
+def run_log(name, path, script, args) -> tuple:
+    """Runs a report script against one log, in a worker process.
+
+    Returns:
+        tuple: A result dict (see batch_reports()), and a DataFrame of
+        the log's nights per year with traveler, year, and night_count
+        columns, or None if the log could not be loaded.
+    """
+    start = time.perf_counter()
+    stdout = io.StringIO()
+    error = None
+    summary = None
+    try:
+        with contextlib.redirect_stdout(stdout):
+            log = LodgingLog(path)
+            summary = log.night_counter().count('year')
+            summary.insert(0, 'traveler', name)
+            module = importlib.import_module(script)
+            module.main([arg.replace("{name}", name) for arg in args], log=log)
+    except SystemExit as e:
+        if e.code not in [None, 0]:
+            error = f"exit code {e.code}"
+    except Exception as e: # pylint: disable=broad-except
+        error = f"{type(e).__name__}: {e}"
+    return {
+        'name': name,
+        'path': str(path),
+        'seconds': time.perf_counter() - start,
+        'output': stdout.getvalue(),
+        'error': error,
+    }, summary
+
+def main(argv=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(
+        description="Run a report script against many lodging logs."
+    )
+    parser.add_argument('logs',
+        help="folder of GeoPackages, or TOML manifest of logs",
+        type=Path,
+    )
+    parser.add_argument('script',
+        help="report script to run",
+        choices=SCRIPTS,
+    )
+    parser.add_argument('script_args',
+        help="arguments for the script; {name} is replaced with each "
+            "log's name",
+        nargs=argparse.REMAINDER,
+    )
+    parser.add_argument('--jobs',
+        help="number of logs to process at once (default: processor "
+            "count)",
+        type=int,
+    )
+    parser.add_argument('--summary_csv',
+        help="CSV file to write nights per traveler per year to",
+        type=Path,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    results = batch_reports(
+        args.logs,
+        args.script,
+        args.script_args,
+        jobs=args.jobs,
+        summary_csv=args.summary_csv,
+    )
+    if any(result['error'] is not None for result in results):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
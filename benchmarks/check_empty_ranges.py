@@ -0,0 +1,131 @@
+"""
+Checks that grouped morning queries handle date ranges with no
+mornings, by removing a year of stays from a synthetic GeoPackage and
+querying that year, and each month of the log, with a LodgingLog and a
+CachedLodgingLog.
+"""
+
+# Standard library imports
+import sqlite3
+import tempfile
+from datetime import date
+from pathlib import Path
+
+# Third-party imports
+import argparse
+import matplotlib
+
+# First-party imports
+from benchmarks.synthetic_gpkg import create_synthetic_gpkg
+from lodging_data_utils import CachedLodgingLog, LodgingLog
+
+matplotlib.use('Agg')
+
+GROUPED_COLUMNS = ['place_type', 'title', 'name', 'key', 'lat', 'lon']
+
+def check_empty_ranges(stays=300, years=10, seed=0) -> list[str]:
+    """Runs the checks and returns a list of failures.
+
+    Args:
+        stays (int): The number of synthetic stays.
+        years (int): The number of years the synthetic stays span.
+        seed (int): The random seed for the synthetic data.
+    """
+    # Import here, so that the script uses the Agg backend.
+    import distance_from_home_by_day
+
+    failures = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        lodging_path = Path(temp_dir) / "empty.gpkg"
+        create_synthetic_gpkg(
+            lodging_path, stays=stays, years=years, seed=seed
+        )
+        # Remove every stay with a morning in the middle year.
+        with sqlite3.connect(lodging_path) as conn:
+            first, last = conn.execute(
+                "SELECT MIN(check_in_date), MAX(check_in_date) FROM stays"
+            ).fetchone()
+            gap_year = (int(first[:4]) + int(last[:4])) // 2
+            conn.execute(
+                "DELETE FROM stays WHERE check_in_date <= ? "
+                "AND date(check_in_date, '+' || nights || ' days') >= ?",
+                (f"{gap_year}-12-31", f"{gap_year}-01-01"),
+            )
+        start = date(gap_year, 1, 1)
+        thru = date(gap_year, 12, 31)
+
+        for log_class in [LodgingLog, CachedLodgingLog]:
+            log = log_class(lodging_path)
+            name = log_class.__name__
+
+            def check(description, func):
+                """Runs a check, recording any exception or failure."""
+                try:
+                    if not func():
+                        failures.append(f"{name}: {description}")
+                except Exception as e: # pylint: disable=broad-except
+                    failures.append(
+                        f"{name}: {description}: {type(e).__name__}: {e}"
+                    )
+
+            for by in ['location', 'city', 'metro', 'region']:
+                check(f"mornings_by({by!r}) in {gap_year} is empty",
+                    lambda by=by: log.mornings_by(by, start, thru).empty,
+                )
+                check(f"monthly iter_mornings({by!r}) covers mornings_by",
+                    lambda by=by: sum(
+                        len(mornings) for _, mornings
+                        in log.iter_mornings(by, 'month')
+                    ) == len(log.mornings_by(by)),
+                )
+
+            def grouped_count_is_empty():
+                """Returns True if the gap year's grouped count is an
+                empty DataFrame with the usual columns.
+                """
+                counts = log.query().between(start, thru) \
+                    .group_by('city').count()
+                return counts.empty and list(counts.columns) == [
+                    *GROUPED_COLUMNS, 'nights',
+                ]
+
+            check(f"grouped count in {gap_year} is empty",
+                grouped_count_is_empty,
+            )
+            check(f"distance matrix over {gap_year} is built",
+                lambda: not distance_from_home_by_day.DistanceByDayChart(
+                    log=log
+                ).date_year_distance_matrix(
+                    (gap_year - 1, gap_year + 1)
+                ).empty,
+            )
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check morning queries over ranges with no mornings."
+    )
+    parser.add_argument('--stays',
+        help="number of synthetic stays",
+        type=int,
+        default=300,
+    )
+    parser.add_argument('--years',
+        help="number of years the synthetic stays span",
+        type=int,
+        default=10,
+    )
+    parser.add_argument('--seed',
+        help="random seed for the synthetic data",
+        type=int,
+        default=0,
+    )
+    args = parser.parse_args()
+    failed = check_empty_ranges(
+        stays=args.stays, years=args.years, seed=args.seed
+    )
+    for failure in failed:
+        print(failure)
+    if failed:
+        raise SystemExit(1)
+    print("Every check passed.")
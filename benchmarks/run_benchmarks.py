@@ -0,0 +1,320 @@
+"""
+Benchmarks the wall time and peak memory of LodgingLog methods and
+report scripts against synthetic GeoPackages of several sizes, and
+writes the results to a JSON file.
+"""
+
+# Standard library imports
+import contextlib
+import gc
+import io
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+# Third-party imports
+import argparse
+import matplotlib
+
+# First-party imports
+from benchmarks.synthetic_gpkg import (
+    DEFAULT_END_DATE, ROOT, create_synthetic_gpkg
+)
+from lodging_data_utils import LodgingLog
+
+matplotlib.use('Agg')
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+def _entries() -> dict:
+    """Returns a dict of benchmark names to functions. Each function
+    takes a context with a loaded `log`, its `lodging_path`, an
+    `output_dir`, and the `distance_years` to use for distance charts.
+    """
+    # Import report scripts here, so that they use the Agg backend.
+    import annual_night_counts
+    import distance_from_home_by_day
+    import frequency_table
+    import milestones
+    import nightly_location_report
+    import nights_away_and_home
+    import regions_lived_stayed_report
+
+    def grouped_and_svg(ctx):
+        gsc = nights_away_and_home.GroupedStayCollection(
+            log=LodgingLog(ctx.lodging_path)
+        )
+        nights_away_and_home.SVGChart(gsc).export(ctx.output_dir / "n.svg")
+
+    return {
+        # LodgingLog methods, using an already loaded log.
+        'LodgingLog.__init__': lambda ctx: LodgingLog(ctx.lodging_path),
+        'LodgingLog.stays': lambda ctx: ctx.log.stays(),
+        'LodgingLog.mornings': lambda ctx: ctx.log.mornings(),
+        'LodgingLog.mornings_by': lambda ctx: ctx.log.mornings_by('city'),
+        'LodgingLog.home_locations': lambda ctx: ctx.log.home_locations(),
+        'LodgingLog.night_counter': lambda ctx: ctx.log.night_counter()
+            .count('month', by=['purpose', 'type']),
+        'LodgingLog.milestone_finder': lambda ctx: ctx.log.milestone_finder()
+            .find(),
+        'LodgingLog.stay_intervals': lambda ctx: ctx.log.stay_intervals()
+            .nights_by_year(by='purpose'),
+        'LodgingLog.place_index': lambda ctx: ctx.log.place_index(),
+        'LodgingLog.locator': lambda ctx: ctx.log.locator(),
+        'LodgingLog.spatial_index': lambda ctx: ctx.log.spatial_index()
+            .nearest(40.0, -100.0, k=10),
+        # Report scripts, which each load their own log.
+        'annual_night_counts': lambda ctx: annual_night_counts
+            .create_annual_night_counts(
+                ctx.output_dir / "annual.csv", log=LodgingLog(ctx.lodging_path)
+            ),
+        'frequency_table': lambda ctx: frequency_table.frequency_table(
+            'metro', silent=True, log=LodgingLog(ctx.lodging_path)
+        ),
+        'milestones': lambda ctx: milestones.milestones(
+            log=LodgingLog(ctx.lodging_path)
+        ),
+        'regions_lived_stayed_report': lambda ctx: regions_lived_stayed_report
+            .create_regions_report(
+                ctx.output_dir / "regions.csv",
+                log=LodgingLog(ctx.lodging_path),
+            ),
+        'date_year_distance_matrix': lambda ctx: distance_from_home_by_day
+            .DistanceByDayChart(log=LodgingLog(ctx.lodging_path))
+            .date_year_distance_matrix(ctx.distance_years),
+        'GroupedStayCollection+SVGChart.export': grouped_and_svg,
+        'nightly_location_report': lambda ctx: nightly_location_report
+            .nightly_location_report(
+                ctx.output_dir / "nightly.html",
+                log=LodgingLog(ctx.lodging_path),
+            ),
+    }
+
+def measure(func, ctx, repeat=1, memory=True) -> dict:
+    """Returns the wall times and peak traced memory of a function.
+
+    Wall times are measured without tracemalloc, which slows down
+    allocation-heavy code; peak memory is measured in one more run with
+    tracemalloc enabled. Memory allocated outside of Python's allocators
+    (such as by GDAL) is not included.
+    """
+    result = {'wall_seconds': [], 'peak_mib': None, 'error': None}
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                func(ctx)
+            result['wall_seconds'].append(time.perf_counter() - start)
+        if memory:
+            gc.collect()
+            tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                func(ctx)
+            result['peak_mib'] = tracemalloc.get_traced_memory()[1] / 2**20
+    except Exception as e: # pylint: disable=broad-except
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    if result['wall_seconds']:
+        result['best_seconds'] = min(result['wall_seconds'])
+    else:
+        result['best_seconds'] = None
+    return result
+
+def run_benchmarks(
+    output_json,
+    sizes=None,
+    years=50,
+    seed=0,
+    end_date=DEFAULT_END_DATE,
+    entries=None,
+    repeat=1,
+    memory=True,
+    data_dir=None,
+    distance_years=2,
+    baseline=None,
+):
+    """Runs the benchmarks and writes the results to a JSON file."""
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    all_entries = _entries()
+    names = list(all_entries) if entries is None else entries
+    for name in names:
+        if name not in all_entries:
+            raise ValueError(f"Invalid benchmark entry: {name}")
+    data_dir = Path(data_dir or tempfile.gettempdir())
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for size in sizes:
+            gpkg_path = data_dir / (
+                f"synthetic_{size}_{years}_{seed}_{end_date:%Y%m%d}.gpkg"
+            )
+            if not gpkg_path.exists():
+                print(f"Creating {gpkg_path}")
+                create_synthetic_gpkg(
+                    gpkg_path,
+                    stays=size,
+                    years=years,
+                    seed=seed,
+                    end_date=end_date,
+                )
+            log = LodgingLog(gpkg_path)
+            thru_year = log.stays()['check_in_date'].max().year
+            ctx = SimpleNamespace(
+                log=log,
+                lodging_path=gpkg_path,
+                output_dir=Path(output_dir),
+                distance_years=[thru_year - distance_years + 1, thru_year],
+            )
+            for name in names:
+                result = measure(all_entries[name], ctx, repeat, memory)
+                result = {'stays': size, 'years': years, 'entry': name} \
+                    | result
+                results.append(result)
+                print(_format_result(result))
+
+    output = {
+        'metadata': {
+            'commit': _git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'end_date': end_date.isoformat(),
+        },
+        'results': results,
+    }
+    with open(output_json, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"Saved benchmark results to {output_json}")
+
+    if baseline is not None:
+        compare(baseline, output_json)
+
+def compare(baseline_json, current_json):
+    """Prints the change in time and memory between two result files."""
+    def load(path):
+        with open(path, encoding='utf-8') as f:
+            return {
+                (r['stays'], r['years'], r['entry']): r
+                for r in json.load(f)['results']
+            }
+    baseline = load(baseline_json)
+    current = load(current_json)
+    print(f"\n{'entry':<40} {'stays':>7} {'time':>8} {'memory':>8}")
+    for key, result in current.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        print(
+            f"{key[2]:<40} {key[0]:>7} "
+            f"{_ratio(result['best_seconds'], old['best_seconds']):>8} "
+            f"{_ratio(result['peak_mib'], old['peak_mib']):>8}"
+        )
+
+def _format_result(result) -> str:
+    """Returns a one-line summary of a benchmark result."""
+    if result['error'] is not None:
+        return f"{result['stays']:>7} {result['entry']}: {result['error']}"
+    peak = result['peak_mib']
+    peak_str = "" if peak is None else f", {peak:.1f} MiB peak"
+    return (
+        f"{result['stays']:>7} {result['entry']}: "
+        f"{result['best_seconds']:.3f} s{peak_str}"
+    )
+
+def _git_commit():
+    """Returns the current git commit hash, or None if unavailable."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _ratio(new, old) -> str:
+    """Returns a ratio of new to old values, formatted as a string."""
+    if new is None or old is None or old == 0:
+        return "-"
+    return f"{new / old:.2f}x"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark LodgingLog and reports on synthetic data."
+    )
+    parser.add_argument('output_json',
+        help="JSON file to write the results to",
+        type=Path,
+    )
+    parser.add_argument('--sizes',
+        help="numbers of stays to benchmark",
+        type=int,
+        nargs='+',
+        default=DEFAULT_SIZES,
+    )
+    parser.add_argument('--years',
+        help="number of years the synthetic stays span",
+        type=int,
+        default=50,
+    )
+    parser.add_argument('--seed',
+        help="random seed for the synthetic data",
+        type=int,
+        default=0,
+    )
+    parser.add_argument('--end_date',
+        help="last morning of the synthetic stays (default: "
+            f"{DEFAULT_END_DATE})",
+        type=date.fromisoformat,
+        default=DEFAULT_END_DATE,
+    )
+    parser.add_argument('--entries',
+        help="benchmark entries to run (default: all)",
+        nargs='+',
+    )
+    parser.add_argument('--repeat',
+        help="number of timed runs of each entry",
+        type=int,
+        default=1,
+    )
+    parser.add_argument('--skip_memory',
+        help="do not measure peak memory",
+        action='store_true',
+    )
+    parser.add_argument('--data_dir',
+        help="folder to create and reuse synthetic GeoPackages in",
+        type=Path,
+    )
+    parser.add_argument('--distance_years',
+        help="number of years to include in distance matrices",
+        type=int,
+        default=2,
+    )
+    parser.add_argument('--baseline',
+        help="prior results JSON file to compare against",
+        type=Path,
+    )
+    args = parser.parse_args()
+    run_benchmarks(
+        args.output_json,
+        sizes=args.sizes,
+        years=args.years,
+        seed=args.seed,
+        end_date=args.end_date,
+        entries=args.entries,
+        repeat=args.repeat,
+        memory=not args.skip_memory,
+        data_dir=args.data_dir,
+        distance_years=args.distance_years,
+        baseline=args.baseline,
+    )
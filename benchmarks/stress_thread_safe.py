@@ -0,0 +1,213 @@
+"""
+Stress tests a ThreadSafeLodgingLog by calling its methods from many
+threads at once, checking every result against a CachedLodgingLog
+used from one thread, and reporting the throughput.
+"""
+
+# Standard library imports
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Third-party imports
+import argparse
+import pandas as pd
+
+# First-party imports
+from benchmarks.synthetic_gpkg import create_synthetic_gpkg
+from lodging_data_utils import CachedLodgingLog, ThreadSafeLodgingLog
+
+def _calls(years) -> dict:
+    """Returns a dict of call names to (make_args, call) tuples.
+    make_args takes a random.Random and returns a tuple of arguments,
+    and call takes a log and the arguments and returns a DataFrame.
+    Calls with the same arguments on any log must return equal results.
+    """
+    def year_range(rng):
+        year = rng.choice(years)
+        return (f"{year}-01-01", f"{year}-12-31")
+
+    return {
+        'mornings': (
+            year_range,
+            lambda log, start, thru: log.mornings(start, thru),
+        ),
+        'mornings_by': (
+            lambda rng: (rng.choice(['city', 'region']), *year_range(rng)),
+            lambda log, by, start, thru: log.mornings_by(by, start, thru)
+                [['stay_fid', 'type_fid', 'key']],
+        ),
+        'night_counter': (
+            lambda rng: (
+                rng.choice(['year', 'month']),
+                rng.choice(['purpose', 'brand', 'country']),
+            ),
+            lambda log, period, by: log.night_counter()
+                .count(period, by=[by]),
+        ),
+        'place_index': (
+            lambda rng: (rng.choice(['city', 'metro', 'region']),),
+            lambda log, level: pd.DataFrame({
+                name: log.place_index().levels[level][name]
+                for name in ['fids', 'keys']
+            }),
+        ),
+        'spatial_index': (
+            lambda rng: (
+                rng.choice(['stay_locations', 'cities']),
+                round(rng.uniform(-60, 60), 2),
+                round(rng.uniform(-180, 180), 2),
+            ),
+            lambda log, layer, lat, lon: log.spatial_index(layer)
+                .nearest(lat, lon, k=5),
+        ),
+        'stays': (
+            lambda rng: (),
+            lambda log: log.stays(),
+        ),
+    }
+
+def stress_thread_safe(
+    lodging_path=None, threads=16, calls=2000, seed=0, stays=2000, years=10
+) -> bool:
+    """Runs the stress test and prints a summary.
+
+    Each thread makes random calls, checks each result against the
+    result of the same call on a CachedLodgingLog used from one thread,
+    and then modifies the result, which must not affect the results of
+    later calls. The expected results are built before the threads
+    start, so the throughput only includes calls to the tested log.
+
+    Args:
+        lodging_path (Path): The GeoPackage to test. Defaults to a
+            synthetic GeoPackage.
+        threads (int): The number of threads.
+        calls (int): The total number of calls, across all threads.
+        seed (int): The random seed for the calls and synthetic data.
+        stays (int): The number of synthetic stays.
+        years (int): The number of years the synthetic stays span.
+
+    Returns:
+        bool: True if every result was correct.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if lodging_path is None:
+            lodging_path = Path(temp_dir) / "stress.gpkg"
+            create_synthetic_gpkg(
+                lodging_path, stays=stays, years=years, seed=seed
+            )
+        reference = CachedLodgingLog(lodging_path)
+        check_ins = reference.stays()['check_in_date']
+        call_funcs = _calls(
+            list(range(check_ins.min().year, check_ins.max().year + 1))
+        )
+        thread_calls = []
+        for thread_index in range(threads):
+            rng = random.Random(seed * 1000 + thread_index)
+            thread_calls.append([])
+            for _ in range(calls // threads):
+                name = rng.choice(list(call_funcs))
+                thread_calls[-1].append((name, call_funcs[name][0](rng)))
+        expected = {
+            (name, args): call_funcs[name][1](reference, *args)
+            for name, args in set(sum(thread_calls, []))
+        }
+
+        start = time.perf_counter()
+        log = ThreadSafeLodgingLog(lodging_path)
+        load_seconds = time.perf_counter() - start
+
+        def run(thread_index):
+            """Makes this thread's share of the calls, and returns a
+            list of call times and a list of errors.
+            """
+            seconds = []
+            errors = []
+            for name, args in thread_calls[thread_index]:
+                call_start = time.perf_counter()
+                try:
+                    result = call_funcs[name][1](log, *args)
+                except Exception as e: # pylint: disable=broad-except
+                    errors.append(f"{name}{args}: {type(e).__name__}: {e}")
+                    continue
+                seconds.append(time.perf_counter() - call_start)
+                try:
+                    pd.testing.assert_frame_equal(
+                        result, expected[(name, args)]
+                    )
+                except AssertionError as e:
+                    errors.append(f"{name}{args}: {e}")
+                # Modify the result, which must not change later results.
+                if len(result) > 0:
+                    result.iloc[0, 0] = None
+                result['stress_column'] = 1
+            return seconds, errors
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            outcomes = list(executor.map(run, range(threads)))
+        wall_seconds = time.perf_counter() - start
+
+    seconds = pd.Series([s for outcome in outcomes for s in outcome[0]])
+    errors = [e for outcome in outcomes for e in outcome[1]]
+    print(f"Loaded the log in {load_seconds:.3f} s.")
+    print(
+        f"{len(seconds)} calls from {threads} threads in "
+        f"{wall_seconds:.3f} s ({len(seconds) / wall_seconds:.0f} calls/s, "
+        f"median {1000 * seconds.median():.2f} ms, "
+        f"95th percentile {1000 * seconds.quantile(0.95):.2f} ms)."
+    )
+    if errors:
+        print(f"{len(errors)} incorrect results:")
+        for error in errors[:10]:
+            print(f"  {error}")
+        return False
+    print("Every result was correct.")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Stress test a ThreadSafeLodgingLog from many threads."
+    )
+    parser.add_argument('--lodging_path',
+        help="GeoPackage to test (default: a synthetic GeoPackage)",
+        type=Path,
+    )
+    parser.add_argument('--threads',
+        help="number of threads",
+        type=int,
+        default=16,
+    )
+    parser.add_argument('--calls',
+        help="total number of calls across all threads",
+        type=int,
+        default=2000,
+    )
+    parser.add_argument('--seed',
+        help="random seed for the calls and synthetic data",
+        type=int,
+        default=0,
+    )
+    parser.add_argument('--stays',
+        help="number of synthetic stays",
+        type=int,
+        default=2000,
+    )
+    parser.add_argument('--years',
+        help="number of years the synthetic stays span",
+        type=int,
+        default=10,
+    )
+    args = parser.parse_args()
+    passed = stress_thread_safe(
+        lodging_path=args.lodging_path,
+        threads=args.threads,
+        calls=args.calls,
+        seed=args.seed,
+        stays=args.stays,
+        years=args.years,
+    )
+    if not passed:
+        raise SystemExit(1)
@@ -0,0 +1,355 @@
+"""
+Creates a synthetic lodging GeoPackage from the template, with a
+configurable number of stays and years, for benchmarking.
+"""
+
+# Standard library imports
+import random
+import shutil
+import sqlite3
+import struct
+from datetime import date, timedelta
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+ROOT = Path(__file__).parent.parent
+TEMPLATE_PATH = ROOT / "templates" / "Lodging.gpkg"
+SRS_ID = 4326
+# The default last morning, fixed so that a seed always gives the same
+# data.
+DEFAULT_END_DATE = date(2024, 12, 31)
+
+PORTFOLIOS = {
+    'Hilton': ["Hampton Inn", "Hilton Garden Inn", "DoubleTree", "Hilton"],
+    'Marriott': ["Courtyard", "Residence Inn", "Fairfield Inn", "Marriott"],
+    'IHG': ["Holiday Inn Express", "Holiday Inn", "Staybridge Suites"],
+    'Hyatt': ["Hyatt Place", "Hyatt House", "Hyatt Regency"],
+    'Airbnb': [None],
+    'VRBO': [None],
+}
+LOCATION_TYPES = {
+    'Hotel': 0.75, 'STR': 0.1, 'Residence': 0.1, 'Campsite': 0.03,
+    'Other': 0.02,
+}
+
+def gpkg_point(lon, lat) -> bytes:
+    """Returns a GeoPackage binary point geometry with an envelope."""
+    # Header: magic, version 0, flags (little endian, XY envelope), SRS.
+    header = b"GP" + bytes([0, 0b00000011]) + struct.pack('<i', SRS_ID)
+    envelope = struct.pack('<4d', lon, lon, lat, lat)
+    wkb = struct.pack('<BIdd', 1, 1, lon, lat)
+    return header + envelope + wkb
+
+def _envelope_value(geom, i):
+    """Returns the ith envelope value (minx, maxx, miny, maxy) of a
+    GeoPackage binary geometry written by gpkg_point().
+    """
+    if geom is None:
+        return None
+    return struct.unpack_from('<4d', geom, 8)[i]
+
+def connect(path) -> sqlite3.Connection:
+    """Returns a connection to a GeoPackage with the spatial functions
+    used by the template's R-tree triggers registered.
+    """
+    conn = sqlite3.connect(path)
+    conn.create_function('ST_IsEmpty', 1, lambda geom: 0)
+    for i, name in enumerate(['ST_MinX', 'ST_MaxX', 'ST_MinY', 'ST_MaxY']):
+        conn.create_function(
+            name, 1, lambda geom, i=i: _envelope_value(geom, i)
+        )
+    return conn
+
+def create_synthetic_gpkg(
+    output_path,
+    stays=1000,
+    years=50,
+    seed=0,
+    end_date=DEFAULT_END_DATE,
+):
+    """Creates a synthetic lodging GeoPackage.
+
+    Stays are spaced out over the date range with random gaps, with a
+    mix of short and long stays, repeat visits, overnight flights,
+    occasional absences, and homes that change every few years. If the
+    stays do not fit in the date range, they are placed randomly and
+    overlapping nights are marked absent with absence flags, so the log
+    is always valid regardless of how many stays are requested.
+
+    Args:
+        output_path (Path): The GeoPackage file to create. An existing
+            file will be overwritten.
+        stays (int): Number of stays to create.
+        years (int): Number of years the stays span.
+        seed (int): Random seed.
+        end_date (date): The last morning of the date range. Defaults
+            to DEFAULT_END_DATE.
+    """
+    rng = random.Random(seed)
+    output_path = Path(output_path)
+    shutil.copyfile(TEMPLATE_PATH, output_path)
+    start_date = end_date - timedelta(days=int(years * 365.25))
+    day_count = (end_date - start_date).days
+
+    # Scale the number of places with the number of stays.
+    country_count = min(60, 5 + stays // 500)
+    city_count = min(20000, 20 + stays // 8)
+    metro_count = max(1, city_count // 6)
+    location_count = max(10, stays // 3)
+    airport_count = max(2, city_count // 50)
+
+    conn = connect(output_path)
+    cur = conn.cursor()
+
+    # Regions: countries, half of which have subdivisions.
+    leaf_regions = []
+    region_rows = []
+    fid = 0
+    for c in range(country_count):
+        fid += 1
+        country_fid = fid
+        country_lon = rng.uniform(-170, 170)
+        country_lat = rng.uniform(-45, 65)
+        region_rows.append((
+            country_fid, gpkg_point(country_lon, country_lat),
+            f"C{c:02d}", f"Country {c}", 0, None,
+        ))
+        if c % 2 == 0:
+            for s in range(rng.randint(3, 12)):
+                fid += 1
+                region_rows.append((
+                    fid, gpkg_point(
+                        country_lon + rng.uniform(-8, 8),
+                        country_lat + rng.uniform(-5, 5),
+                    ),
+                    f"C{c:02d}-S{s:02d}", f"Subdivision {c}-{s}", 1,
+                    country_fid,
+                ))
+                leaf_regions.append((fid, country_lon, country_lat))
+        else:
+            leaf_regions.append((country_fid, country_lon, country_lat))
+    cur.executemany(
+        "INSERT INTO regions "
+        "(fid, geom, iso_3166, name, admin_level, parent_region_fid) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        region_rows,
+    )
+
+    # Metros and cities.
+    metro_rows = []
+    city_rows = []
+    city_coords = {}
+    for m in range(1, metro_count + 1):
+        region_fid, lon, lat = rng.choice(leaf_regions)
+        lon += rng.uniform(-8, 8)
+        lat += rng.uniform(-5, 5)
+        metro_rows.append((
+            m, gpkg_point(lon, lat), f"M/{m:05d}", f"Metro Area {m}",
+            f"Metro {m}",
+        ))
+        city_coords[m] = (region_fid, lon, lat)
+    for c in range(1, city_count + 1):
+        if rng.random() < 0.6:
+            metro_fid = rng.randint(1, metro_count)
+            region_fid, lon, lat = city_coords[metro_fid]
+            lon += rng.uniform(-0.5, 0.5)
+            lat += rng.uniform(-0.5, 0.5)
+        else:
+            metro_fid = None
+            region_fid, lon, lat = rng.choice(leaf_regions)
+            lon += rng.uniform(-8, 8)
+            lat += rng.uniform(-5, 5)
+        is_airport = c <= airport_count
+        city_rows.append((
+            c, gpkg_point(lon, lat),
+            f"AIRPORT/A{c:02d}" if is_airport else f"X/CITY {c}",
+            f"AIRPORT/A{c:02d}" if is_airport else f"City {c}",
+            metro_fid, region_fid,
+        ))
+    cur.executemany(
+        "INSERT INTO metros (fid, geom, key, title, name) "
+        "VALUES (?, ?, ?, ?, ?)",
+        metro_rows,
+    )
+    cur.executemany(
+        "INSERT INTO cities (fid, geom, key, name, metro_fid, region_fid) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        city_rows,
+    )
+
+    # Stay locations, including flight arrival airports and midpoints.
+    location_rows = []
+    location_info = {}
+    type_names = list(LOCATION_TYPES)
+    type_weights = list(LOCATION_TYPES.values())
+    for loc in range(1, location_count + 1):
+        loc_type = rng.choices(type_names, type_weights)[0]
+        city_fid = rng.randint(airport_count + 1, city_count) \
+            if city_count > airport_count else rng.randint(1, city_count)
+        if rng.random() < 0.02:
+            city_fid = None
+        portfolio = brand = None
+        if loc_type == 'Hotel' and rng.random() < 0.8:
+            portfolio = rng.choice(list(PORTFOLIOS)[:4])
+            brand = rng.choice(PORTFOLIOS[portfolio])
+        elif loc_type == 'STR':
+            portfolio = rng.choice(['Airbnb', 'VRBO'])
+        lon, lat = _location_coords(rng, city_rows, city_fid)
+        location_rows.append((
+            loc, gpkg_point(lon, lat), f"{brand or loc_type} {loc}",
+            loc_type, city_fid, 0, brand, portfolio,
+            f"{loc:06d}" if portfolio else None,
+        ))
+        location_info[loc] = (loc_type, portfolio, brand)
+    flight_locations = []
+    for a in range(1, airport_count + 1):
+        loc = location_count + a
+        lon, lat = _location_coords(rng, city_rows, a)
+        location_rows.append((
+            loc, gpkg_point(lon, lat), f"FLIGHT/A{a:02d}", 'Flight', a, 0,
+            None, None, None,
+        ))
+        flight_locations.append(loc)
+    loc = location_count + airport_count + 1
+    location_rows.append((
+        loc, gpkg_point(rng.uniform(-180, 180), rng.uniform(-60, 60)),
+        "FLIGHT/A01-A02", 'Flight', None, 0, None, None, None,
+    ))
+    flight_locations.append(loc)
+    cur.executemany(
+        "INSERT INTO stay_locations "
+        "(fid, geom, name, type, city_fid, is_approximate, brand, "
+        "portfolio, portfolio_code) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        location_rows,
+    )
+
+    # Homes, changing every few years.
+    home_rows = []
+    move_in = start_date - timedelta(days=30)
+    while move_in < end_date:
+        home_rows.append((
+            move_in.isoformat(), rng.randint(1, location_count),
+        ))
+        move_in += timedelta(days=rng.randint(365 * 2, 365 * 8))
+    cur.executemany(
+        "INSERT INTO homes (move_in_date, stay_location_fid) VALUES (?, ?)",
+        home_rows,
+    )
+
+    # Stays. Favorite locations are revisited more often.
+    favorites = [rng.randint(1, location_count) for _ in range(25)]
+    stay_plans = []
+    for _ in range(stays):
+        if rng.random() < 0.05:
+            loc = rng.choice(flight_locations)
+            nights = 1
+        else:
+            if rng.random() < 0.3:
+                loc = rng.choice(favorites)
+            else:
+                loc = rng.randint(1, location_count)
+            nights = min(int(rng.expovariate(1 / 2.5)) + 1, 60)
+        stay_plans.append((loc, nights))
+
+    # Space stays out with random gaps when they fit in the date range.
+    # Otherwise, place them randomly, and let them overlap.
+    total_nights = sum(nights for _, nights in stay_plans)
+    mean_gap = (day_count * 0.95 - total_nights) / stays
+    if mean_gap >= 1:
+        check_ins = []
+        offset = 0
+        for _, nights in stay_plans:
+            offset += int(rng.expovariate(1 / mean_gap))
+            check_ins.append(offset)
+            offset += nights
+    else:
+        check_ins = sorted(rng.randrange(day_count) for _ in range(stays))
+
+    occupied_thru = -1 # Last day offset with a present night.
+    stay_rows = []
+    for offset, (loc, nights) in zip(check_ins, stay_plans):
+        loc_type, portfolio, brand = location_info.get(
+            loc, ('Flight', None, None)
+        )
+
+        # Mark nights absent when they overlap earlier stays, and
+        # occasionally at random.
+        flags = []
+        for n in range(nights):
+            morning_offset = offset + n + 1
+            absent = morning_offset <= occupied_thru or (
+                nights > 2 and rng.random() < 0.03
+            )
+            flags.append('A' if absent else 'P')
+            if not absent:
+                occupied_thru = morning_offset
+        absence_flags = None if 'A' not in flags else ''.join(flags)
+        stay_rows.append((
+            (start_date + timedelta(days=offset)).isoformat(), nights,
+            portfolio, brand, loc,
+            'Business' if rng.random() < 0.55 else 'Personal',
+            absence_flags,
+        ))
+    cur.executemany(
+        "INSERT INTO stays "
+        "(check_in_date, nights, portfolio, brand, stay_location_fid, "
+        "purpose, absence_flags) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        stay_rows,
+    )
+
+    conn.commit()
+    conn.close()
+    return output_path
+
+def _location_coords(rng, city_rows, city_fid) -> tuple[float, float]:
+    """Returns coordinates near a city, or random coordinates if the
+    city is None.
+    """
+    if city_fid is None:
+        return (rng.uniform(-170, 170), rng.uniform(-45, 65))
+    geom = city_rows[city_fid - 1][1]
+    lon = _envelope_value(geom, 0)
+    lat = _envelope_value(geom, 2)
+    return (lon + rng.uniform(-0.05, 0.05), lat + rng.uniform(-0.05, 0.05))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create a synthetic lodging GeoPackage."
+    )
+    parser.add_argument('output_gpkg',
+        help="GeoPackage file to create",
+        type=Path,
+    )
+    parser.add_argument('--stays',
+        help="number of stays",
+        type=int,
+        default=1000,
+    )
+    parser.add_argument('--years',
+        help="number of years the stays span",
+        type=int,
+        default=50,
+    )
+    parser.add_argument('--seed',
+        help="random seed",
+        type=int,
+        default=0,
+    )
+    parser.add_argument('--end_date',
+        help=f"last morning of the date range (default: {DEFAULT_END_DATE})",
+        type=date.fromisoformat,
+        default=DEFAULT_END_DATE,
+    )
+    args = parser.parse_args()
+    create_synthetic_gpkg(
+        args.output_gpkg,
+        stays=args.stays,
+        years=args.years,
+        seed=args.seed,
+        end_date=args.end_date,
+    )
+    print(f"Created synthetic GeoPackage at {args.output_gpkg}")
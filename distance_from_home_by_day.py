@@ -20,10 +20,8 @@ from matplotlib.gridspec import GridSpec
 from pyproj import Geod
 
 # First-party imports
-from lodging_data_utils import LodgingLog
-
-KM_PER_MILE = 1.6093
-DECIMAL_PLACES = 2 # Number of decimal places to round distances to.
+from lodging_data_utils import CachedLodgingLog, LodgingLog, profiling
+from lodging_data_utils.distances import DECIMAL_PLACES, KM_PER_MILE
 
 COLORS = {
     'line': "#ee7733",
@@ -33,9 +31,11 @@ COLORS = {
     'grid_minor': "#f0f0f0",
 }
 
+@profiling.profiled
 def distance_from_home_by_day(
     single_multi, years,
-    output_img=None, output_csv=None, labels=None, earliest_prior_year=None
+    output_img=None, output_csv=None, labels=None, earliest_prior_year=None,
+    log=None,
 ):
     """
     Generate a distance from home by day chart for a single year or
@@ -48,17 +48,20 @@ def distance_from_home_by_day(
             output_csv,
             labels,
             earliest_prior_year,
+            log=log,
         ).plot()
     elif single_multi == 'multi':
-        YearsAndAverageDistanceChart(years[0], years[1], output_img).plot()
+        YearsAndAverageDistanceChart(
+            years[0], years[1], output_img, log=log
+        ).plot()
 
 
 class DistanceByDayChart():
     """Parent class for distance by day charts."""
 
-    def __init__(self):
+    def __init__(self, log=None):
         """Initialize the chart."""
-        self.log = LodgingLog()
+        self.log = LodgingLog() if log is None else log
         self.home_locations = self.log.home_locations()
 
     def apply_styles(self, ax, ax_data, year, include_xaxis=False):
@@ -82,7 +85,22 @@ class DistanceByDayChart():
         else:
             ax.get_xaxis().set_ticklabels([])
 
+    @profiling.profiled
     def date_year_distance_matrix(self, years_inclusive):
+        """
+        Returns a DataFrame of miles from home for each day in the
+        specified inclusive range of years. If the log is a
+        CachedLodgingLog, the matrix is cached on the log, so charts
+        sharing the log and years calculate it only once.
+        """
+        if isinstance(self.log, CachedLodgingLog):
+            return self.log.cached(
+                ('distance_matrix', *years_inclusive),
+                self._distance_matrix, years_inclusive,
+            ).copy()
+        return self._distance_matrix(years_inclusive)
+
+    def _distance_matrix(self, years_inclusive):
         """
         Returns a DataFrame of miles from home for each day in the
         specified inclusive range of years.
@@ -105,14 +123,6 @@ class DistanceByDayChart():
                 # Morning is at home.
                 return 0.0
 
-        # Get all lodging in the specified range of years.
-        lodging_mornings = self.log.mornings_by(
-            by='city',
-            start_morning=date(years_inclusive[0], 1, 1),
-            thru_morning=date(years_inclusive[1], 12, 31),
-            exclude_transit=False,
-        )
-
         # Create a DataFrame with all mornings in the range.
         df = pd.DataFrame()
         df['morning'] = pd.date_range(
@@ -121,10 +131,21 @@ class DistanceByDayChart():
             freq='D',
         )
 
-        # Calculate distance from home for each morning.
-        df['distance_mi'] = df['morning'].apply(
-            lambda d: morning_distance(d, lodging_mornings)
-        ).round(DECIMAL_PLACES)
+        # Calculate distance from home for each morning, reading the
+        # lodging in the range one year at a time.
+        distances = pd.Series(0.0, index=df['morning'])
+        for _, lodging_mornings in self.log.iter_mornings(
+            by='city',
+            chunk='year',
+            start_morning=date(years_inclusive[0], 1, 1),
+            thru_morning=date(years_inclusive[1], 12, 31),
+            exclude_transit=False,
+        ):
+            distances[lodging_mornings.index] = [
+                morning_distance(d, lodging_mornings)
+                for d in lodging_mornings.index
+            ]
+        df['distance_mi'] = distances.to_numpy().round(DECIMAL_PLACES)
 
         # Split out years, months, and days.
         df['year'] = df['morning'].dt.year
@@ -173,9 +194,9 @@ class SingleYearDistanceChart(DistanceByDayChart):
     def __init__(
             self, year,
             output_img=None, output_csv=None,
-            labels=None, earliest_prior_year=None,
+            labels=None, earliest_prior_year=None, log=None,
         ):
-        super().__init__()
+        super().__init__(log)
 
         self.year = int(year)
         self.output_img = output_img
@@ -293,8 +314,8 @@ class SingleYearDistanceChart(DistanceByDayChart):
 class YearsAndAverageDistanceChart(DistanceByDayChart):
     """A chart for each year and a chart averaging all years."""
 
-    def __init__(self, start_year, thru_year, output=None):
-        super().__init__()
+    def __init__(self, start_year, thru_year, output=None, log=None):
+        super().__init__(log)
         self.start_year = int(start_year)
         self.thru_year = int(thru_year)
         self.output_img = output
@@ -398,8 +419,13 @@ class YearsAndAverageDistanceChart(DistanceByDayChart):
             plt.savefig(self.output_img)
             print(f"Saved distance by day chart to {self.output_img}.")
 
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
 
-if __name__ == "__main__":
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
     parser = argparse.ArgumentParser()
     subparsers = parser.add_subparsers(dest='single_multi', required=True)
 
@@ -471,7 +497,9 @@ if __name__ == "__main__":
         default=None,
     )
 
-    args = parser.parse_args()
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
     if args.single_multi == 'single':
         distance_from_home_by_day(
             'single',
@@ -480,10 +508,15 @@ if __name__ == "__main__":
             args.output_csv,
             args.labels,
             args.earliest_prior_year,
+            log=log,
         )
     else:
         distance_from_home_by_day(
             'multi',
             [args.start_year, args.thru_year],
-            args.output_img
+            args.output_img,
+            log=log,
         )
+
+if __name__ == "__main__":
+    main()
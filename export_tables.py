@@ -0,0 +1,165 @@
+"""
+Exports the derived tables of the lodging log (mornings, homes, the
+daily timeline, and daily distance from home) to Parquet or Arrow IPC
+files for other analytics tools.
+"""
+
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import argparse
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+from lodging_data_utils import derived_tables
+from lodging_data_utils.derived_tables import TABLES
+
+FORMATS = {'parquet': ".parquet", 'arrow': ".arrow"}
+DEFAULT_ROW_GROUP_SIZE = 131072
+
+# String columns with few distinct values, stored with dictionary types.
+DICTIONARY_COLUMNS = [
+    'status', 'purpose', 'type', 'portfolio', 'brand', 'name',
+    'stay_location_name', 'city_key', 'city_name', 'metro_key',
+    'metro_name', 'region_key', 'region_name', 'country_key',
+    'country_name',
+]
+DATE_COLUMNS = ['morning', 'move_in_date', 'first_morning', 'last_morning']
+
+@profiling.profiled
+def export_tables(
+    output_dir,
+    output_format='parquet',
+    tables=None,
+    row_group_size=DEFAULT_ROW_GROUP_SIZE,
+    log=None,
+) -> list[Path]:
+    """Writes derived tables to files named after each table.
+
+    Parquet files are compressed with zstd and split into row groups of
+    row_group_size rows. Arrow IPC files are uncompressed, so they can
+    be memory mapped and read without copying, and are split into
+    record batches of row_group_size rows.
+
+    Args:
+        output_dir (Path): The folder to write files to.
+        output_format (str): 'parquet' or 'arrow'.
+        tables (list[str]): The tables to export. Defaults to all
+            TABLES.
+        row_group_size (int): The maximum rows per Parquet row group or
+            Arrow record batch.
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+
+    Returns:
+        list[Path]: The paths of the files written.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Invalid format: {output_format}")
+    tables = TABLES if tables is None else tables
+    for table in tables:
+        if table not in TABLES:
+            raise ValueError(f"Invalid table: {table}")
+    log = LodgingLog() if log is None else log
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # The daily distance table is built from the daily timeline, so
+    # build the timeline once if both are exported.
+    frames = {}
+    for table in tables:
+        if table == 'daily_distance':
+            if 'daily' not in frames:
+                frames['daily'] = derived_tables.daily_timeline(log)
+            frames[table] = derived_tables.daily_distance(
+                log, timeline=frames['daily']
+            )
+        elif table not in frames:
+            frames[table] = derived_tables.build_table(log, table)
+
+    paths = []
+    for table in tables:
+        path = output_dir / f"{table}{FORMATS[output_format]}"
+        with profiling.span(f"export_tables.write[{table}]") as s:
+            arrow_table = to_arrow(frames[table])
+            s.rows = arrow_table.num_rows
+            if output_format == 'parquet':
+                pq.write_table(
+                    arrow_table,
+                    path,
+                    row_group_size=row_group_size,
+                    use_dictionary=True,
+                    compression='zstd',
+                )
+            else:
+                with pa.OSFile(str(path), 'wb') as sink:
+                    with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                        writer.write_table(
+                            arrow_table, max_chunksize=row_group_size
+                        )
+        print(f"Wrote {arrow_table.num_rows} rows to {path}")
+        paths.append(path)
+    return paths
+
+def to_arrow(df) -> pa.Table:
+    """Converts a derived table to an Arrow table, with dictionary types
+    for low cardinality strings and date types for dates.
+    """
+    df = df.copy()
+    for col in DICTIONARY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for col in DATE_COLUMNS:
+        if col in table.column_names:
+            i = table.schema.get_field_index(col)
+            table = table.set_column(
+                i, col, table.column(col).cast(pa.date32())
+            )
+    return table
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    parser = argparse.ArgumentParser(
+        description="Export derived tables to Parquet or Arrow IPC files."
+    )
+    parser.add_argument('output_dir',
+        help="folder to write files to",
+        type=Path,
+    )
+    parser.add_argument('--format',
+        help="file format (default: parquet)",
+        choices=list(FORMATS),
+        default='parquet',
+    )
+    parser.add_argument('--tables',
+        help="tables to export (default: all)",
+        choices=TABLES,
+        nargs='+',
+    )
+    parser.add_argument('--row_group_size',
+        help="maximum rows per Parquet row group or Arrow record batch "
+            f"(default: {DEFAULT_ROW_GROUP_SIZE})",
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    export_tables(
+        args.output_dir,
+        output_format=args.format,
+        tables=args.tables,
+        row_group_size=args.row_group_size,
+        log=log,
+    )
+
+if __name__ == "__main__":
+    main()
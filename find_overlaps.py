@@ -0,0 +1,88 @@
+"""
+Finds stays with overlapping mornings in the lodging log, without
+expanding it to mornings, and suggests the absence_flags edits that
+resolve them as an SQL script or a CSV patch.
+"""
+
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+
+@profiling.profiled
+def find_overlaps(output_sql=None, output_csv=None, log=None) -> bool:
+    """Finds overlapping stays and prints a report of suggested fixes.
+
+    Args:
+        output_sql (Path): If provided, write an SQL script applying the
+            suggested fixes to this file.
+        output_csv (Path): If provided, write the suggested fixes to
+            this CSV file.
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+
+    Returns:
+        bool: True if no stays overlap.
+    """
+    log = LodgingLog() if log is None else log
+    finder = log.overlap_finder()
+    overlaps = finder.overlaps()
+    if overlaps.empty:
+        print(f"No overlapping stays found in {len(finder)} stays.")
+        return True
+
+    fixes = finder.fixes()
+    print(f"Found {len(overlaps)} overlapping pairs of stays:")
+    print(overlaps.to_string(index=False))
+    print(f"\nSuggested absence_flags for {len(fixes)} stays:")
+    print(fixes.to_string(index=False))
+
+    if output_sql is not None:
+        with open(output_sql, 'w', encoding='utf-8') as f:
+            f.write(finder.sql())
+        print(f"Saved SQL script to {output_sql}.")
+    if output_csv is not None:
+        fixes.to_csv(output_csv, index=False, date_format='%Y-%m-%d')
+        print(f"Saved suggested fixes to {output_csv}.")
+    return False
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    parser = argparse.ArgumentParser(
+        description="Find overlapping stays and suggest absence_flags "
+            "fixes."
+    )
+    parser.add_argument('--output_sql',
+        help="SQL script file to write the suggested fixes to",
+    )
+    parser.add_argument('--output_csv',
+        help="CSV file to write the suggested fixes to",
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    if args.lodging_path is not None:
+        log = LodgingLog(args.lodging_path)
+    found = not find_overlaps(
+        output_sql=args.output_sql,
+        output_csv=args.output_csv,
+        log=log,
+    )
+    if found:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
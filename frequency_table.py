@@ -11,10 +11,11 @@ from pathlib import Path
 import argparse
 
 # First-party imports
-from lodging_data_utils import LodgingLog
+from lodging_data_utils import LodgingLog, profiling
 
 COORD_DECIMALS = 4  # Number of decimal places for coordinates
 
+@profiling.profiled
 def frequency_table(
     by='City',
     start_morning=None,
@@ -24,10 +25,11 @@ def frequency_table(
     exclude_transit=False,
     rank=False,
     silent=False,
+    log=None,
 ):
     """Create a frequency table of hotel locations and nights."""
 
-    log = LodgingLog()
+    log = LodgingLog() if log is None else log
 
     mornings = log.mornings_by(
         by=by,
@@ -95,8 +97,13 @@ def pluralize_total(label, count):
         label_str = total_labels[label][1]
     return f"Total {label_str}: {count}"
 
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
 
-if __name__ == "__main__":
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
     parser = argparse.ArgumentParser(
         description="Create a CSV of hotel locations and nights."
     )
@@ -134,7 +141,9 @@ if __name__ == "__main__":
         help="do not show table in console",
         action='store_true'
     )
-    args = parser.parse_args()
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
     frequency_table(
         args.by,
         start_morning=args.start_morning,
@@ -144,4 +153,8 @@ if __name__ == "__main__":
         exclude_transit=args.exclude_transit,
         rank=args.rank,
         silent=args.silent,
+        log=log,
     )
+
+if __name__ == "__main__":
+    main()
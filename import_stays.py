@@ -0,0 +1,92 @@
+"""
+Imports stays from a CSV, JSON, or JSON Lines file into the lodging
+GeoPackage in one transaction, matching or creating their stay
+locations, and validating the imported rows before committing.
+"""
+
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import profiling
+from lodging_data_utils.lodging_log import SOURCES
+from lodging_data_utils.stay_importer import (
+    BATCH_SIZE, StayImporter, read_records
+)
+
+@profiling.profiled
+def import_stays(
+    input_file, batch_size=BATCH_SIZE, dry_run=False, lodging_path=None
+) -> dict:
+    """Imports stays and prints a summary.
+
+    Args:
+        input_file (Path): The CSV, JSON, or JSON Lines file of stay
+            records.
+        batch_size (int): The number of records inserted at once.
+        dry_run (bool): If True, validate the import without saving it.
+        lodging_path (Path): The GeoPackage to import into. Defaults to
+            the lodging_gpkg data source.
+
+    Returns:
+        dict: The summary returned by StayImporter.import_records().
+    """
+    if lodging_path is None:
+        lodging_path = Path(SOURCES['lodging_gpkg']).expanduser()
+    importer = StayImporter(lodging_path, batch_size=batch_size)
+    summary = importer.import_records(read_records(input_file), dry_run)
+    action = "Validated (dry run)" if dry_run else "Imported"
+    print(
+        f"{action} {summary['stays']} stays from {input_file} in "
+        f"{summary['seconds']:.2f} s ({summary['locations_matched']} "
+        f"existing and {summary['locations_created']} new stay locations)."
+    )
+    return summary
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): If provided, import into this log's
+            GeoPackage.
+    """
+    parser = argparse.ArgumentParser(
+        description="Import stays into the lodging GeoPackage."
+    )
+    parser.add_argument('input_file',
+        help="CSV, JSON, or JSON Lines (.jsonl) file of stays",
+        type=Path,
+    )
+    parser.add_argument('--batch_size',
+        help=f"number of records inserted at once (default: {BATCH_SIZE})",
+        type=int,
+        default=BATCH_SIZE,
+    )
+    parser.add_argument('--dry_run',
+        help="validate the import without saving it",
+        action='store_true',
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    lodging_path = args.lodging_path
+    if lodging_path is None and log is not None:
+        lodging_path = log.lodging_path
+    import_stays(
+        args.input_file,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        lodging_path=lodging_path,
+    )
+
+if __name__ == "__main__":
+    main()
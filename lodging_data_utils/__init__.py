@@ -1,3 +1,29 @@
+from .cached_lodging_log import CachedLodgingLog
+from .compact_mornings import CompactMornings
+from .locator import Locator
 from .lodging_log import LodgingLog
+from .milestone_finder import MilestoneFinder
+from .mornings_query import MorningsQuery
+from .night_counter import NightCounter
+from .overlap_finder import OverlapFinder
+from .place_index import PlaceIndex
+from .place_table import PlaceTable
+from .spatial_index import SpatialIndex
+from .stay_intervals import StayIntervals
+from .thread_safe_lodging_log import ThreadSafeLodgingLog
 
-__all__ = ['LodgingLog']
\ No newline at end of file
+__all__ = [
+    'CachedLodgingLog',
+    'CompactMornings',
+    'Locator',
+    'LodgingLog',
+    'MilestoneFinder',
+    'MorningsQuery',
+    'NightCounter',
+    'OverlapFinder',
+    'PlaceIndex',
+    'PlaceTable',
+    'SpatialIndex',
+    'StayIntervals',
+    'ThreadSafeLodgingLog',
+]
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""Defines the CachedLodgingLog class, a LodgingLog that keeps query
+results and derived indexes in memory.
+"""
+
+# Standard library imports
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party imports
+import pandas as pd
+
+# First-party imports
+from .compact_mornings import CompactMornings
+from .log_snapshot import PLACE_TABLES, overlaps_years
+from .lodging_log import LodgingLog, TRANSIT_TYPES, filter_mornings
+from .profiling import carry_spans
+
+class CachedLodgingLog(LodgingLog):
+    """A LodgingLog that builds each query result and derived index once
+    and keeps it in memory, for processes that run several reports.
+
+    Cached DataFrames are returned as copies, so callers can modify
+    them. Each result is built under a lock for its key, so a
+    CachedLodgingLog can be shared between threads, and different
+    results (such as the place layers read at initialization) can be
+    built at the same time.
+    """
+
+    def __init__(self, lodging_path=None):
+        """Initializes the CachedLodgingLog.
+
+        Args:
+            lodging_path (Path): The lodging GeoPackage. Defaults to the
+                lodging_gpkg data source in config/data_sources.toml.
+        """
+        self._results = {}
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self._key_locks_lock = threading.Lock()
+        super().__init__(lodging_path)
+        self.mtime_ns = self.lodging_path.stat().st_mtime_ns
+
+    def cached(self, key, build, *args):
+        """Returns a cached result, building it if needed.
+
+        Only one thread builds each result; other threads needing it
+        wait for the build, while results with other keys can be built
+        at the same time.
+
+        Args:
+            key (tuple): A key identifying the result.
+            build (callable): A function that builds the result.
+            *args: Arguments for build.
+        """
+        # A result built while refresh() replaces the cache is added to
+        # the replaced cache, so it is never returned to later callers.
+        results = self._results
+        if key in results:
+            return results[key]
+        with self._key_locks_lock:
+            lock = self._key_locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in results:
+                results[key] = build(*args)
+            return results[key]
+
+    def geodata(self, layer):
+        """Returns a cached copy of LodgingLog.geodata()."""
+        return self._frame(('geodata', layer), super().geodata, layer)
+
+    def home_locations(self):
+        """Returns a cached copy of LodgingLog.home_locations()."""
+        return self._frame(('home_locations',), super().home_locations)
+
+    def is_stale(self) -> bool:
+        """Returns True if the GeoPackage has changed since loading."""
+        return self.lodging_path.stat().st_mtime_ns != self.mtime_ns
+
+    def locator(self):
+        """Returns a cached LodgingLog.locator()."""
+        return self.cached(('locator',), super().locator)
+
+    def milestone_finder(self, exclude_transit=True, milestones=None):
+        """Returns a cached LodgingLog.milestone_finder()."""
+        key = ('milestone_finder', exclude_transit, tuple(milestones or []))
+        return self.cached(
+            key, super().milestone_finder, exclude_transit, milestones
+        )
+
+    def mornings(self,
+        start_morning=None,
+        thru_morning=None,
+        types=None,
+        exclude_types=None,
+        purposes=None,
+    ):
+        """Returns a cached copy of LodgingLog.mornings()."""
+        # Cache all mornings, and filter them per call.
+        mornings = self.cached(('mornings',), super().mornings)
+        return self._copy(filter_mornings(
+            mornings.loc[start_morning:thru_morning],
+            types, exclude_types, purposes,
+        ))
+
+    def mornings_by(self,
+        by='location',
+        start_morning=None,
+        thru_morning=None,
+        exclude_transit=False,
+        types=None,
+        exclude_types=None,
+        purposes=None,
+    ):
+        """Returns a cached copy of LodgingLog.mornings_by()."""
+        # Cache all mornings for the grouping, and filter them per call.
+        mornings = self.cached(
+            ('mornings_by', by, exclude_transit),
+            super().mornings_by, by, None, None, exclude_transit,
+        )
+        return self._copy(filter_mornings(
+            mornings.loc[start_morning:thru_morning],
+            types, exclude_types, purposes,
+        ))
+
+    def night_counter(self, exclude_transit=False):
+        """Returns a cached LodgingLog.night_counter()."""
+        return self.cached(
+            ('night_counter', exclude_transit),
+            super().night_counter, exclude_transit,
+        )
+
+    def place_index(self, cache_path=None):
+        """Returns a cached LodgingLog.place_index()."""
+        return self.cached(('place_index',), super().place_index)
+
+    def refresh(self, changes, mornings_range=None) -> None:
+        """Updates the cached results after the GeoPackage changes.
+
+        Cached mornings (including mornings grouped by place) are
+        updated by expanding only the changed stays, and cached distance
+        matrices outside the range of affected mornings are kept. If any
+        place changed, all results are rebuilt.
+
+        Args:
+            changes (dict): Changed fids by table, as returned by
+                LogSnapshot.changes().
+            mornings_range (tuple): The first and last affected mornings
+                (None for unbounded), as returned by
+                LogSnapshot.changed_mornings().
+        """
+        with self._lock:
+            self._validate()
+            self.mtime_ns = self.lodging_path.stat().st_mtime_ns
+            old = self._results
+            self._results = {}
+            if any(table in changes for table in PLACE_TABLES):
+                self.places = {
+                    layer: self._read_place_table(layer)
+                    for layer in self.places
+                }
+                return
+
+            for key, value in old.items():
+                keep = key[0] == 'geodata' or (
+                    key[0] == 'home_locations' and 'homes' not in changes
+                ) or (
+                    key[0] == 'distance_matrix'
+                    and not overlaps_years(mornings_range, key[1], key[2])
+                )
+                if keep:
+                    self._results[key] = value
+
+            stay_fids = changes.get('stays', set())
+            if ('mornings',) not in old:
+                return
+            stays = self.stays()
+            new_mornings = CompactMornings.from_stays(
+                stays[stays['stay_fid'].isin(stay_fids)]
+            ).to_frame()
+            mornings = old[('mornings',)]
+            mornings = mornings[~mornings['stay_fid'].isin(stay_fids)]
+            self._results[('mornings',)] = self._index_mornings(pd.concat(
+                [mornings.reset_index(), new_mornings.reset_index()],
+                ignore_index=True,
+            ))
+
+            # Update mornings grouped by place for the changed stays.
+            for key, mornings_by in old.items():
+                if key[0] != 'mornings_by':
+                    continue
+                _, by, exclude_transit = key
+                mornings_by = mornings_by[
+                    ~mornings_by['stay_fid'].isin(stay_fids)
+                ]
+                new_by = new_mornings
+                if exclude_transit:
+                    new_by = new_by[~new_by.type.isin(TRANSIT_TYPES)]
+                if not new_by.empty:
+                    mornings_by = pd.concat([
+                        mornings_by,
+                        self._add_location_attrs(new_by.copy(), by),
+                    ]).sort_index(kind='stable')
+                self._results[key] = mornings_by
+
+    def spatial_index(self, layer='stay_locations', exclude_transit=False):
+        """Returns a cached LodgingLog.spatial_index()."""
+        return self.cached(
+            ('spatial_index', layer, exclude_transit),
+            super().spatial_index, layer, exclude_transit,
+        )
+
+    def stay_intervals(self, exclude_transit=False, verify=False):
+        """Returns a cached LodgingLog.stay_intervals()."""
+        return self.cached(
+            ('stay_intervals', exclude_transit, verify),
+            super().stay_intervals, exclude_transit, verify,
+        )
+
+    def stays(self):
+        """Returns a cached copy of LodgingLog.stays()."""
+        return self._frame(('stays',), super().stays)
+
+    def warm(self) -> None:
+        """Builds the results most reports use, at the same time."""
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [
+                pool.submit(carry_spans(build))
+                for build in [self.stays, self.mornings, self.home_locations]
+            ]
+            for future in futures:
+                future.result()
+
+    def _copy(self, frame):
+        """Returns the copy of a cached DataFrame given to callers."""
+        return frame.copy()
+
+    def _frame(self, key, build, *args):
+        """Returns a copy of a cached DataFrame, building it if needed."""
+        return self._copy(self.cached(key, build, *args))
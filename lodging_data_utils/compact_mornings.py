@@ -0,0 +1,264 @@
+"""Defines the CompactMornings class, a compact in-memory representation
+of the mornings in a lodging log.
+"""
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# The column types of mornings, whether expanded from stays or read from
+# a materialized stay_mornings table.
+MORNINGS_DTYPES = {
+    'morning': 'datetime64[ns]',
+    'stay_fid': 'int64',
+    'purpose': 'str',
+    'type': 'str',
+    'portfolio': object,
+    'brand': object,
+    'stay_location_fid': 'int64',
+    'city_fid': object,
+    'metro_fid': object,
+    'region_fid': object,
+}
+FID_COLUMNS = [
+    'stay_fid', 'stay_location_fid', 'city_fid', 'metro_fid', 'region_fid',
+]
+CATEGORY_COLUMNS = ['purpose', 'type', 'portfolio', 'brand']
+NULL_FID = -1 # Sentinel for null fids.
+
+class CompactMornings:
+    """The mornings of a lodging log, stored as NumPy arrays.
+
+    Each morning is an int32 day ordinal (days since 1970-01-01), each
+    fid is an int32 with NULL_FID for nulls, and each of purpose, type,
+    portfolio, and brand is a pandas Categorical (small integer codes
+    and one copy of each distinct value). This takes several times less
+    memory than the DataFrame returned by LodgingLog.mornings(), which
+    can be rebuilt with to_frame().
+
+    LodgingLog.compact_mornings() expands stays straight to these
+    arrays, without building the DataFrame. NightCounter,
+    MilestoneFinder, PlaceIndex, and SpatialIndex accept either form,
+    and work on the arrays directly.
+    """
+
+    __slots__ = (
+        'days', 'stay_fid', 'stay_location_fid', 'city_fid', 'metro_fid',
+        'region_fid', 'purpose', 'type', 'portfolio', 'brand',
+    )
+
+    def __init__(self, days, **columns):
+        """Initializes the CompactMornings.
+
+        Args:
+            days (ndarray): The sorted int32 day ordinals of the
+                mornings.
+            **columns: An int32 array for each of FID_COLUMNS, and a
+                Categorical for each of CATEGORY_COLUMNS.
+        """
+        self.days = days
+        for column in FID_COLUMNS + CATEGORY_COLUMNS:
+            setattr(self, column, columns[column])
+
+    def __len__(self):
+        """Returns the number of mornings."""
+        return len(self.days)
+
+    def __repr__(self):
+        """Returns a string representation of the CompactMornings."""
+        return (
+            f"CompactMornings({len(self)} mornings, "
+            f"{self.memory_usage()} bytes)"
+        )
+
+    @classmethod
+    def from_frame(cls, mornings) -> 'CompactMornings':
+        """Creates a CompactMornings from a mornings DataFrame.
+
+        Args:
+            mornings (DataFrame): A DataFrame of mornings, as returned
+                by LodgingLog.mornings().
+        """
+        columns = {}
+        for column in FID_COLUMNS:
+            columns[column] = pd.to_numeric(mornings[column]) \
+                .fillna(NULL_FID).to_numpy(dtype='int32')
+        for column in CATEGORY_COLUMNS:
+            # Categories are kept in order of first appearance, as
+            # pd.factorize() orders them.
+            codes, categories = pd.factorize(mornings[column])
+            columns[column] = pd.Categorical.from_codes(codes, categories)
+        days = mornings.index.values.astype('datetime64[D]') \
+            .astype('int32')
+        return cls(days, **columns)
+
+    @classmethod
+    def from_stays(cls, stays) -> 'CompactMornings':
+        """Creates a CompactMornings by expanding stays to their present
+        mornings, without building a row for each morning.
+
+        The mornings match CompactMornings.from_frame() of the DataFrame
+        LodgingLog.mornings() expands from the same stays. Stays without
+        a check-in date have no mornings, as in the stay_mornings table.
+
+        Args:
+            stays (DataFrame): A DataFrame of stays, as read by
+                LodgingLog._read_stays().
+
+        Raises:
+            ValueError: If two stays share a morning.
+        """
+        stays = stays[stays['check_in_date'].notna()]
+        nights = stays['nights'].fillna(0).to_numpy(dtype='int64')
+        nights = np.maximum(nights, 0)
+
+        # Number the nights of each stay, and keep the present ones. A
+        # stay without absence_flags is present every night.
+        stay_rows = np.repeat(np.arange(len(stays)), nights)
+        offsets = np.arange(len(stay_rows)) - np.repeat(
+            np.cumsum(nights) - nights, nights
+        )
+        flags = "".join(
+            "P" * n if pd.isna(flag) else flag[:n].ljust(n)
+            for flag, n in zip(stays['absence_flags'], nights)
+        )
+        present = np.frombuffer(
+            flags.encode('ascii', 'replace'), dtype='S1'
+        ) == b'P'
+        check_in_days = stays['check_in_date'].to_numpy() \
+            .astype('datetime64[D]').astype('int64')
+        days = check_in_days[stay_rows[present]] + offsets[present] + 1
+        order = np.argsort(days, kind='stable')
+        days = days[order].astype('int32')
+        stay_rows = stay_rows[present][order]
+
+        duplicates = np.flatnonzero(days[1:] == days[:-1])
+        if len(duplicates) > 0:
+            morning = days[duplicates[0]].astype('datetime64[D]')
+            raise ValueError(f"Duplicate mornings found in stays: {morning}")
+
+        columns = {}
+        for column in FID_COLUMNS:
+            columns[column] = pd.to_numeric(stays[column]) \
+                .fillna(NULL_FID).to_numpy(dtype='int32')[stay_rows]
+        for column in CATEGORY_COLUMNS:
+            # Renumber the categories in order of first appearance in
+            # the mornings, as from_frame() does.
+            codes, categories = pd.factorize(
+                stays[column].astype(MORNINGS_DTYPES[column])
+            )
+            codes = codes[stay_rows]
+            uniques, first = np.unique(codes, return_index=True)
+            first = first[uniques >= 0]
+            uniques = uniques[uniques >= 0][np.argsort(first)]
+            renumber = np.full(len(categories) + 1, -1, dtype=codes.dtype)
+            renumber[uniques] = np.arange(len(uniques))
+            columns[column] = pd.Categorical.from_codes(
+                renumber[codes], categories[uniques]
+            )
+        return cls(days, **columns)
+
+    @classmethod
+    def of(cls, mornings) -> 'CompactMornings':
+        """Returns mornings as a CompactMornings, converting them if they
+        are a DataFrame.
+        """
+        if isinstance(mornings, cls):
+            return mornings
+        return cls.from_frame(mornings)
+
+    def between(self, start_morning=None, thru_morning=None):
+        """Returns the mornings in an inclusive range.
+
+        Args:
+            start_morning (date): The first morning, or None for
+                unbounded.
+            thru_morning (date): The last morning, or None for
+                unbounded.
+        """
+        lo = 0 if start_morning is None else np.searchsorted(
+            self.days, day_ordinal(start_morning), side='left'
+        )
+        hi = len(self) if thru_morning is None else np.searchsorted(
+            self.days, day_ordinal(thru_morning), side='right'
+        )
+        return CompactMornings(self.days[lo:hi], **{
+            column: getattr(self, column)[lo:hi]
+            for column in FID_COLUMNS + CATEGORY_COLUMNS
+        })
+
+    def codes(self, column) -> tuple[np.ndarray, np.ndarray]:
+        """Returns integer codes and labels for a column, with nulls
+        given their own code and a pd.NA label.
+
+        Codes are numbered in order of first appearance, as with
+        pd.factorize(values, use_na_sentinel=False).
+
+        Args:
+            column (str): One of FID_COLUMNS or CATEGORY_COLUMNS.
+        """
+        values = getattr(self, column)
+        if column in CATEGORY_COLUMNS:
+            codes, uniques = pd.factorize(values.codes)
+            categories = values.categories.to_numpy(dtype=object)
+            labels = np.array([
+                categories[code] if code >= 0 else pd.NA
+                for code in uniques
+            ], dtype=object)
+            return codes, labels
+        codes, uniques = pd.factorize(values)
+        labels = np.array([
+            int(fid) if fid != NULL_FID else pd.NA for fid in uniques
+        ], dtype=object)
+        return codes, labels
+
+    def country_fids(self, regions) -> np.ndarray:
+        """Returns the region fid of each morning rolled up to its
+        country, with NULL_FID for nulls.
+
+        Args:
+            regions (PlaceTable): The regions layer.
+        """
+        unique_fids, inverse = np.unique(self.region_fid, return_inverse=True)
+        parents = pd.Series(regions.take('parent_region_fid', unique_fids))
+        countries = np.where(
+            parents.notna(), parents.fillna(NULL_FID), unique_fids
+        ).astype('int32')
+        return countries[inverse]
+
+    def memory_usage(self) -> int:
+        """Returns the number of bytes used by the arrays."""
+        total = self.days.nbytes
+        for column in FID_COLUMNS:
+            total += getattr(self, column).nbytes
+        for column in CATEGORY_COLUMNS:
+            total += getattr(self, column).memory_usage(deep=True)
+        return int(total)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns the mornings as a DataFrame, as returned by
+        LodgingLog.mornings().
+        """
+        data = {'morning': self.days.astype('datetime64[D]')}
+        for column in MORNINGS_DTYPES:
+            if column in CATEGORY_COLUMNS:
+                # Code -1 (null) selects the appended None.
+                values = getattr(self, column)
+                categories = values.categories.to_numpy(dtype=object)
+                data[column] = np.append(categories, None)[values.codes]
+            elif column in FID_COLUMNS:
+                fids = getattr(self, column).astype('int64')
+                if MORNINGS_DTYPES[column] == 'int64':
+                    data[column] = fids
+                else:
+                    data[column] = np.where(
+                        fids == NULL_FID, pd.NA, fids.astype(object)
+                    )
+        output = pd.DataFrame(data).astype(MORNINGS_DTYPES)
+        return output.set_index('morning')
+
+def day_ordinal(value) -> int:
+    """Returns the number of days since 1970-01-01 for a date."""
+    return int(
+        np.datetime64(pd.Timestamp(value).date(), 'D').astype('int64')
+    )
@@ -0,0 +1,202 @@
+"""Builds the canonical derived tables of a lodging log, in the shapes
+that downstream analytics tools read directly.
+"""
+
+# Standard library imports
+from datetime import date
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+from pyproj import Geod
+
+# First-party imports
+from .distances import DECIMAL_PLACES, KM_PER_MILE
+
+TABLES = ['mornings', 'homes', 'daily', 'daily_distance']
+
+def build_table(log, table) -> pd.DataFrame:
+    """Returns a derived table by name.
+
+    Args:
+        log (LodgingLog): The log to build the table from.
+        table (str): One of TABLES.
+    """
+    builders = {
+        'mornings': mornings_table,
+        'homes': home_timeline,
+        'daily': daily_timeline,
+        'daily_distance': daily_distance,
+    }
+    if table not in builders:
+        raise ValueError(f"Invalid table: {table}")
+    return builders[table](log)
+
+def daily_distance(log, timeline=None) -> pd.DataFrame:
+    """Returns a DataFrame of the distance from home for every morning.
+
+    Away mornings are measured from the home's coordinates to the stay's
+    city (or to the stay location, if it has no city), as in the
+    distance from home by day charts. Home mornings have a distance of
+    0, and mornings before the first home have no distance.
+
+    Args:
+        log (LodgingLog): The log to build the table from.
+        timeline (DataFrame): The daily timeline, if already built.
+
+    Returns:
+        DataFrame: A DataFrame with morning, status, and distance_mi
+        columns.
+    """
+    if timeline is None:
+        timeline = daily_timeline(log)
+    locations = log.places['stay_locations']
+    cities = log.places['cities']
+    homes = home_timeline(log)
+
+    # Find the coordinates of each away morning.
+    away = (timeline['status'] == "Away").to_numpy()
+    location_fids = timeline['stay_location_fid']
+    city_fids = location_fids.map(locations.series('city_fid'))
+    away_lat = city_fids.map(cities.series('lat')) \
+        .fillna(location_fids.map(locations.series('lat')))
+    away_lon = city_fids.map(cities.series('lon')) \
+        .fillna(location_fids.map(locations.series('lon')))
+
+    # Find the coordinates of the home for each morning.
+    days = timeline['morning'].to_numpy(dtype='datetime64[D]')
+    home_idx = np.searchsorted(
+        homes['first_morning'].to_numpy(dtype='datetime64[D]'),
+        days,
+        side='right',
+    ) - 1
+    has_home = home_idx >= 0
+    home_lat = np.full(len(days), np.nan)
+    home_lon = np.full(len(days), np.nan)
+    home_lat[has_home] = homes['lat'].to_numpy(float)[home_idx[has_home]]
+    home_lon[has_home] = homes['lon'].to_numpy(float)[home_idx[has_home]]
+
+    distance = np.where(has_home, 0.0, np.nan)
+    measure = away & has_home
+    if measure.any():
+        meters = Geod(ellps='WGS84').inv(
+            home_lon[measure], home_lat[measure],
+            away_lon.to_numpy(dtype=float)[measure],
+            away_lat.to_numpy(dtype=float)[measure],
+        )[2]
+        distance[measure] = meters / (1000 * KM_PER_MILE)
+    return pd.DataFrame({
+        'morning': timeline['morning'],
+        'status': timeline['status'],
+        'distance_mi': np.round(distance, DECIMAL_PLACES),
+    })
+
+def daily_timeline(
+    log, start_morning=None, thru_morning=None
+) -> pd.DataFrame:
+    """Returns a DataFrame with the stay or home for every morning.
+
+    Args:
+        log (LodgingLog): The log to build the table from.
+        start_morning (date): The first morning. Defaults to the earlier
+            of the first morning after the first home's move in date and
+            the first morning away.
+        thru_morning (date): The last morning. Defaults to the later of
+            today and the last morning away.
+
+    Returns:
+        DataFrame: A DataFrame with the columns of Locator.lookup().
+    """
+    stays = log.stays()
+    homes = log.home_locations()
+    if start_morning is None:
+        starts = [
+            homes['move_in_date'].min() + pd.Timedelta(days=1),
+            stays['check_in_date'].min() + pd.Timedelta(days=1),
+        ]
+        start_morning = min(d for d in starts if pd.notna(d))
+    if thru_morning is None:
+        last_stay = (
+            stays['check_in_date']
+            + pd.to_timedelta(stays['nights'].astype('int64'), unit='D')
+        ).max()
+        thru_morning = max(pd.Timestamp(date.today()), last_stay)
+    mornings = pd.date_range(start_morning, thru_morning, freq='D')
+    timeline = log.locator().lookup(mornings)
+    for col in ['stay_fid', 'home_fid', 'stay_location_fid']:
+        timeline[col] = timeline[col].astype('Int64')
+    return timeline
+
+def home_timeline(log) -> pd.DataFrame:
+    """Returns a DataFrame with a row for each home, and the first and
+    last mornings it was home.
+
+    Returns:
+        DataFrame: A DataFrame with home_fid, move_in_date,
+        first_morning, last_morning (NaT for the current home),
+        stay_location_fid, name, city_fid, city_key, metro_fid,
+        region_fid, lat, and lon columns.
+    """
+    homes = log.home_locations().sort_values('move_in_date')
+    homes = homes.reset_index(drop=True)
+    locations = log.places['stay_locations']
+    cities = log.places['cities']
+    return pd.DataFrame({
+        'home_fid': homes['home_fid'],
+        'move_in_date': homes['move_in_date'],
+        'first_morning': homes['move_in_date'] + pd.Timedelta(days=1),
+        'last_morning': homes['move_in_date'].shift(-1),
+        'stay_location_fid': homes['stay_location_fid'],
+        'name': homes['stay_location_fid'].map(locations.series('name')),
+        'city_fid': homes['city_fid'],
+        'city_key': homes['city_fid'].map(cities.series('key')),
+        'metro_fid': homes['metro_fid'],
+        'region_fid': homes['region_fid'],
+        'lat': homes['lat'],
+        'lon': homes['lon'],
+    })
+
+def mornings_table(log) -> pd.DataFrame:
+    """Returns a DataFrame with a row for each morning away from home,
+    and the place it was spent at every level.
+
+    Returns:
+        DataFrame: A DataFrame with the columns of LodgingLog.mornings()
+        (with morning as a column), plus the stay location's name, lat,
+        and lon, and the fid, key, and name of its city, metro, region,
+        and country.
+    """
+    mornings = log.mornings().reset_index()
+    places = log.places
+    locations = places['stay_locations']
+    regions = places['regions']
+    for col in ['city_fid', 'metro_fid', 'region_fid']:
+        mornings[col] = mornings[col].astype('Int64')
+    mornings['country_fid'] = mornings['region_fid'].map(
+        regions.series('parent_region_fid')
+    ).fillna(mornings['region_fid']).astype('Int64')
+
+    location_fids = mornings['stay_location_fid']
+    columns = {
+        col: mornings[col] for col in [
+            'morning', 'stay_fid', 'purpose', 'type', 'portfolio', 'brand',
+            'stay_location_fid',
+        ]
+    }
+    columns['stay_location_name'] = location_fids.map(
+        locations.series('name')
+    )
+    columns['lat'] = location_fids.map(locations.series('lat'))
+    columns['lon'] = location_fids.map(locations.series('lon'))
+    levels = [
+        ('city', 'cities', 'key'),
+        ('metro', 'metros', 'key'),
+        ('region', 'regions', 'iso_3166'),
+        ('country', 'regions', 'iso_3166'),
+    ]
+    for place, layer, key_col in levels:
+        fids = mornings[f'{place}_fid']
+        columns[f'{place}_fid'] = fids
+        columns[f'{place}_key'] = fids.map(places[layer].series(key_col))
+        columns[f'{place}_name'] = fids.map(places[layer].series('name'))
+    return pd.DataFrame(columns)
@@ -0,0 +1,4 @@
+"""Defines the units and precision shared by distance calculations."""
+
+KM_PER_MILE = 1.6093
+DECIMAL_PLACES = 2 # Number of decimal places to round distances to.
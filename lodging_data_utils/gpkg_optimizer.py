@@ -0,0 +1,185 @@
+"""Defines the GeoPackageOptimizer class for adding the indexes and
+columns that the lodging log's queries use, and comparing their query
+plans and timings.
+"""
+
+# Standard library imports
+import sqlite3
+import time
+from datetime import date, timedelta
+
+# First-party imports
+from .lodging_log import (
+    HOME_LOCATIONS_QUERY, STAYS_QUERY, range_conditions
+)
+from .materialized_mornings import has_stay_mornings, stay_mornings_query
+from .validator import Validator
+
+# Columns used in joins, filters, and sorting, which should be the
+# leading column of an index.
+INDEXED_COLUMNS = [
+    ('stays', 'stay_location_fid'),
+    ('stays', 'check_in_date'),
+    ('stays', 'check_out_date'),
+    ('stays', 'nights'),
+    ('homes', 'stay_location_fid'),
+    ('homes', 'move_in_date'),
+    ('stay_locations', 'city_fid'),
+    ('cities', 'metro_fid'),
+    ('cities', 'region_fid'),
+    ('regions', 'parent_region_fid'),
+]
+CHECK_OUT_DATE = (
+    "check_out_date DATE GENERATED ALWAYS AS "
+    "(date(check_in_date, '+' || nights || ' days')) VIRTUAL"
+)
+RANGE_DAYS = 30 # Length of the sample range query.
+REPEATS = 5 # Number of times to run each query when timing it.
+
+class GeoPackageOptimizer:
+    """Inspects a lodging GeoPackage for missing indexes, adds them, and
+    reports the query plans and timings of the log's built-in queries.
+    """
+
+    def __init__(self, lodging_path):
+        """Initializes the GeoPackageOptimizer.
+
+        Args:
+            lodging_path (Path): The GeoPackage to optimize.
+        """
+        self.lodging_path = lodging_path
+
+    def changes(self, add_check_out_date=True) -> list[str]:
+        """Returns the SQL statements needed to optimize the GeoPackage,
+        without running them.
+
+        Args:
+            add_check_out_date (bool): If True, include a generated
+                check_out_date column on stays, if it does not exist.
+        """
+        conn = sqlite3.connect(self.lodging_path)
+        try:
+            columns = {
+                table: self._columns(conn, table)
+                for table, _ in INDEXED_COLUMNS
+            }
+            statements = []
+            if add_check_out_date and 'check_out_date' not in columns['stays']:
+                statements.append(
+                    f"ALTER TABLE stays ADD COLUMN {CHECK_OUT_DATE}"
+                )
+                columns['stays'].add('check_out_date')
+            for table, column in INDEXED_COLUMNS:
+                if column not in columns[table]:
+                    continue
+                if column in self._indexed_columns(conn, table):
+                    continue
+                statements.append(
+                    f"CREATE INDEX idx_{table}_{column} "
+                    f"ON {table} ({column})"
+                )
+            return statements
+        finally:
+            conn.close()
+
+    def optimize(self, add_check_out_date=True) -> list[str]:
+        """Adds missing indexes (and the check_out_date column) in one
+        transaction, then updates the query planner's statistics with
+        ANALYZE.
+
+        Args:
+            add_check_out_date (bool): If True, add a generated
+                check_out_date column on stays, if it does not exist.
+
+        Returns:
+            list[str]: The SQL statements that were run.
+        """
+        statements = self.changes(add_check_out_date)
+        conn = sqlite3.connect(self.lodging_path)
+        try:
+            with conn:
+                for statement in statements:
+                    conn.execute(statement)
+            conn.execute("ANALYZE")
+            conn.commit()
+            integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+            if integrity != 'ok':
+                raise ValueError(f"Integrity check failed: {integrity}")
+        finally:
+            conn.close()
+        return statements + ["ANALYZE"]
+
+    def query_plans(self) -> dict:
+        """Returns the query plan and timing of each built-in query.
+
+        Returns:
+            dict: A dict of query names to dicts with `plan` (a list of
+            plan lines) and `seconds` (the fastest of REPEATS runs) keys.
+        """
+        conn = sqlite3.connect(self.lodging_path)
+        try:
+            plans = {}
+            for name, (query, params) in self._queries(conn).items():
+                plan = [
+                    row[3] for row in conn.execute(
+                        f"EXPLAIN QUERY PLAN {query}", params
+                    )
+                ]
+                times = []
+                for _ in range(REPEATS):
+                    start = time.perf_counter()
+                    conn.execute(query, params).fetchall()
+                    times.append(time.perf_counter() - start)
+                plans[name] = {'plan': plan, 'seconds': min(times)}
+            return plans
+        finally:
+            conn.close()
+
+    def _columns(self, conn, table) -> set[str]:
+        """Returns the names of a table's columns, including generated
+        columns.
+        """
+        return {
+            row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")
+        }
+
+    def _indexed_columns(self, conn, table) -> set[str]:
+        """Returns the columns that lead an index of a table (including
+        its primary key).
+        """
+        columns = set()
+        for index in conn.execute(f"PRAGMA index_list({table})"):
+            info = conn.execute(f"PRAGMA index_info({index[1]})").fetchall()
+            if info and info[0][2] is not None:
+                columns.add(info[0][2])
+        return columns
+
+    def _queries(self, conn) -> dict:
+        """Returns the built-in queries and their parameters, including a
+        sample date range query over the last RANGE_DAYS of stays.
+        """
+        queries = {
+            'stays': (STAYS_QUERY.format(where=""), []),
+            'home_locations': (HOME_LOCATIONS_QUERY, []),
+        }
+        last_check_in = conn.execute(
+            "SELECT max(check_in_date) FROM stays"
+        ).fetchone()[0]
+        if last_check_in is not None:
+            thru = date.fromisoformat(last_check_in[:10])
+            start = thru - timedelta(days=RANGE_DAYS - 1)
+            where, params = range_conditions(conn, start, thru)
+            queries['stays (date range)'] = (
+                STAYS_QUERY.format(where=f"WHERE {' AND '.join(where)}"),
+                params,
+            )
+            if has_stay_mornings(conn):
+                queries['stay_mornings (date range)'] = (
+                    stay_mornings_query(),
+                    [str(start), str(thru)],
+                )
+
+        for validation in Validator(self.lodging_path).validations:
+            name = f"validation: {validation['table']} {validation['error']}"
+            queries[name] = (validation['query'], [])
+        return queries
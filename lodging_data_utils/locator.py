@@ -0,0 +1,169 @@
+"""Defines the Locator class for looking up where the traveler spent
+the night before a given morning.
+"""
+
+# Standard library imports
+import re
+from bisect import bisect_right
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# First-party imports
+from .compact_mornings import day_ordinal
+from .stay_intervals import StayIntervals
+
+COLUMNS = [
+    'morning', 'status', 'stay_fid', 'home_fid', 'stay_location_fid',
+    'name', 'type', 'purpose', 'city_key',
+]
+
+class Locator:
+    """Looks up the stay or home for any morning in O(log n) time.
+
+    Each stay is split into runs of present nights, which never overlap,
+    and the runs are sorted by their first morning. A morning is looked
+    up with a binary search over the runs, falling back to a binary
+    search over home move in dates if no stay run contains it.
+    """
+
+    def __init__(self, stays, homes, places):
+        """Initializes the Locator.
+
+        Args:
+            stays (DataFrame): A DataFrame of stays, as returned by
+                LodgingLog.stays().
+            homes (DataFrame): A DataFrame of homes, as returned by
+                LodgingLog.home_locations().
+            places (dict): The LodgingLog places.
+        """
+        intervals = StayIntervals(stays)
+        stays = intervals.stays
+
+        # Split stays into runs of present nights.
+        run_first = []
+        run_last = []
+        run_stay = []
+        for i, flags in enumerate(stays['absence_flags'].tolist()):
+            first = int(intervals.first_morning[i])
+            if pd.isna(flags):
+                runs = [(0, int(intervals.last_morning[i]) - first + 1)]
+            else:
+                runs = [m.span() for m in re.finditer('P+', flags)]
+            for start, end in runs:
+                run_first.append(first + start)
+                run_last.append(first + end - 1)
+                run_stay.append(i)
+        order = np.argsort(run_first, kind='stable')
+        self._run_first = np.asarray(run_first, dtype='int64')[order]
+        self._run_last = np.asarray(run_last, dtype='int64')[order]
+        self._run_stay = np.asarray(run_stay, dtype='int64')[order]
+
+        # Homes apply from the morning after the move in date.
+        homes = homes.sort_values('move_in_date').reset_index(drop=True)
+        self._home_first = homes['move_in_date'].to_numpy(
+            dtype='datetime64[D]'
+        ).astype('int64') + 1
+
+        locations = places['stay_locations']
+        cities = places['cities']
+        def location_attrs(fids):
+            """Returns the name, type, and city key of locations."""
+            keys = cities.take('key', locations.take('city_fid', fids))
+            return (
+                locations.take('name', fids).tolist(),
+                locations.take('type', fids).tolist(),
+                [None if pd.isna(key) else key for key in keys],
+            )
+
+        # Store stay and home attributes as lists for fast scalar access.
+        self._stays = {
+            'stay_fid': stays['stay_fid'].tolist(),
+            'stay_location_fid': stays['stay_location_fid'].tolist(),
+            'purpose': stays['purpose'].tolist(),
+        }
+        (
+            self._stays['name'],
+            self._stays['type'],
+            self._stays['city_key'],
+        ) = location_attrs(stays['stay_location_fid'])
+        self._homes = {
+            'home_fid': homes['home_fid'].tolist(),
+            'stay_location_fid': homes['stay_location_fid'].tolist(),
+        }
+        (
+            self._homes['name'],
+            self._homes['type'],
+            self._homes['city_key'],
+        ) = location_attrs(homes['stay_location_fid'])
+        self._run_first_list = self._run_first.tolist()
+        self._home_first_list = self._home_first.tolist()
+
+    def where(self, morning) -> dict:
+        """Returns the stay or home for the night before a morning.
+
+        Args:
+            morning (date): The morning to look up.
+
+        Returns:
+            dict: A dict with morning, status (`Away`, `Home`, or None
+            if the morning is before the first home and not part of a
+            stay), stay_fid, home_fid, stay_location_fid, name, type,
+            purpose, and city_key keys.
+        """
+        day = day_ordinal(morning)
+        result = dict.fromkeys(COLUMNS)
+        result['morning'] = pd.Timestamp(day, unit='D').date()
+        run = bisect_right(self._run_first_list, day) - 1
+        if run >= 0 and day <= self._run_last[run]:
+            i = int(self._run_stay[run])
+            result['status'] = "Away"
+            for col, values in self._stays.items():
+                result[col] = values[i]
+            return result
+        home = bisect_right(self._home_first_list, day) - 1
+        if home >= 0:
+            result['status'] = "Home"
+            for col, values in self._homes.items():
+                result[col] = values[home]
+        return result
+
+    def lookup(self, mornings) -> pd.DataFrame:
+        """Returns a DataFrame with the stay or home for each of an
+        array of mornings.
+
+        Args:
+            mornings (array-like): The mornings to look up.
+
+        Returns:
+            DataFrame: A DataFrame with the same columns as the keys
+            returned by where(), with one row for each morning.
+        """
+        days = pd.to_datetime(pd.Series(mornings)).to_numpy(
+            dtype='datetime64[D]'
+        ).astype('int64')
+        runs = np.searchsorted(self._run_first, days, side='right') - 1
+        is_away = runs >= 0
+        is_away[is_away] = days[is_away] <= self._run_last[runs[is_away]]
+        stay_idx = np.full(len(days), -1, dtype='int64')
+        stay_idx[is_away] = self._run_stay[runs[is_away]]
+        homes = np.searchsorted(self._home_first, days, side='right') - 1
+        is_home = ~is_away & (homes >= 0)
+
+        output = pd.DataFrame({
+            'morning': pd.to_datetime(days, unit='D'),
+            'status': np.where(
+                is_away, "Away", np.where(is_home, "Home", None)
+            ),
+        })
+        for col in COLUMNS[2:]:
+            values = np.full(len(days), None, dtype=object)
+            if col in self._stays:
+                stay_values = np.asarray(self._stays[col], dtype=object)
+                values[is_away] = stay_values[stay_idx[is_away]]
+            if col in self._homes:
+                home_values = np.asarray(self._homes[col], dtype=object)
+                values[is_home] = home_values[homes[is_home]]
+            output[col] = values
+        return output
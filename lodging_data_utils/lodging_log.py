@@ -1,30 +1,131 @@
 """Defines the LodgingLog class for managing lodging information."""
 
 # Standard library imports
+import asyncio
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import cast
 
 # Third-party imports
 import tomllib
 import geopandas as gpd
+import numpy as np
 import pandas as pd
-import shapely
+
+# First-party imports
+from .compact_mornings import MORNINGS_DTYPES, CompactMornings
+from .locator import Locator
+from .materialized_mornings import has_stay_mornings, read_stay_mornings
+from .milestone_finder import MilestoneFinder
+from .mornings_query import MorningsQuery
+from .night_counter import NightCounter
+from .overlap_finder import OverlapFinder
+from .place_index import PlaceIndex
+from .place_table import PlaceTable
+from .profiling import carry_spans, profiled, span
+from .spatial_index import SpatialIndex
+from .stay_intervals import StayIntervals
+from .validator import Validator, failure_message
 
 ROOT = Path(__file__).parent.parent
 with open(ROOT / "config" / "data_sources.toml", 'rb') as f:
     SOURCES = tomllib.load(f)
 
 TRANSIT_TYPES = ['Flight']
+PLACE_LAYERS = ['stay_locations', 'cities', 'metros', 'regions']
+
+# Chunk sizes for iter_mornings(), as pandas period frequencies.
+CHUNKS = {'year': 'Y', 'quarter': 'Q', 'month': 'M'}
+
+STAYS_QUERY = """
+SELECT stays.fid as stay_fid, check_in_date, purpose, nights,
+stay_location_fid, type, stays.portfolio, stays.brand,
+city_fid, metro_fid, region_fid, absence_flags
+FROM stays
+JOIN stay_locations on stays.stay_location_fid = stay_locations.fid
+LEFT JOIN cities on stay_locations.city_fid = cities.fid
+{where}
+ORDER BY check_in_date
+"""
+HOME_LOCATIONS_QUERY = """
+SELECT homes.fid as home_fid, move_in_date, stay_location_fid,
+city_fid, metro_fid, region_fid
+FROM homes
+JOIN stay_locations on homes.stay_location_fid = stay_locations.fid
+LEFT JOIN cities on stay_locations.city_fid = cities.fid
+ORDER BY move_in_date
+"""
+
+def filter_mornings(
+    mornings, types=None, exclude_types=None, purposes=None
+) -> pd.DataFrame:
+    """Returns the rows of a mornings DataFrame matching the type and
+    purpose filters of LodgingLog.mornings().
+    """
+    keep = pd.Series(True, index=mornings.index)
+    if types is not None:
+        keep &= mornings['type'].isin(types)
+    if exclude_types:
+        keep &= ~mornings['type'].isin(exclude_types)
+    if purposes is not None:
+        keep &= mornings['purpose'].isin(purposes)
+    return mornings[keep]
+
+def range_conditions(
+    conn, start_morning=None, thru_morning=None
+) -> tuple[list, list]:
+    """Returns SQL conditions selecting the stays with mornings in an
+    inclusive range, and a list of their parameters.
+
+    If the stays table has a check_out_date column (see
+    optimize_gpkg.py), it is used so the range can be found with an
+    index.
+
+    Args:
+        conn (sqlite3.Connection): A connection to the GeoPackage.
+        start_morning (date): The first morning, or None for unbounded.
+        thru_morning (date): The last morning, or None for unbounded.
+    """
+    where = []
+    params = []
+    if start_morning is not None:
+        start = str(pd.Timestamp(start_morning).date())
+        columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(stays)")}
+        if 'check_out_date' in columns:
+            where.append("stays.check_out_date >= ?")
+        else:
+            where.append(
+                "date(stays.check_in_date, '+' || stays.nights || ' days')"
+                " >= ?"
+            )
+        # No stay with mornings in the range checked in more than the
+        # longest stay's nights before it, which bounds an index search
+        # on check_in_date.
+        where.append(
+            "stays.check_in_date >= date(?, '-' || "
+            "(SELECT max(nights) FROM stays) || ' days')"
+        )
+        params.extend([start, start])
+    if thru_morning is not None:
+        where.append("stays.check_in_date < ?")
+        params.append(str(pd.Timestamp(thru_morning).date()))
+    return where, params
 
 class LodgingLog:
     """A class to manage lodging information for a trip."""
 
-    def __init__(self):
-        """Initializes the LodgingLog."""
-        self.lodging_path = Path(SOURCES['lodging_gpkg']).expanduser()
-        self._validate()
+    @profiled
+    def __init__(self, lodging_path=None):
+        """Initializes the LodgingLog.
+
+        Args:
+            lodging_path (Path): The lodging GeoPackage. Defaults to the
+                lodging_gpkg data source in config/data_sources.toml.
+        """
+        if lodging_path is None:
+            lodging_path = SOURCES['lodging_gpkg']
+        self.lodging_path = Path(lodging_path).expanduser()
         self.dtypes = {
             'stay_fid': 'int64',
             'nights': 'int64',
@@ -34,14 +135,22 @@ class LodgingLog:
             'region_fid': 'Int64',
         }
 
-        # Store geodata in a cache for quick access.
-        # This avoids reading the GeoPackage multiple times.
-        self.geodata_cache = {
-            'stay_locations': self.geodata('stay_locations'),
-            'cities': self.geodata('cities'),
-            'metros': self.geodata('metros'),
-            'regions': self.geodata('regions'),
-        }
+        # Validate the log while reading the place layers, which are
+        # kept as compact PlaceTables for quick access. Each task spends
+        # most of its time in SQLite or GDAL, which release the GIL, so
+        # running them in threads brings the load time closer to that of
+        # the slowest task.
+        with ThreadPoolExecutor(max_workers=len(PLACE_LAYERS) + 1) as pool:
+            validation = pool.submit(carry_spans(self._validate))
+            read_place_table = carry_spans(self._read_place_table)
+            layers = {
+                layer: pool.submit(read_place_table, layer)
+                for layer in PLACE_LAYERS
+            }
+            validation.result()
+            self.places = {
+                layer: future.result() for layer, future in layers.items()
+            }
 
     def __repr__(self):
         """Returns a string representation of the LodgingLog."""
@@ -51,9 +160,61 @@ class LodgingLog:
         """Returns a string representation of the LodgingLog."""
         return f"LodgingLog at {self.lodging_path}"
 
+    @classmethod
+    async def open(cls, lodging_path=None) -> 'LodgingLog':
+        """Returns a new log, initialized in a worker thread so an
+        asyncio event loop is not blocked while it loads.
+
+        Args:
+            lodging_path (Path): The lodging GeoPackage. Defaults to the
+                lodging_gpkg data source in config/data_sources.toml.
+        """
+        return await asyncio.to_thread(cls, lodging_path)
+
+    @profiled
+    def compact_mornings(self,
+        start_morning=None,
+        thru_morning=None,
+        types=None,
+        exclude_types=None,
+        purposes=None,
+    ) -> CompactMornings:
+        """Returns the mornings away from home as a CompactMornings,
+        which takes several times less memory than the DataFrame
+        returned by mornings().
+
+        The matching stays are read with the filters of mornings(), and
+        expanded straight to arrays, so the DataFrame is never built.
+
+        Args:
+            start_morning (date): If provided, the first morning to
+                return.
+            thru_morning (date): If provided, the last morning to
+                return.
+            types (list[str]): If provided, only return mornings at
+                stay locations of these types.
+            exclude_types (list[str]): If provided, do not return
+                mornings at stay locations of these types.
+            purposes (list[str]): If provided, only return mornings of
+                stays with these purposes.
+        """
+        where, params = self._filter_sql(types, exclude_types, purposes)
+        with self._connection() as conn:
+            range_where, range_params = range_conditions(
+                conn, start_morning, thru_morning
+            )
+        stays = self._read_stays(where + range_where, params + range_params)
+        self._check_overlaps(stays)
+        with span("LodgingLog.compact_mornings.expand") as s:
+            mornings = CompactMornings.from_stays(stays) \
+                .between(start_morning, thru_morning)
+            s.rows = len(mornings)
+        return mornings
+
     def geodata(self, layer) -> gpd.GeoDataFrame:
         """Returns a GeoDataFrame for the specified layer in the
-        GeoPackage.
+        GeoPackage, with its geometry. Reports that only need place
+        attributes and coordinates should use places instead.
 
         Args:
             layer (str): The name of the layer to read from the
@@ -63,156 +224,336 @@ class LodgingLog:
             GeoDataFrame: A GeoDataFrame containing the data from the
             specified layer.
         """
-        gdf = gpd.read_file(
-            self.lodging_path,
-            layer=layer,
-            engine='pyogrio',
-            fid_as_index=True
-        )
-        # Convert id columns to Int64.
-        id_cols = [
-            'fid', 'city_fid', 'metro_fid', 'region_fid', 'parent_region_fid'
-        ]
-        for col in id_cols:
-            if col in gdf.columns:
-                gdf[col] = gdf[col].astype('Int64')
-
-        return gdf
+        return self._read_geodata(layer)
 
+    @profiled
     def home_locations(self) -> pd.DataFrame:
         """Returns a DataFrame with the location of all homes.
         Latitude and longitude are derived from the city if available,
         otherwise from the stay_location.
         """
-        def get_home_location(row):
-            """Returns the home location based on city or stay_location."""
-            if pd.notna(row.city_fid):
-                geom = self.geodata_cache['cities'].loc[row.city_fid].geometry
-            else:
-                geom = self.geodata_cache['stay_locations'].loc[
-                    row.stay_location_fid
-                ].geometry
-            return (geom.y, geom.x)
-
         # Read an SQLite table into a DataFrame.
-        conn = sqlite3.connect(self.lodging_path)
-        query = """
-        SELECT homes.fid as home_fid, move_in_date, stay_location_fid,
-        city_fid, metro_fid, region_fid
-        FROM homes
-        JOIN stay_locations on homes.stay_location_fid = stay_locations.fid
-        LEFT JOIN cities on stay_locations.city_fid = cities.fid
-        ORDER BY move_in_date
-        """
-        home_locations = pd.read_sql_query(query, conn,
-            parse_dates=['move_in_date'],
-            dtype={
-                'home_fid': pd.Int64Dtype(),
-                'move_in_date': 'datetime64[ns]',
-                'stay_location_fid': pd.Int64Dtype(),
-                'city_fid': pd.Int64Dtype(),
-                'metro_fid': pd.Int64Dtype(),
-                'region_fid': pd.Int64Dtype(),
-            },
+        with self._connection() as conn:
+            home_locations = pd.read_sql_query(HOME_LOCATIONS_QUERY, conn,
+                parse_dates=['move_in_date'],
+                dtype={
+                    'home_fid': pd.Int64Dtype(),
+                    'move_in_date': 'datetime64[ns]',
+                    'stay_location_fid': pd.Int64Dtype(),
+                    'city_fid': pd.Int64Dtype(),
+                    'metro_fid': pd.Int64Dtype(),
+                    'region_fid': pd.Int64Dtype(),
+                },
+            )
+        cities = self.places['cities']
+        locations = self.places['stay_locations']
+        city_rows = cities.rows(home_locations['city_fid'])
+        location_rows = locations.rows(home_locations['stay_location_fid'])
+        has_city = city_rows >= 0
+        home_locations['lat'] = np.where(
+            has_city, cities.lat[city_rows], locations.lat[location_rows]
         )
-        home_locations[['lat', 'lon']] = home_locations.apply(
-            get_home_location,
-            axis=1,
-            result_type='expand',
+        home_locations['lon'] = np.where(
+            has_city, cities.lon[city_rows], locations.lon[location_rows]
         )
         return home_locations
 
-    def mornings(self) -> pd.DataFrame:
-        """Returns a DataFrame with a row for each morning away from
-        home.
+    def iter_mornings(self,
+        by=None,
+        chunk='year',
+        start_morning=None,
+        thru_morning=None,
+        exclude_transit=False,
+        types=None,
+        exclude_types=None,
+        purposes=None,
+    ):
+        """Yields the mornings away from home one calendar chunk at a
+        time, so reports that process a chunk at a time run in bounded
+        memory.
+
+        Each chunk's stays are read with an SQL range filter, and
+        expanded (and grouped, if `by` is provided) only when the chunk
+        is reached. Stays that cross a chunk boundary are included in
+        each chunk they have mornings in, limited to those mornings.
+        Chunks without mornings are skipped.
+
+        Args:
+            by (str): If provided, group the mornings by this location
+                type (`location`, `city`, `metro`, or `region`) as in
+                mornings_by().
+            chunk (str): `year`, `quarter`, or `month`.
+            start_morning (date): If provided, the first morning to
+                return.
+            thru_morning (date): If provided, the last morning to
+                return.
+            exclude_transit (bool): If True, do not return mornings in
+                transit (flights).
+            types (list[str]): If provided, only return mornings at
+                stay locations of these types.
+            exclude_types (list[str]): If provided, do not return
+                mornings at stay locations of these types.
+            purposes (list[str]): If provided, only return mornings of
+                stays with these purposes.
+
+        Yields:
+            tuple: A pd.Period for the chunk, and a DataFrame of its
+            mornings as returned by mornings() or mornings_by().
         """
-        # Read an SQLite table into a DataFrame.
-        conn = sqlite3.connect(self.lodging_path)
-        query = """
-        SELECT stays.fid as stay_fid, check_in_date, purpose, nights,
-        stay_location_fid, type, city_fid, metro_fid, region_fid, absence_flags
-        FROM stays
-        JOIN stay_locations on stays.stay_location_fid = stay_locations.fid
-        LEFT JOIN cities on stay_locations.city_fid = cities.fid
-        ORDER BY check_in_date
+        if chunk not in CHUNKS:
+            raise ValueError(f"Invalid chunk: {chunk}")
+        first, last = self._morning_range()
+        if first is None:
+            return
+        if start_morning is not None:
+            first = max(first, pd.Timestamp(start_morning))
+        if thru_morning is not None:
+            last = min(last, pd.Timestamp(thru_morning))
+        if exclude_transit:
+            exclude_types = [*(exclude_types or []), *TRANSIT_TYPES]
+
+        for period in pd.period_range(first, last, freq=CHUNKS[chunk]):
+            chunk_start = max(first, period.start_time).date()
+            chunk_thru = min(last, period.end_time).date()
+            if by is None:
+                mornings = self.mornings(
+                    chunk_start, chunk_thru, types, exclude_types, purposes
+                )
+            else:
+                mornings = self.mornings_by(
+                    by, chunk_start, chunk_thru,
+                    types=types,
+                    exclude_types=exclude_types,
+                    purposes=purposes,
+                )
+            if not mornings.empty:
+                yield period, mornings
+
+    @profiled
+    def locator(self) -> Locator:
+        """Returns a Locator for looking up the stay or home for any
+        morning.
         """
+        return Locator(
+            self.stays(), self.home_locations(), self.places
+        )
 
-        stays = pd.read_sql_query(query, conn,
-            parse_dates=['check_in_date'],
-            dtype={
-                'stay_fid': pd.Int64Dtype(),
-                'nights': pd.Int64Dtype(),
-                'stay_location_fid': pd.Int64Dtype(),
-                'city_fid': pd.Int64Dtype(),
-                'metro_fid': pd.Int64Dtype(),
-                'region_fid': pd.Int64Dtype(),
-                'check_in_date': 'datetime64[ns]',
-                'absence_flags': pd.StringDtype(),
-            },
+    @profiled
+    def milestone_finder(self,
+        exclude_transit=True,
+        milestones=None,
+    ) -> MilestoneFinder:
+        """Returns a MilestoneFinder for finding night and distinct
+        place milestones.
+
+        Args:
+            exclude_transit (bool): If True, nights in transit (flights)
+                are not counted.
+            milestones (list[int]): Milestone thresholds. Defaults to
+                MILESTONES.
+        """
+        mornings = self.compact_mornings(
+            exclude_types=TRANSIT_TYPES if exclude_transit else None
         )
-        conn.close()
-
-        # Create a DataFrame for each stay, expanding the mornings.
-        stay_frames = []
-        for row in stays.itertuples():
-            mornings = self._stay_mornings(row)
-            present_nights = len(mornings)
-            if present_nights == 0:
-                continue
-            stay_frames.append(
-                pd.DataFrame.from_dict({
-                    'morning': mornings,
-                    'stay_fid': [row.stay_fid] * present_nights,
-                    'purpose': [row.purpose] * present_nights,
-                    'type': [row.type] * present_nights,
-                    'stay_location_fid': (
-                        [row.stay_location_fid] * present_nights
-                    ),
-                    'city_fid': [row.city_fid] * present_nights,
-                    'metro_fid': [row.metro_fid] * present_nights,
-                    'region_fid': [row.region_fid] * present_nights,
-                })
-            )
+        return MilestoneFinder(mornings, self.places, milestones)
 
-        # Concatenate all stay DataFrames into a single DataFrame.
-        output = pd.concat(stay_frames, ignore_index=True)
-        output = output.sort_values(by='morning')
+    @profiled
+    def mornings(self,
+        start_morning=None,
+        thru_morning=None,
+        types=None,
+        exclude_types=None,
+        purposes=None,
+    ) -> pd.DataFrame:
+        """Returns a DataFrame with a row for each morning away from
+        home.
 
-        # Check for duplicate mornings.
-        duplicates = output[output['morning'].duplicated(keep=False)]
-        if not duplicates.empty:
-            raise ValueError(
-                "Duplicate mornings found in stays:\n"
-                f"{duplicates[['morning', 'stay_fid']].to_string(index=False)}"
+        The date, type, and purpose filters are pushed down into the
+        SQLite query. If the GeoPackage has a materialized stay_mornings
+        table (see materialize_mornings.py), the matching mornings are
+        read from it with an indexed range query. Otherwise, only the
+        matching stays are read and expanded.
+
+        Args:
+            start_morning (date): If provided, the first morning to
+                return.
+            thru_morning (date): If provided, the last morning to
+                return.
+            types (list[str]): If provided, only return mornings at
+                stay locations of these types.
+            exclude_types (list[str]): If provided, do not return
+                mornings at stay locations of these types.
+            purposes (list[str]): If provided, only return mornings of
+                stays with these purposes.
+        """
+        where, params = self._filter_sql(types, exclude_types, purposes)
+        with self._connection() as conn:
+            if has_stay_mornings(conn):
+                with span("LodgingLog.mornings.read") as s:
+                    output = read_stay_mornings(
+                        conn, start_morning, thru_morning, where, params
+                    ).astype(MORNINGS_DTYPES)
+                    s.rows = len(output)
+                return self._index_mornings(output)
+
+            # Only read stays with mornings in the range.
+            range_where, range_params = range_conditions(
+                conn, start_morning, thru_morning
             )
+        stays = self._read_stays(where + range_where, params + range_params)
 
-        # Convert the 'morning' column to datetime and set it as the index.
-        output = output.set_index('morning')
-        output.index = pd.to_datetime(output.index)
+        # Check for overlapping stays before expanding them.
+        self._check_overlaps(stays)
 
-        return output
+        # Expand the stays to arrays of mornings, and build the
+        # DataFrame from them in one step.
+        with span("LodgingLog.mornings.expand") as s:
+            output = CompactMornings.from_stays(stays).to_frame()
+            s.rows = len(output)
+        return output.loc[start_morning:thru_morning]
 
+    @profiled
     def mornings_by(self,
         by='location',
         start_morning=None,
         thru_morning=None,
         exclude_transit=False,
+        types=None,
+        exclude_types=None,
+        purposes=None,
     ) -> pd.DataFrame:
         """Returns a DataFrame with a row for each morning away from
         home, grouped by the specified location type.
+
+        The mornings are filtered as in mornings(), with transit types
+        added to exclude_types if exclude_transit is True.
         """
         if by not in ['location', 'city', 'metro', 'region']:
             raise ValueError(f"Invalid grouping type: {by}")
-        mornings = self.mornings().loc[start_morning:thru_morning]
         if exclude_transit:
-            mornings = mornings[
-                ~mornings.type.isin(TRANSIT_TYPES)
-            ]
+            exclude_types = [*(exclude_types or []), *TRANSIT_TYPES]
+        mornings = self.mornings(
+            start_morning, thru_morning, types, exclude_types, purposes
+        )
+
+        return self._add_location_attrs(mornings, by)
+
+    @profiled
+    def night_counter(self, exclude_transit=False) -> NightCounter:
+        """Returns a NightCounter for counting nights by calendar
+        period and stay attributes.
+
+        Args:
+            exclude_transit (bool): If True, nights in transit (flights)
+                are not counted.
+        """
+        mornings = self.compact_mornings(
+            exclude_types=TRANSIT_TYPES if exclude_transit else None
+        )
+        return NightCounter(mornings, self.places['regions'])
+
+    @profiled
+    def overlap_finder(self) -> OverlapFinder:
+        """Returns an OverlapFinder for finding stays with overlapping
+        mornings and suggesting absence_flags fixes.
+        """
+        return OverlapFinder(self.stays())
+
+    @profiled
+    def place_index(self, cache_path=None) -> PlaceIndex:
+        """Returns a PlaceIndex for fast queries of nights spent at a
+        place.
+
+        Args:
+            cache_path (Path): Optional path of a saved index (.npz). If
+                the file is newer than the GeoPackage, the index is
+                loaded from it; otherwise the index is built and saved
+                to it.
+        """
+        if cache_path is not None:
+            cache_path = Path(cache_path)
+            if (cache_path.exists() and cache_path.stat().st_mtime
+                >= self.lodging_path.stat().st_mtime):
+                return PlaceIndex.load(cache_path)
+        index = PlaceIndex.from_mornings(
+            self.compact_mornings(), self.places
+        )
+        if cache_path is not None:
+            index.save(cache_path)
+        return index
+
+    def query(self) -> MorningsQuery:
+        """Returns a lazy MorningsQuery of all mornings, which can be
+        filtered, grouped, and counted.
+        """
+        return MorningsQuery(self)
+
+    @profiled
+    def spatial_index(self,
+        layer='stay_locations',
+        exclude_transit=False,
+    ) -> SpatialIndex:
+        """Returns a SpatialIndex for finding the places in a layer near
+        a point, with the nights spent at each.
+
+        Args:
+            layer (str): `stay_locations` or `cities`.
+            exclude_transit (bool): If True, nights in transit (flights)
+                are not counted.
+        """
+        if layer not in self.places:
+            raise ValueError(f"Invalid layer: {layer}")
+        mornings = self.compact_mornings(
+            exclude_types=TRANSIT_TYPES if exclude_transit else None
+        )
+        return SpatialIndex(self.places[layer], mornings, layer)
+
+    def stay_intervals(self,
+        exclude_transit=False,
+        verify=False,
+    ) -> StayIntervals:
+        """Returns a StayIntervals for counting nights directly from
+        stay intervals, without expanding the log to mornings.
+
+        Args:
+            exclude_transit (bool): If True, nights in transit (flights)
+                are not counted.
+            verify (bool): If True, check the interval counts against
+                mornings() and raise a ValueError if they differ.
+        """
+        stays = self.stays()
+        if exclude_transit:
+            stays = stays[~stays.type.isin(TRANSIT_TYPES)]
+        intervals = StayIntervals(stays)
+        if verify:
+            mornings = self.mornings()
+            if exclude_transit:
+                mornings = mornings[~mornings.type.isin(TRANSIT_TYPES)]
+            intervals.verify(mornings)
+        return intervals
+
+    @profiled
+    def stays(self) -> pd.DataFrame:
+        """Returns a DataFrame with a row for each stay, including the
+        attributes of its location.
+        """
+        return self._read_stays()
+
+    def _add_location_attrs(self, mornings, by) -> pd.DataFrame:
+        """Adds the attributes of each morning's location, grouped by
+        the specified location type.
+        """
+        columns = [
+            'place_type', 'type_fid', 'title', 'name', 'key', 'lat', 'lon',
+        ]
+        if mornings.empty:
+            # apply() would return no columns to assign.
+            for column in columns:
+                mornings[column] = pd.Series(dtype=object)
+            return mornings
 
         # Get the attributes of each location row.
-        mornings[
-            ['place_type', 'type_fid', 'title', 'name', 'key', 'lat', 'lon']
-        ] = mornings.apply(
+        mornings[columns] = mornings.apply(
             lambda row: self._location_attrs(row, by),
             axis=1,
             result_type='expand',
@@ -220,6 +561,70 @@ class LodgingLog:
 
         return mornings
 
+    def _check_overlaps(self, stays):
+        """Raises a ValueError if any stays have overlapping mornings."""
+        overlaps = OverlapFinder(stays).overlaps()
+        if not overlaps.empty:
+            raise ValueError(
+                "Overlapping stays found (run find_overlaps.py to suggest "
+                "absence_flags fixes):\n"
+                f"{overlaps.to_string(index=False)}"
+            )
+
+    @contextmanager
+    def _connection(self):
+        """Returns a context manager for an SQLite connection to the
+        GeoPackage, which is closed on exit.
+        """
+        conn = sqlite3.connect(self.lodging_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _filter_sql(self, types, exclude_types, purposes) -> tuple:
+        """Returns a list of SQL conditions on stays and stay_locations
+        for type and purpose filters, and a list of their parameters.
+        """
+        where = []
+        params = []
+        def placeholders(values):
+            """Returns a placeholder for each value."""
+            return ", ".join("?" * len(values))
+        if types is not None:
+            where.append(f"stay_locations.type IN ({placeholders(types)})")
+            params.extend(types)
+        if exclude_types:
+            where.append(
+                "(stay_locations.type IS NULL OR stay_locations.type "
+                f"NOT IN ({placeholders(exclude_types)}))"
+            )
+            params.extend(exclude_types)
+        if purposes is not None:
+            where.append(f"stays.purpose IN ({placeholders(purposes)})")
+            params.extend(purposes)
+        return where, params
+
+    def _index_mornings(self, output) -> pd.DataFrame:
+        """Sorts a DataFrame of expanded mornings, checks it for
+        duplicate mornings, and indexes it by morning.
+        """
+        output = output.sort_values(by='morning')
+
+        # Check for duplicate mornings.
+        duplicates = output[output['morning'].duplicated(keep=False)]
+        if not duplicates.empty:
+            raise ValueError(
+                "Duplicate mornings found in stays:\n"
+                f"{duplicates[['morning', 'stay_fid']].to_string(index=False)}"
+            )
+
+        # Convert the 'morning' column to datetime and set it as the index.
+        output = output.set_index('morning')
+        output.index = pd.to_datetime(output.index)
+
+        return output
+
     def _location_attrs(self, row, by) -> tuple:
         """Get the attributes of each location row."""
         priority = {
@@ -275,7 +680,7 @@ class LodgingLog:
             if pd.notnull(row[place_types[place_type]['fid']]):
                 type_fid = row[place_types[place_type]['fid']]
                 table = place_types[place_type]['table']
-                record = self.geodata_cache[table].loc[type_fid]
+                record = self.places[table].record(type_fid)
                 col_vals = {}
                 for k, v in place_types[place_type]['cols'].items():
                     if v is None:
@@ -285,23 +690,12 @@ class LodgingLog:
                             col_vals[k] = type_fid
                         else:
                             col_vals[k] = record[v]
-                geometry = record.geometry
-                if geometry is None:
+                if pd.isna(record['lat']):
                     lat = pd.NA
                     lon = pd.NA
                 else:
-                    if geometry.geom_type == "Point":
-                        lat = geometry.y
-                        lon = geometry.x
-                    elif geometry.geom_type == "MultiPoint":
-                        primary_point = shapely.get_geometry(
-                            record.geometry, 0
-                        )
-                        lat = primary_point.y
-                        lon = primary_point.x
-                    else:
-                        lat = pd.NA
-                        lon = pd.NA
+                    lat = record['lat']
+                    lon = record['lon']
                 return (
                     place_types[place_type]['name'],
                     f"{place_type}_{type_fid}",
@@ -313,51 +707,85 @@ class LodgingLog:
                 )
         return (pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA)
 
-    def _stay_mornings(self, row) -> list[datetime]:
-        """Returns a list of mornings for a given stay row.
-        Takes into account any absence flags.
-
-        Args:
-            row: A row from the stays DataFrame.
-
-        Returns:
-            A list of datetime objects representing the mornings for the stay.
+    def _morning_range(self) -> tuple:
+        """Returns the first and last mornings of the stays as
+        Timestamps, or (None, None) if there are no stays.
+        """
+        with self._connection() as conn:
+            first, last = conn.execute("""
+                SELECT date(min(check_in_date), '+1 day'),
+                max(date(check_in_date, '+' || nights || ' days'))
+                FROM stays WHERE nights > 0
+            """).fetchone()
+        if first is None:
+            return None, None
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def _read_geodata(self, layer) -> gpd.GeoDataFrame:
+        """Reads a layer of the GeoPackage into a GeoDataFrame indexed
+        by fid, with Int64 id columns.
         """
-        # Generate a list of mornings based on the check_in_date and nights.
-        morning_list = [
-            cast(datetime, row.check_in_date) + timedelta(days=i+1)
-            for i in range(cast(int, row.nights))
+        with span(f"LodgingLog.geodata[{layer}]") as s:
+            gdf = gpd.read_file(
+                self.lodging_path,
+                layer=layer,
+                engine='pyogrio',
+                fid_as_index=True
+            )
+            s.rows = len(gdf)
+        # Convert id columns to Int64.
+        id_cols = [
+            'fid', 'city_fid', 'metro_fid', 'region_fid', 'parent_region_fid'
         ]
-        # If absence_flags is not null, filter the mornings based on presence.
-        # 'P' indicates presence, 'A' indicates absence.
-        if pd.notnull(row.absence_flags):
-            absence_flags = list(row.absence_flags)
-            morning_list = [
-                morning_list[i]
-                for i in range(len(morning_list))
-                if absence_flags[i] == 'P'
-            ]
-
-        return morning_list
+        for col in id_cols:
+            if col in gdf.columns:
+                gdf[col] = gdf[col].astype('Int64')
 
-    def _validate(self) -> bool:
-        """Validates the LodgingLog data."""
-        with open(ROOT / "config" / "validations.toml", 'rb') as vf:
-            validations = tomllib.load(vf)['validations']
-        conn = sqlite3.connect(self.lodging_path)
+        return gdf
+
+    def _read_place_table(self, layer) -> PlaceTable:
+        """Reads a layer of the GeoPackage into a PlaceTable."""
+        return PlaceTable.from_geodataframe(self._read_geodata(layer))
+
+    def _read_stays(self, where=(), params=()) -> pd.DataFrame:
+        """Returns a DataFrame of the stays matching SQL conditions,
+        including the attributes of their locations.
 
-        for validation in validations:
-            query = validation['query']
-            invalid_data = pd.read_sql_query(query, conn,
-                dtype={'fid': 'int64'},
+        Args:
+            where (list[str]): SQL conditions, which must all be true.
+            params (list): Parameters for the conditions.
+        """
+        # Read an SQLite table into a DataFrame.
+        query = STAYS_QUERY.format(
+            where=f"WHERE {' AND '.join(where)}" if where else ""
+        )
+
+        with self._connection() as conn:
+            stays = pd.read_sql_query(query, conn,
+                params=list(params),
+                parse_dates=['check_in_date'],
+                dtype={
+                    'stay_fid': pd.Int64Dtype(),
+                    'nights': pd.Int64Dtype(),
+                    'stay_location_fid': pd.Int64Dtype(),
+                    'city_fid': pd.Int64Dtype(),
+                    'metro_fid': pd.Int64Dtype(),
+                    'region_fid': pd.Int64Dtype(),
+                    'check_in_date': 'datetime64[ns]',
+                    'absence_flags': pd.StringDtype(),
+                },
             )
-            if not invalid_data.empty:
-                table = validation['table']
-                error = validation['error']
-                raise ValueError(
-                    f"Invalid data found in table '{table}' ({error}):\n"
-                    f"{invalid_data.to_string(index=False)}"
-                )
+        return stays
 
-        conn.close()
+    @profiled
+    def _validate(self) -> bool:
+        """Validates the LodgingLog data.
+
+        Raises:
+            ValueError: If any validation rule fails, with the violations
+                of every failed rule.
+        """
+        results = Validator(self.lodging_path).run()
+        if any(result['status'] == 'failed' for result in results):
+            raise ValueError(failure_message(results))
         return True
@@ -0,0 +1,124 @@
+"""Defines the LogSnapshot class for finding the rows of a lodging
+GeoPackage that changed between two points in time.
+"""
+
+# Standard library imports
+import sqlite3
+from datetime import date, timedelta
+
+TABLES = ['stays', 'homes', 'stay_locations', 'cities', 'metros', 'regions']
+PLACE_TABLES = ['stay_locations', 'cities', 'metros', 'regions']
+
+class LogSnapshot:
+    """A snapshot of a hash of every row of the lodging tables, and the
+    dates of every stay and home.
+    """
+
+    def __init__(self, lodging_path):
+        """Takes a snapshot of a lodging GeoPackage.
+
+        Args:
+            lodging_path (Path): The GeoPackage to read.
+        """
+        conn = sqlite3.connect(lodging_path)
+        try:
+            self.row_hashes = {
+                table: {
+                    row[0]: hash(row)
+                    for row in conn.execute(f"SELECT fid, * FROM {table}")
+                }
+                for table in TABLES
+            }
+            self.stay_mornings = {
+                fid: (
+                    date.fromisoformat(check_in) + timedelta(days=1),
+                    date.fromisoformat(check_in) + timedelta(days=nights),
+                )
+                for fid, check_in, nights in conn.execute(
+                    "SELECT fid, check_in_date, nights FROM stays "
+                    "WHERE check_in_date IS NOT NULL AND nights > 0"
+                )
+            }
+            self.home_dates = {
+                fid: date.fromisoformat(move_in)
+                for fid, move_in in conn.execute(
+                    "SELECT fid, move_in_date FROM homes "
+                    "WHERE move_in_date IS NOT NULL"
+                )
+            }
+        finally:
+            conn.close()
+
+    def changes(self, previous) -> dict:
+        """Returns the fids of rows added, removed, or modified since a
+        previous snapshot.
+
+        Args:
+            previous (LogSnapshot): The earlier snapshot.
+
+        Returns:
+            dict: A dict of table names to sets of changed fids. Tables
+            with no changes are not included.
+        """
+        changes = {}
+        for table in TABLES:
+            old = previous.row_hashes[table]
+            new = self.row_hashes[table]
+            changed = {
+                fid for fid in old.keys() | new.keys()
+                if old.get(fid) != new.get(fid)
+            }
+            if changed:
+                changes[table] = changed
+        return changes
+
+    def changed_mornings(self, previous, changes) -> tuple | None:
+        """Returns the range of mornings affected by a set of changes.
+
+        Mornings of a changed stay are affected, both before and after
+        the change. A changed home affects all mornings after its move
+        in dates. A changed place may affect any morning.
+
+        Args:
+            previous (LogSnapshot): The earlier snapshot.
+            changes (dict): The changes, as returned by changes().
+
+        Returns:
+            tuple: A tuple of the first and last affected mornings, where
+            None means unbounded, or None if no mornings are affected.
+        """
+        if any(table in changes for table in PLACE_TABLES):
+            return (None, None)
+        first = []
+        last = []
+        for fid in changes.get('stays', set()):
+            for snapshot in [previous, self]:
+                if fid in snapshot.stay_mornings:
+                    first.append(snapshot.stay_mornings[fid][0])
+                    last.append(snapshot.stay_mornings[fid][1])
+        for fid in changes.get('homes', set()):
+            for snapshot in [previous, self]:
+                if fid in snapshot.home_dates:
+                    first.append(snapshot.home_dates[fid] + timedelta(days=1))
+                    last.append(None)
+        if not first:
+            return None
+        return (min(first), None if None in last else max(last))
+
+def overlaps_years(mornings_range, first_year, last_year) -> bool:
+    """Returns True if a range of mornings overlaps an inclusive range of
+    years.
+
+    Args:
+        mornings_range (tuple): The first and last mornings (None for
+            unbounded), or None for an empty range.
+        first_year (int): The first year.
+        last_year (int): The last year.
+    """
+    if mornings_range is None:
+        return False
+    first, last = mornings_range
+    return (
+        (first is None or first <= date(last_year, 12, 31))
+        and (last is None or last >= date(first_year, 1, 1))
+    )
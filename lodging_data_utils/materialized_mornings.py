@@ -0,0 +1,316 @@
+"""Creates, checks, and reads a stay_mornings table materialized inside
+the lodging GeoPackage, which SQLite triggers keep consistent with the
+stays table.
+"""
+
+# Standard library imports
+import sqlite3
+
+# Third-party imports
+import pandas as pd
+
+TABLE = 'stay_mornings'
+INDEXED_COLUMNS = [
+    'morning', 'stay_fid', 'stay_location_fid', 'city_fid', 'metro_fid',
+    'region_fid',
+]
+
+_CREATE_TABLE = """
+CREATE TABLE {table} (
+    fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    morning DATE NOT NULL,
+    stay_fid INTEGER NOT NULL,
+    stay_location_fid INTEGER,
+    city_fid INTEGER,
+    metro_fid INTEGER,
+    region_fid INTEGER
+)
+"""
+
+# Inserts a row for each present morning of each stay selected by
+# {source}. Triggers cannot use WITH clauses, so the nights of a stay
+# are numbered with json_each over a JSON array of `nights` zeros, built
+# from the hex of a zero-filled blob.
+_INSERT_MORNINGS = """
+INSERT INTO {table} (
+    morning, stay_fid, stay_location_fid, city_fid, metro_fid, region_fid
+)
+SELECT
+    date(stay.check_in_date, '+' || (night.key + 1) || ' days'),
+    stay.fid,
+    stay.stay_location_fid,
+    stay_locations.city_fid,
+    cities.metro_fid,
+    cities.region_fid
+FROM {source} AS stay
+JOIN json_each(
+    '[' || rtrim(replace(hex(zeroblob(stay.nights)), '00', '0,'), ',')
+    || ']'
+) AS night
+LEFT JOIN stay_locations ON stay_locations.fid = stay.stay_location_fid
+LEFT JOIN cities ON cities.fid = stay_locations.city_fid
+WHERE stay.check_in_date IS NOT NULL
+AND (
+    stay.absence_flags IS NULL
+    OR substr(stay.absence_flags, night.key + 1, 1) = 'P'
+);
+"""
+_NEW_STAY = """(
+    SELECT NEW.fid AS fid, NEW.check_in_date AS check_in_date,
+    NEW.nights AS nights, NEW.stay_location_fid AS stay_location_fid,
+    NEW.absence_flags AS absence_flags
+)"""
+
+# Updates the place fids of the mornings matching {condition}.
+_UPDATE_PLACES = """
+UPDATE stay_mornings SET
+    city_fid = (
+        SELECT city_fid FROM stay_locations
+        WHERE fid = stay_mornings.stay_location_fid
+    ),
+    metro_fid = (
+        SELECT cities.metro_fid FROM stay_locations
+        JOIN cities ON cities.fid = stay_locations.city_fid
+        WHERE stay_locations.fid = stay_mornings.stay_location_fid
+    ),
+    region_fid = (
+        SELECT cities.region_fid FROM stay_locations
+        JOIN cities ON cities.fid = stay_locations.city_fid
+        WHERE stay_locations.fid = stay_mornings.stay_location_fid
+    )
+WHERE {condition};
+"""
+_CITY_LOCATIONS = (
+    "stay_location_fid IN "
+    "(SELECT fid FROM stay_locations WHERE city_fid = {row}.fid)"
+)
+_INSERT_NEW = _INSERT_MORNINGS.format(table=TABLE, source=_NEW_STAY)
+_DELETE_OLD = "DELETE FROM stay_mornings WHERE stay_fid = OLD.fid;"
+
+# Trigger names, events, and bodies.
+TRIGGERS = {
+    'stay_mornings_stays_insert': (
+        "AFTER INSERT ON stays", _INSERT_NEW,
+    ),
+    'stay_mornings_stays_update': (
+        "AFTER UPDATE OF fid, check_in_date, nights, stay_location_fid, "
+        "absence_flags ON stays",
+        _DELETE_OLD + _INSERT_NEW,
+    ),
+    'stay_mornings_stays_delete': (
+        "AFTER DELETE ON stays", _DELETE_OLD,
+    ),
+    'stay_mornings_stay_locations_insert': (
+        "AFTER INSERT ON stay_locations",
+        _UPDATE_PLACES.format(condition="stay_location_fid = NEW.fid"),
+    ),
+    'stay_mornings_stay_locations_update': (
+        "AFTER UPDATE OF fid, city_fid ON stay_locations",
+        _UPDATE_PLACES.format(
+            condition="stay_location_fid IN (OLD.fid, NEW.fid)"
+        ),
+    ),
+    'stay_mornings_stay_locations_delete': (
+        "AFTER DELETE ON stay_locations",
+        _UPDATE_PLACES.format(condition="stay_location_fid = OLD.fid"),
+    ),
+    'stay_mornings_cities_insert': (
+        "AFTER INSERT ON cities",
+        _UPDATE_PLACES.format(condition=_CITY_LOCATIONS.format(row='NEW')),
+    ),
+    'stay_mornings_cities_update': (
+        "AFTER UPDATE OF fid, metro_fid, region_fid ON cities",
+        _UPDATE_PLACES.format(
+            condition=_CITY_LOCATIONS.format(row='OLD') + " OR "
+            + _CITY_LOCATIONS.format(row='NEW')
+        ),
+    ),
+    'stay_mornings_cities_delete': (
+        "AFTER DELETE ON cities",
+        _UPDATE_PLACES.format(condition=_CITY_LOCATIONS.format(row='OLD')),
+    ),
+}
+
+_READ_MORNINGS = """
+SELECT stay_mornings.morning, stay_mornings.stay_fid, stays.purpose,
+stay_locations.type, stays.portfolio, stays.brand,
+stay_mornings.stay_location_fid, stay_mornings.city_fid,
+stay_mornings.metro_fid, stay_mornings.region_fid
+FROM stay_mornings
+JOIN stays ON stays.fid = stay_mornings.stay_fid
+JOIN stay_locations ON stay_locations.fid = stay_mornings.stay_location_fid
+WHERE stay_mornings.morning BETWEEN ? AND ?
+{where}
+ORDER BY stay_mornings.morning
+"""
+
+def check_stay_mornings(lodging_path) -> pd.DataFrame:
+    """Compares the stay_mornings table to mornings freshly expanded
+    from the stays table.
+
+    Args:
+        lodging_path (Path): The GeoPackage to check.
+
+    Returns:
+        DataFrame: The rows that differ, with a `source` column of
+        'table' (rows only in stay_mornings) or 'stays' (rows only in
+        the expansion). Empty if the table is consistent.
+    """
+    conn = sqlite3.connect(lodging_path)
+    try:
+        conn.execute(
+            _CREATE_TABLE.format(table="temp.expected_mornings")
+        )
+        conn.execute(_INSERT_MORNINGS.format(
+            table="temp.expected_mornings", source="stays"
+        ))
+        columns = ", ".join(INDEXED_COLUMNS)
+        return pd.read_sql_query(f"""
+            SELECT 'table' AS source, * FROM (
+                SELECT {columns} FROM stay_mornings
+                EXCEPT SELECT {columns} FROM temp.expected_mornings
+            )
+            UNION ALL
+            SELECT 'stays' AS source, * FROM (
+                SELECT {columns} FROM temp.expected_mornings
+                EXCEPT SELECT {columns} FROM stay_mornings
+            )
+            ORDER BY morning, stay_fid
+        """, conn)
+    finally:
+        conn.close()
+
+def create_stay_mornings(lodging_path) -> int:
+    """Creates (or recreates) the stay_mornings table, its indexes, and
+    the triggers that maintain it, and registers it in the GeoPackage as
+    an attributes table.
+
+    Args:
+        lodging_path (Path): The GeoPackage to modify.
+
+    Returns:
+        int: The number of mornings in the table.
+    """
+    conn = sqlite3.connect(lodging_path)
+    try:
+        with conn:
+            _drop(conn)
+            conn.execute(_CREATE_TABLE.format(table=TABLE))
+            for col in INDEXED_COLUMNS:
+                conn.execute(
+                    f"CREATE INDEX {TABLE}_{col} ON {TABLE} ({col})"
+                )
+            for name, (event, body) in TRIGGERS.items():
+                conn.execute(
+                    f"CREATE TRIGGER {name} {event} BEGIN {body} END"
+                )
+            conn.execute(_INSERT_MORNINGS.format(table=TABLE, source="stays"))
+            conn.execute("""
+                INSERT INTO gpkg_contents
+                (table_name, data_type, identifier, description)
+                VALUES (?, 'attributes', ?, ?)
+            """, (
+                TABLE, TABLE,
+                "Mornings away from home, maintained by triggers on stays",
+            ))
+            if _table_exists(conn, 'gpkg_ogr_contents'):
+                conn.execute(
+                    "INSERT INTO gpkg_ogr_contents (table_name) VALUES (?)",
+                    (TABLE,),
+                )
+            return conn.execute(f"SELECT count(*) FROM {TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+
+def drop_stay_mornings(lodging_path) -> None:
+    """Removes the stay_mornings table and its triggers.
+
+    Args:
+        lodging_path (Path): The GeoPackage to modify.
+    """
+    conn = sqlite3.connect(lodging_path)
+    try:
+        with conn:
+            _drop(conn)
+    finally:
+        conn.close()
+
+def has_stay_mornings(conn) -> bool:
+    """Returns True if the stay_mornings table and all of its triggers
+    exist.
+
+    Args:
+        conn (sqlite3.Connection): A connection to the GeoPackage.
+    """
+    triggers = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+    }
+    return _table_exists(conn, TABLE) and TRIGGERS.keys() <= triggers
+
+def read_stay_mornings(
+    conn, start_morning=None, thru_morning=None, where=(), params=()
+) -> pd.DataFrame:
+    """Returns the mornings in an inclusive range, with the attributes
+    of their stays, using an indexed range query.
+
+    Args:
+        conn (sqlite3.Connection): A connection to the GeoPackage.
+        start_morning (date): The first morning. Defaults to unbounded.
+        thru_morning (date): The last morning. Defaults to unbounded.
+        where (list[str]): Additional SQL conditions on stays and
+            stay_locations, which must all be true.
+        params (list): Parameters for the conditions.
+
+    Returns:
+        DataFrame: A DataFrame with the columns of mornings expanded
+        from stays, sorted by morning.
+    """
+    start = "0000-01-01" if start_morning is None else str(
+        pd.Timestamp(start_morning).date()
+    )
+    thru = "9999-12-31" if thru_morning is None else str(
+        pd.Timestamp(thru_morning).date()
+    )
+    return pd.read_sql_query(stay_mornings_query(where), conn,
+        params=[start, thru, *params],
+        parse_dates=['morning'],
+        dtype={
+            'stay_fid': pd.Int64Dtype(),
+            'stay_location_fid': pd.Int64Dtype(),
+            'city_fid': pd.Int64Dtype(),
+            'metro_fid': pd.Int64Dtype(),
+            'region_fid': pd.Int64Dtype(),
+        },
+    )
+
+def stay_mornings_query(where=()) -> str:
+    """Returns the SQL query read_stay_mornings() runs, which takes the
+    first and last mornings and any parameters of the conditions.
+
+    Args:
+        where (list[str]): Additional SQL conditions on stays and
+            stay_locations, which must all be true.
+    """
+    return _READ_MORNINGS.format(
+        where="".join(f"AND {condition}\n" for condition in where)
+    )
+
+def _drop(conn) -> None:
+    """Drops the stay_mornings table and triggers, if they exist."""
+    for name in TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    for contents in ['gpkg_contents', 'gpkg_ogr_contents']:
+        if _table_exists(conn, contents):
+            conn.execute(
+                f"DELETE FROM {contents} WHERE table_name = ?", (TABLE,)
+            )
+
+def _table_exists(conn, table) -> bool:
+    """Returns True if a table exists."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,),
+    ).fetchone() is not None
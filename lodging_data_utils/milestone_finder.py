@@ -0,0 +1,195 @@
+"""Defines the MilestoneFinder class for finding the dates of night and
+distinct place milestones.
+"""
+
+# Standard library imports
+from datetime import date
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# First-party imports
+from .compact_mornings import (
+    CATEGORY_COLUMNS, NULL_FID, CompactMornings, day_ordinal,
+)
+
+MILESTONES = [50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000]
+
+# Mapping of milestone dimensions to the mornings column they count.
+# `night` counts every morning rather than distinct values.
+DIMENSIONS = {
+    'night': None,
+    'property': 'stay_location_fid',
+    'city': 'city_fid',
+    'metro': 'metro_fid',
+    'region': 'region_fid',
+    'country': 'region_fid', # Rolled up to the parent country.
+    'brand': 'brand',
+    'portfolio': 'portfolio',
+}
+
+class MilestoneFinder:
+    """Finds the mornings on which night and distinct place milestones
+    were reached.
+
+    Cumulative first-occurrence counts are computed for every dimension
+    from the arrays of a single CompactMornings, and milestone mornings
+    are then located with np.searchsorted.
+    """
+
+    def __init__(self, mornings, places, milestones=None):
+        """Initializes the MilestoneFinder.
+
+        Args:
+            mornings (DataFrame | CompactMornings): The mornings, as
+                returned by LodgingLog.mornings() or
+                LodgingLog.compact_mornings().
+            places (dict): The LodgingLog places, used to label places.
+            milestones (list[int]): Milestone thresholds. Defaults to
+                MILESTONES.
+        """
+        mornings = CompactMornings.of(mornings)
+        self.milestones = np.array(
+            MILESTONES if milestones is None else sorted(milestones)
+        )
+        self.days = mornings.days.astype('int64')
+        self._stay_fids = mornings.stay_fid.astype('int64')
+        self._places = places
+
+        # Compute the values and cumulative distinct counts for every
+        # dimension. Categories are counted by their codes, and null
+        # values (NULL_FID or code -1) are never counted.
+        self._values = {}
+        self.cumulative = {}
+        for dim, col in DIMENSIONS.items():
+            if col is None:
+                self._values[dim] = None
+                self.cumulative[dim] = np.arange(1, len(mornings) + 1)
+                continue
+            if dim == 'country':
+                values = mornings.country_fids(places['regions'])
+            else:
+                values = getattr(mornings, col)
+            codes = values.codes if col in CATEGORY_COLUMNS else values
+            is_first = np.zeros(len(codes), dtype=bool)
+            is_first[np.unique(codes, return_index=True)[1]] = True
+            is_first &= codes != NULL_FID
+            self._values[dim] = values
+            self.cumulative[dim] = np.cumsum(is_first)
+
+    def totals(self) -> pd.Series:
+        """Returns the total count for each dimension."""
+        return pd.Series({
+            dim: int(cum[-1]) if len(cum) > 0 else 0
+            for dim, cum in self.cumulative.items()
+        }, name='total')
+
+    def find(self, dims=None) -> pd.DataFrame:
+        """Returns a DataFrame of reached milestones.
+
+        Args:
+            dims (list[str]): Dimensions to find milestones for.
+                Defaults to all dimensions.
+
+        Returns:
+            DataFrame: A DataFrame with dimension, milestone, morning,
+            stay_fid, key, and name columns, with one row for each
+            milestone reached.
+        """
+        rows = []
+        for dim in self._dims(dims):
+            cum = self.cumulative[dim]
+            positions = np.searchsorted(cum, self.milestones, side='left')
+            reached = positions < len(cum)
+            for milestone, pos in zip(
+                self.milestones[reached], positions[reached]
+            ):
+                key, name = self._label(dim, pos)
+                rows.append({
+                    'dimension': dim,
+                    'milestone': int(milestone),
+                    'morning': pd.Timestamp(int(self.days[pos]), unit='D'),
+                    'stay_fid': self._stay_fids[pos],
+                    'key': key,
+                    'name': name,
+                })
+        return pd.DataFrame(rows, columns=[
+            'dimension', 'milestone', 'morning', 'stay_fid', 'key', 'name'
+        ])
+
+    def predict(self, dims=None, window_days=365, as_of=None) -> pd.DataFrame:
+        """Returns a DataFrame predicting the morning of the next
+        milestone for each dimension, based on the trailing rate.
+
+        Args:
+            dims (list[str]): Dimensions to predict milestones for.
+                Defaults to all dimensions.
+            window_days (int): Length of the trailing window used to
+                calculate the rate.
+            as_of (date): The date to predict from. Defaults to today.
+
+        Returns:
+            DataFrame: A DataFrame with dimension, total,
+            next_milestone, trailing_rate (per window), and
+            predicted_morning columns. predicted_morning is NaT if no
+            milestone remains or the trailing rate is zero.
+        """
+        as_of_day = day_ordinal(date.today() if as_of is None else as_of)
+        window_start = np.searchsorted(
+            self.days, as_of_day - window_days, side='right'
+        )
+        window_end = np.searchsorted(self.days, as_of_day, side='right')
+        rows = []
+        for dim in self._dims(dims):
+            cum = self.cumulative[dim]
+            total = int(cum[window_end - 1]) if window_end > 0 else 0
+            before = int(cum[window_start - 1]) if window_start > 0 else 0
+            rate = total - before
+            upcoming = self.milestones[self.milestones > total]
+            next_milestone = int(upcoming[0]) if len(upcoming) > 0 else None
+            predicted = pd.NaT
+            if next_milestone is not None and rate > 0:
+                days_needed = np.ceil(
+                    (next_milestone - total) * window_days / rate
+                )
+                predicted = pd.Timestamp(
+                    as_of_day + int(days_needed), unit='D'
+                )
+            rows.append({
+                'dimension': dim,
+                'total': total,
+                'next_milestone': next_milestone,
+                'trailing_rate': rate,
+                'predicted_morning': predicted,
+            })
+        return pd.DataFrame(rows)
+
+    def _dims(self, dims) -> list[str]:
+        """Validates and returns a list of dimensions."""
+        if dims is None:
+            return list(DIMENSIONS)
+        for dim in dims:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Invalid milestone dimension: {dim}")
+        return list(dims)
+
+    def _label(self, dim, pos) -> tuple:
+        """Returns the key and name of the value at a position."""
+        if dim == 'night':
+            return (pd.NA, pd.NA)
+        value = self._values[dim][pos]
+        tables = {
+            'property': ('stay_locations', None),
+            'city': ('cities', 'key'),
+            'metro': ('metros', 'key'),
+            'region': ('regions', 'iso_3166'),
+            'country': ('regions', 'iso_3166'),
+        }
+        if dim not in tables:
+            return (value, value)
+        table, key_col = tables[dim]
+        value = int(value)
+        record = self._places[table].record(value)
+        key = value if key_col is None else record[key_col]
+        return (key, record['name'])
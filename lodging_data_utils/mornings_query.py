@@ -0,0 +1,200 @@
+"""Defines the MorningsQuery class, a lazy, composable query of the
+mornings in a lodging log.
+"""
+
+# Third-party imports
+import pandas as pd
+
+GROUPINGS = ['location', 'city', 'metro', 'region']
+
+class MorningsQuery:
+    """A lazy query of the mornings in a lodging log.
+
+    Each filter method returns a new query, so queries can be built up
+    and reused. Nothing is read until mornings() or count() is called,
+    when the date, type, and purpose filters are pushed down into the
+    SQLite query, and only the matching mornings are expanded, grouped,
+    and counted.
+
+    Example:
+        log.query().between(start, thru).exclude_types(['Flight']) \\
+            .purpose('Business').group_by('metro').count()
+    """
+
+    def __init__(self,
+        log,
+        start_morning=None,
+        thru_morning=None,
+        included_types=None,
+        excluded_types=None,
+        purposes=None,
+        by=None,
+    ):
+        """Initializes the MorningsQuery.
+
+        Args:
+            log (LodgingLog): The log to query.
+            start_morning (date): The first morning, or None for
+                unbounded.
+            thru_morning (date): The last morning, or None for
+                unbounded.
+            included_types (tuple[str]): Stay location types to include,
+                or None for all types.
+            excluded_types (tuple[str]): Stay location types to
+                exclude.
+            purposes (tuple[str]): Stay purposes to include, or None for
+                all purposes.
+            by (str): The location type to group by, or None.
+        """
+        self.log = log
+        self.start_morning = start_morning
+        self.thru_morning = thru_morning
+        self.included_types = included_types
+        self.excluded_types = excluded_types or ()
+        self.purposes = purposes
+        self.by = by
+
+    def __repr__(self):
+        """Returns a string representation of the MorningsQuery."""
+        filters = ", ".join(
+            f"{attr}={getattr(self, attr)!r}" for attr in [
+                'start_morning', 'thru_morning', 'included_types',
+                'excluded_types', 'purposes', 'by',
+            ] if getattr(self, attr) not in [None, ()]
+        )
+        return f"MorningsQuery({filters})"
+
+    def between(self, start_morning=None, thru_morning=None):
+        """Returns a query limited to an inclusive range of mornings.
+
+        Ranges from repeated calls are intersected.
+
+        Args:
+            start_morning (date): The first morning, or None for
+                unbounded.
+            thru_morning (date): The last morning, or None for
+                unbounded.
+        """
+        start = self.start_morning
+        if start_morning is not None:
+            start_morning = pd.Timestamp(start_morning)
+            start = start_morning if start is None else max(
+                start, start_morning
+            )
+        thru = self.thru_morning
+        if thru_morning is not None:
+            thru_morning = pd.Timestamp(thru_morning)
+            thru = thru_morning if thru is None else min(thru, thru_morning)
+        return self._replace(start_morning=start, thru_morning=thru)
+
+    def count(self):
+        """Returns the number of matching mornings.
+
+        Returns:
+            int | DataFrame: If the query is grouped, a DataFrame indexed
+            by type_fid with place_type, title, name, key, lat, lon, and
+            nights columns, sorted by nights (descending) and name.
+            Otherwise, the number of mornings.
+        """
+        mornings = self.mornings()
+        if self.by is None:
+            return len(mornings)
+        grouped = mornings.groupby('type_fid').agg(
+            place_type=('place_type', 'first'),
+            title=('title', 'first'),
+            name=('name', 'first'),
+            key=('key', 'first'),
+            lat=('lat', 'first'),
+            lon=('lon', 'first'),
+            nights=('type_fid', 'count'),
+        )
+        return grouped.sort_values(
+            by=['nights', 'name'], ascending=[False, True]
+        )
+
+    def exclude_types(self, types):
+        """Returns a query excluding mornings at stay locations of the
+        given types, in addition to any already excluded.
+
+        Args:
+            types (list[str]): The stay location types to exclude.
+        """
+        return self._replace(
+            excluded_types=tuple(sorted({*self.excluded_types, *types}))
+        )
+
+    def group_by(self, by):
+        """Returns a query grouped by a location type.
+
+        Args:
+            by (str): 'location', 'city', 'metro', or 'region'.
+        """
+        if by not in GROUPINGS:
+            raise ValueError(f"Invalid grouping type: {by}")
+        return self._replace(by=by)
+
+    def mornings(self) -> pd.DataFrame:
+        """Runs the query and returns the matching mornings.
+
+        Returns:
+            DataFrame: The mornings, as returned by LodgingLog.mornings(),
+            or by LodgingLog.mornings_by() if the query is grouped.
+        """
+        filters = {
+            'start_morning': self.start_morning,
+            'thru_morning': self.thru_morning,
+            'types': self._list(self.included_types),
+            'exclude_types': self._list(self.excluded_types) or None,
+            'purposes': self._list(self.purposes),
+        }
+        if self.by is None:
+            return self.log.mornings(**filters)
+        return self.log.mornings_by(by=self.by, **filters)
+
+    def of_types(self, types):
+        """Returns a query limited to stay locations of the given types,
+        within any types already selected.
+
+        Args:
+            types (list[str]): The stay location types to include.
+        """
+        return self._replace(
+            included_types=self._intersect(self.included_types, types)
+        )
+
+    def purpose(self, *purposes):
+        """Returns a query limited to stays with any of the given
+        purposes, within any purposes already selected.
+
+        Args:
+            *purposes (str): The stay purposes to include.
+        """
+        return self._replace(
+            purposes=self._intersect(self.purposes, purposes)
+        )
+
+    def _intersect(self, current, values) -> tuple:
+        """Returns the sorted values that are also in the current values
+        (if any).
+        """
+        values = set(values)
+        if current is not None:
+            values &= set(current)
+        return tuple(sorted(values))
+
+    def _list(self, values) -> list | None:
+        """Returns a tuple of values as a list, or None."""
+        return None if values is None else list(values)
+
+    def _replace(self, **changes):
+        """Returns a copy of the query with some attributes replaced."""
+        attrs = {
+            'start_morning': self.start_morning,
+            'thru_morning': self.thru_morning,
+            'included_types': self.included_types,
+            'excluded_types': self.excluded_types,
+            'purposes': self.purposes,
+            'by': self.by,
+        }
+        attrs.update(changes)
+        return MorningsQuery(self.log, **attrs)
@@ -0,0 +1,186 @@
+"""Defines the NightCounter class for counting nights by calendar period
+and stay attributes.
+"""
+
+# Standard library imports
+import calendar
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# First-party imports
+from .compact_mornings import CompactMornings, day_ordinal
+
+PERIODS = ['year', 'quarter', 'month', 'week', 'weekday']
+DIMENSIONS = ['purpose', 'type', 'portfolio', 'brand', 'region', 'country']
+
+class NightCounter:
+    """Counts nights by calendar period and any combination of stay
+    attributes.
+
+    Each morning is reduced to an integer day ordinal (days since
+    1970-01-01) and each attribute to integer categorical codes, which
+    are computed once from a CompactMornings and cached. Every breakdown
+    is then a single np.bincount over the combined codes, so any number
+    of breakdowns can be counted without expanding the log again.
+    """
+
+    def __init__(self, mornings, regions):
+        """Initializes the NightCounter.
+
+        Args:
+            mornings (DataFrame | CompactMornings): The mornings, as
+                returned by LodgingLog.mornings() or
+                LodgingLog.compact_mornings().
+            regions (PlaceTable): The regions layer.
+        """
+        self._mornings = CompactMornings.of(mornings)
+        self.days = self._mornings.days.astype('int64')
+        self._regions = regions
+        self._dimension_cache = {}
+
+    def __len__(self):
+        """Returns the number of mornings in the counter."""
+        return len(self.days)
+
+    def count(self,
+        period='year',
+        by=None,
+        start_morning=None,
+        thru_morning=None,
+        fill=False,
+    ) -> pd.DataFrame:
+        """Returns a DataFrame of night counts for a breakdown.
+
+        Args:
+            period (str): `year`, `quarter`, `month`, `week` (ISO week),
+                `weekday`, or None to count across all periods.
+            by (list[str]): Stay attributes to split the counts by. Any
+                combination of `purpose`, `type`, `portfolio`, `brand`,
+                `region`, and `country`.
+            start_morning (date): The earliest morning to count.
+            thru_morning (date): The latest morning to count.
+            fill (bool): If True, include a row for every period and
+                category combination, including those with no nights.
+
+        Returns:
+            DataFrame: A DataFrame with a column for the period (if
+            any), a column for each attribute in `by`, and a
+            `night_count` column.
+        """
+        by = [] if by is None else list(by)
+        if period is not None and period not in PERIODS:
+            raise ValueError(f"Invalid period: {period}")
+        for dim in by:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Invalid dimension: {dim}")
+        columns = ([] if period is None else [period]) + by
+
+        # Limit the mornings to the requested range.
+        mask = np.ones(len(self.days), dtype=bool)
+        if start_morning is not None:
+            mask &= self.days >= day_ordinal(start_morning)
+        if thru_morning is not None:
+            mask &= self.days <= day_ordinal(thru_morning)
+        days = self.days[mask]
+        if len(days) == 0:
+            return pd.DataFrame(columns=columns + ['night_count'])
+        first_day = (
+            day_ordinal(start_morning) if start_morning is not None
+            else days.min()
+        )
+        last_day = (
+            day_ordinal(thru_morning) if thru_morning is not None
+            else days.max()
+        )
+
+        # Collect the codes and labels for each breakdown column.
+        codes = []
+        labels = []
+        if period is not None:
+            period_codes, period_labels = period_codes_and_labels(
+                period, days, first_day, last_day
+            )
+            codes.append(period_codes)
+            labels.append(period_labels)
+        for dim in by:
+            dim_codes, dim_labels = self._dimension(dim)
+            codes.append(dim_codes[mask])
+            labels.append(dim_labels)
+
+        # Count nights for every code combination in one pass.
+        if not codes:
+            return pd.DataFrame({'night_count': [len(days)]})
+        shape = tuple(len(l) for l in labels)
+        flat_codes = np.ravel_multi_index(codes, shape)
+        counts = np.bincount(flat_codes, minlength=int(np.prod(shape)))
+        if fill:
+            flat_index = np.arange(len(counts))
+        else:
+            flat_index = np.flatnonzero(counts)
+        positions = np.unravel_index(flat_index, shape)
+
+        output = pd.DataFrame({
+            col: np.asarray(labels[i], dtype=object)[positions[i]]
+            for i, col in enumerate(columns)
+        })
+        output['night_count'] = counts[flat_index]
+        return output
+
+    def _dimension(self, dim) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the cached codes and labels for a stay attribute."""
+        if dim not in self._dimension_cache:
+            if dim in ['region', 'country']:
+                if dim == 'country':
+                    region_fids = self._mornings.country_fids(self._regions)
+                else:
+                    region_fids = self._mornings.region_fid
+                codes, uniques = pd.factorize(region_fids)
+                labels = self._regions.take('iso_3166', uniques)
+            else:
+                codes, labels = self._mornings.codes(dim)
+            self._dimension_cache[dim] = (codes, labels)
+        return self._dimension_cache[dim]
+
+def period_codes_and_labels(period, days, first_day, last_day) -> tuple:
+    """Returns period codes for an array of day ordinals, and the labels
+    for every period from first_day through last_day.
+
+    Codes are zero-based offsets from the period containing first_day.
+    """
+    dates = days.astype('datetime64[D]')
+    span = np.array([first_day, last_day]).astype('datetime64[D]')
+    if period == 'year':
+        values = dates.astype('datetime64[Y]').astype('int64')
+        lo, hi = span.astype('datetime64[Y]').astype('int64')
+        labels = np.arange(lo, hi + 1) + 1970
+    elif period == 'month':
+        values = dates.astype('datetime64[M]').astype('int64')
+        lo, hi = span.astype('datetime64[M]').astype('int64')
+        labels = np.arange(lo, hi + 1).astype('datetime64[M]').astype(str)
+    elif period == 'quarter':
+        values = dates.astype('datetime64[M]').astype('int64') // 3
+        lo, hi = span.astype('datetime64[M]').astype('int64') // 3
+        labels = [
+            f"{1970 + q // 4}Q{q % 4 + 1}" for q in range(lo, hi + 1)
+        ]
+    elif period == 'week':
+        # 1970-01-01 was a Thursday, so Monday-based weekdays are offset
+        # by 3. ISO weeks belong to the year containing their Thursday.
+        values = (days - (days + 3) % 7) // 7
+        span_days = span.astype('int64')
+        lo, hi = (span_days - (span_days + 3) % 7) // 7
+        thursdays = (np.arange(lo, hi + 1) * 7 + 7).astype('datetime64[D]')
+        iso_years = thursdays.astype('datetime64[Y]')
+        iso_weeks = (thursdays - iso_years.astype('datetime64[D]')) \
+            .astype('int64') // 7 + 1
+        labels = [
+            f"{y + 1970}-W{w:02d}"
+            for y, w in zip(iso_years.astype('int64'), iso_weeks)
+        ]
+    elif period == 'weekday':
+        return (days + 3) % 7, list(calendar.day_name)
+    else:
+        raise ValueError(f"Invalid period: {period}")
+    return values - lo, labels
@@ -0,0 +1,227 @@
+"""Defines the OverlapFinder class for finding stays with overlapping
+mornings and suggesting absence_flags edits that resolve them.
+"""
+
+# Standard library imports
+import heapq
+import re
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+OVERLAP_COLUMNS = [
+    'stay_fid', 'other_stay_fid', 'first_morning', 'last_morning',
+    'conflicts',
+]
+FIX_COLUMNS = [
+    'stay_fid', 'check_in_date', 'nights', 'absence_flags',
+    'suggested_absence_flags', 'absent_mornings',
+]
+
+class OverlapFinder:
+    """Finds every pair of stays that are both present on a morning,
+    without expanding the log to one row per morning.
+
+    Each stay is split into runs of consecutive present mornings (a
+    stay without absence flags is a single run). The runs are sorted by
+    first morning and swept in order, keeping a heap of the runs still
+    in progress ordered by last morning, so finding the k overlapping
+    runs of n stays takes O(n log n + k). Overlaps already resolved with
+    absence flags are never visited.
+    """
+
+    def __init__(self, stays):
+        """Initializes the OverlapFinder.
+
+        Args:
+            stays (DataFrame): A DataFrame of stays, as returned by
+                LodgingLog.stays().
+        """
+        self.stays = stays.dropna(subset=['check_in_date', 'nights']) \
+            .sort_values(by=['check_in_date', 'stay_fid']) \
+            .reset_index(drop=True)
+        check_in = self.stays['check_in_date'].to_numpy(
+            dtype='datetime64[D]'
+        ).astype('int64')
+        self.first_morning = check_in + 1
+        self.nights = self.stays['nights'].to_numpy(dtype='int64')
+        has_flags = self.stays['absence_flags'].notna().to_numpy()
+        self._flags = [
+            str(flags) if has else None
+            for flags, has in zip(self.stays['absence_flags'], has_flags)
+        ]
+
+        # Build the runs of present mornings, as stay index, first
+        # morning, and last morning arrays sorted by first morning.
+        run_stays = [np.flatnonzero(~has_flags)]
+        run_offsets = [np.zeros(len(run_stays[0]), dtype='int64')]
+        run_lengths = [self.nights[~has_flags]]
+        flagged_runs = [
+            (i, match.start(), match.end() - match.start())
+            for i in np.flatnonzero(has_flags)
+            for match in re.finditer("P+", self._flags[i])
+        ]
+        if flagged_runs:
+            flagged_runs = np.array(flagged_runs, dtype='int64')
+            run_stays.append(flagged_runs[:, 0])
+            run_offsets.append(flagged_runs[:, 1])
+            run_lengths.append(flagged_runs[:, 2])
+        run_stays = np.concatenate(run_stays)
+        run_first = self.first_morning[run_stays] + np.concatenate(
+            run_offsets
+        )
+        run_last = run_first + np.concatenate(run_lengths) - 1
+        order = np.lexsort((run_stays, run_first))
+        self._run_stays = run_stays[order]
+        self._run_first = run_first[order]
+        self._run_last = run_last[order]
+
+    def __len__(self):
+        """Returns the number of stays."""
+        return len(self.stays)
+
+    def fixes(self) -> pd.DataFrame:
+        """Returns the smallest absence_flags edits that resolve every
+        overlap.
+
+        Each conflicting morning is marked absent in one stay of the
+        pair: the stay with more nights (or, for stays of equal length,
+        the later stay), since a long stay is more likely to have been
+        interrupted by a short side trip than the reverse. Overlaps are
+        resolved in order, so a morning shared by three or more stays is
+        only marked absent as many times as needed.
+
+        Returns:
+            DataFrame: A DataFrame with a row for each stay to edit, with
+            stay_fid, check_in_date, nights, absence_flags (the current
+            flags), suggested_absence_flags, and absent_mornings (the
+            number of mornings newly marked absent) columns.
+        """
+        presence = {}
+        for (i, j), days in self._conflicts().items():
+            target = i if self.nights[i] > self.nights[j] else j
+            for day in days:
+                if not all(
+                    presence[k][day - self.first_morning[k]]
+                    for k in (i, j) if k in presence
+                ):
+                    continue # Already resolved by an earlier fix.
+                flags = presence.setdefault(target, self._presence(target))
+                flags[day - self.first_morning[target]] = False
+
+        rows = []
+        for i in sorted(presence):
+            suggested = "".join("P" if p else "A" for p in presence[i])
+            rows.append({
+                'stay_fid': self.stays['stay_fid'].iloc[i],
+                'check_in_date': self.stays['check_in_date'].iloc[i],
+                'nights': int(self.nights[i]),
+                'absence_flags': self._flags[i],
+                'suggested_absence_flags': suggested,
+                'absent_mornings': (
+                    sum(self._presence(i)) - sum(presence[i])
+                ),
+            })
+        return pd.DataFrame(rows, columns=FIX_COLUMNS)
+
+    def overlaps(self) -> pd.DataFrame:
+        """Returns every pair of stays that are both present on at least
+        one morning.
+
+        Returns:
+            DataFrame: A DataFrame with a row for each pair, with
+            stay_fid (the earlier stay), other_stay_fid, first_morning
+            and last_morning (the first and last mornings both stays are
+            present), and conflicts (the number of mornings both stays
+            are present) columns, sorted by first_morning.
+        """
+        stay_fids = self.stays['stay_fid'].to_numpy()
+        return pd.DataFrame([
+            {
+                'stay_fid': stay_fids[i],
+                'other_stay_fid': stay_fids[j],
+                'first_morning': _date(days[0]),
+                'last_morning': _date(days[-1]),
+                'conflicts': len(days),
+            }
+            for (i, j), days in self._conflicts().items()
+        ], columns=OVERLAP_COLUMNS)
+
+    def sql(self) -> str:
+        """Returns an SQL script that applies the suggested fixes to the
+        stays table in one transaction.
+
+        Each update only applies if the stay's absence_flags have not
+        changed since the fixes were suggested.
+        """
+        statements = ["BEGIN;"]
+        for fix in self.fixes().itertuples():
+            current = (
+                "IS NULL" if pd.isna(fix.absence_flags)
+                else f"= '{fix.absence_flags}'"
+            )
+            statements.append(
+                f"UPDATE stays SET absence_flags = "
+                f"'{fix.suggested_absence_flags}' "
+                f"WHERE fid = {fix.stay_fid} AND absence_flags {current};"
+                f" -- {fix.check_in_date:%Y-%m-%d}, "
+                f"{fix.absent_mornings} mornings absent"
+            )
+        statements.append("COMMIT;")
+        return "\n".join(statements) + "\n"
+
+    def _conflicts(self) -> dict:
+        """Returns the conflicting mornings of each pair of stays.
+
+        Returns:
+            dict: A dict of (earlier, later) stay index pairs to sorted
+            lists of the day ordinals (days since 1970-01-01) of the
+            mornings both stays are present, in order of each pair's
+            first conflict.
+        """
+        conflicts = {}
+        for a, b in self._overlapping_runs():
+            i, j = sorted((int(self._run_stays[a]), int(self._run_stays[b])))
+            lo = max(self._run_first[a], self._run_first[b])
+            hi = min(self._run_last[a], self._run_last[b])
+            conflicts.setdefault((i, j), []).extend(
+                range(int(lo), int(hi) + 1)
+            )
+        for days in conflicts.values():
+            days.sort()
+        return conflicts
+
+    def _overlapping_runs(self):
+        """Yields the index pairs (earlier, later) of runs of present
+        mornings that overlap, in order of the later run.
+        """
+        # Most logs have no overlaps, which can be ruled out without a
+        # sweep: a run overlaps an earlier one only if it begins on or
+        # before the latest last morning of the runs before it.
+        if len(self._run_first) < 2:
+            return
+        latest = np.maximum.accumulate(self._run_last)
+        if not (self._run_first[1:] <= latest[:-1]).any():
+            return
+
+        active = [] # Heap of (last morning, index) of runs in progress.
+        for b in range(len(self._run_first)):
+            first = self._run_first[b]
+            while active and active[0][0] < first:
+                heapq.heappop(active)
+            for _, a in sorted(active, key=lambda item: item[1]):
+                yield a, b
+            heapq.heappush(active, (self._run_last[b], b))
+
+    def _presence(self, i) -> list[bool]:
+        """Returns a list of whether each night of a stay is present,
+        from its absence_flags.
+        """
+        if self._flags[i] is None:
+            return [True] * int(self.nights[i])
+        return [flag == 'P' for flag in self._flags[i]]
+
+def _date(day) -> pd.Timestamp:
+    """Returns the date of a day ordinal (days since 1970-01-01)."""
+    return pd.Timestamp(np.datetime64(int(day), 'D'))
@@ -0,0 +1,230 @@
+"""Defines the PlaceIndex class for fast queries of nights spent at a
+place.
+"""
+
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# First-party imports
+from .compact_mornings import NULL_FID, CompactMornings, day_ordinal
+
+# Mapping of place levels to the mornings column and the place layer and
+# column used as the place key.
+LEVELS = {
+    'location': ('stay_location_fid', 'stay_locations', None),
+    'city': ('city_fid', 'cities', 'key'),
+    'metro': ('metro_fid', 'metros', 'key'),
+    'region': ('region_fid', 'regions', 'iso_3166'),
+}
+
+class PlaceIndex:
+    """An inverted index from each place to the sorted day ordinals
+    (days since 1970-01-01) of the mornings spent there.
+
+    Each level (location, city, metro, and region) is stored as a
+    compressed sparse row structure: a sorted array of place fids, an
+    array of offsets, and the concatenated sorted day ordinals of each
+    place. Regions include the mornings of their subdivisions, so a
+    country can be queried directly. Queries use binary search, so each
+    takes O(log n) time.
+
+    Places are identified by a (level, key) tuple, where key is the fid
+    for locations, the key for cities and metros, and the ISO 3166 code
+    for regions; for example, ('metro', 'US/10740'). Places with a null
+    key cannot be queried.
+    """
+
+    def __init__(self, levels):
+        """Initializes the PlaceIndex.
+
+        Args:
+            levels (dict): A dict of level names to dicts with `fids`,
+                `keys`, `offsets`, and `days` arrays. Use from_mornings()
+                or load() to create a PlaceIndex.
+        """
+        self.levels = levels
+        # Places with a null key are stored with an empty key, and cannot
+        # be looked up.
+        self._key_lookup = {
+            level: {
+                key: i for i, key in enumerate(arrays['keys'].tolist())
+                if key != ""
+            }
+            for level, arrays in levels.items()
+        }
+
+    @classmethod
+    def from_mornings(cls, mornings, places) -> 'PlaceIndex':
+        """Creates a PlaceIndex from mornings.
+
+        Args:
+            mornings (DataFrame | CompactMornings): The mornings, as
+                returned by LodgingLog.mornings() or
+                LodgingLog.compact_mornings().
+            places (dict): The LodgingLog places.
+        """
+        mornings = CompactMornings.of(mornings)
+        days = mornings.days.astype('int64')
+        levels = {}
+        for level, (col, table, key_col) in LEVELS.items():
+            fids = getattr(mornings, col).astype('int64')
+            level_days = days
+            if level == 'region':
+                # Add each subdivision's mornings to its parent country.
+                parents = pd.Series(
+                    places['regions'].take('parent_region_fid', fids)
+                )
+                has_parent = parents.notna().to_numpy()
+                fids = np.concatenate([
+                    fids, parents[has_parent].to_numpy(dtype='int64')
+                ])
+                level_days = np.concatenate([days, days[has_parent]])
+            has_fid = fids != NULL_FID
+            fids = fids[has_fid]
+            level_days = level_days[has_fid]
+
+            # Sort by fid, then by day.
+            order = np.lexsort((level_days, fids))
+            fids = fids[order]
+            level_days = level_days[order]
+            unique_fids, starts = np.unique(fids, return_index=True)
+            offsets = np.append(starts, len(fids))
+            if key_col is None:
+                keys = unique_fids.astype(str)
+            else:
+                keys = np.array([
+                    "" if pd.isna(key) else str(key)
+                    for key in places[table].take(key_col, unique_fids)
+                ], dtype=str)
+            levels[level] = {
+                'fids': unique_fids,
+                'keys': keys,
+                'offsets': offsets,
+                'days': level_days,
+            }
+        return cls(levels)
+
+    @classmethod
+    def load(cls, path) -> 'PlaceIndex':
+        """Loads a PlaceIndex saved with save().
+
+        Args:
+            path (Path): The path of the saved index (.npz).
+        """
+        with np.load(path) as data:
+            levels = {
+                level: {
+                    name: data[f"{level}/{name}"]
+                    for name in ['fids', 'keys', 'offsets', 'days']
+                }
+                for level in LEVELS
+            }
+        return cls(levels)
+
+    def save(self, path) -> None:
+        """Saves the PlaceIndex to a NumPy .npz file.
+
+        Args:
+            path (Path): The path to save the index to.
+        """
+        arrays = {
+            f"{level}/{name}": values
+            for level, level_arrays in self.levels.items()
+            for name, values in level_arrays.items()
+        }
+        with open(Path(path), 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    def nights_at(self, place, start_morning=None, thru_morning=None) -> int:
+        """Returns the number of nights spent at a place.
+
+        Args:
+            place (tuple): A (level, key) tuple.
+            start_morning (date): The earliest morning to count.
+            thru_morning (date): The latest morning to count.
+        """
+        lo, hi = self._window(place, start_morning, thru_morning)
+        return int(hi - lo)
+
+    def first_visit(self, place):
+        """Returns the first morning spent at a place, or None if the
+        place has never been visited.
+        """
+        days = self._days(place)
+        if len(days) == 0:
+            return None
+        return pd.Timestamp(int(days[0]), unit='D')
+
+    def last_visit(self, place, before=None):
+        """Returns the last morning spent at a place, or None if the
+        place has never been visited.
+
+        Args:
+            place (tuple): A (level, key) tuple.
+            before (date): If specified, return the last morning on or
+                before this date.
+        """
+        days = self._days(place)
+        if before is None:
+            end = len(days)
+        else:
+            end = np.searchsorted(days, day_ordinal(before), side='right')
+        if end == 0:
+            return None
+        return pd.Timestamp(int(days[end - 1]), unit='D')
+
+    def visits_between(self,
+        place,
+        start_morning=None,
+        thru_morning=None,
+    ) -> pd.DataFrame:
+        """Returns a DataFrame of visits to a place, where a visit is a
+        run of consecutive mornings.
+
+        Args:
+            place (tuple): A (level, key) tuple.
+            start_morning (date): The earliest morning to include.
+            thru_morning (date): The latest morning to include.
+
+        Returns:
+            DataFrame: A DataFrame with first_morning, last_morning, and
+            nights columns.
+        """
+        lo, hi = self._window(place, start_morning, thru_morning)
+        days = self._days(place)[lo:hi]
+        breaks = np.flatnonzero(np.diff(days) != 1) + 1
+        firsts = np.concatenate([[0], breaks]).astype('int64')
+        lasts = np.concatenate([breaks, [len(days)]]).astype('int64') - 1
+        if len(days) == 0:
+            firsts = lasts = np.array([], dtype='int64')
+        return pd.DataFrame({
+            'first_morning': pd.to_datetime(days[firsts], unit='D'),
+            'last_morning': pd.to_datetime(days[lasts], unit='D'),
+            'nights': lasts - firsts + 1,
+        })
+
+    def _days(self, place) -> np.ndarray:
+        """Returns the sorted day ordinals for a place."""
+        level, key = place
+        if level not in self.levels:
+            raise ValueError(f"Invalid place level: {level}")
+        i = self._key_lookup[level].get(str(key))
+        arrays = self.levels[level]
+        if i is None:
+            return arrays['days'][:0]
+        return arrays['days'][arrays['offsets'][i]:arrays['offsets'][i + 1]]
+
+    def _window(self, place, start_morning, thru_morning) -> tuple[int, int]:
+        """Returns the positions of a date window in a place's days."""
+        days = self._days(place)
+        lo = 0
+        hi = len(days)
+        if start_morning is not None:
+            lo = np.searchsorted(days, day_ordinal(start_morning), 'left')
+        if thru_morning is not None:
+            hi = np.searchsorted(days, day_ordinal(thru_morning), 'right')
+        return (int(lo), int(max(lo, hi)))
@@ -0,0 +1,224 @@
+"""Defines the PlaceTable class, a compact in-memory representation of a
+place layer (stay_locations, cities, metros, or regions) in a lodging
+log.
+"""
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+import shapely
+
+# First-party imports
+from .compact_mornings import NULL_FID
+
+class PlaceTable:
+    """The places in one layer of a lodging log, stored as NumPy arrays.
+
+    Each place has an int64 fid and the float64 latitude and longitude
+    of its point (or the first point of a multipoint), which are NaN if
+    it has no point. Each column ending in `_fid` is an int32 array with
+    NULL_FID for nulls, and each text column with mostly repeated values
+    is a pandas Categorical (small integer codes and one copy of each
+    distinct value). Other columns keep the arrays they were read with.
+    Geometries, which take the most memory as shapely objects, are not
+    kept; LodgingLog.geodata() reads a layer with its geometry.
+
+    A fid is looked up by position in an array of row numbers, so
+    finding the row of any fid takes constant time.
+    """
+
+    __slots__ = ('fids', 'lat', 'lon', '_columns', '_dtypes', '_rows')
+
+    def __init__(self, fids, lat, lon, columns, dtypes):
+        """Initializes the PlaceTable.
+
+        Args:
+            fids (ndarray): The int64 fids of the places.
+            lat (ndarray): The float64 latitude of each place.
+            lon (ndarray): The float64 longitude of each place.
+            columns (dict): Arrays of the other columns, by name.
+            dtypes (dict): The original dtype of each column, by name,
+                which series() returns it as.
+        """
+        self.fids = fids
+        self.lat = lat
+        self.lon = lon
+        self._columns = columns
+        self._dtypes = dtypes
+        size = int(fids.max()) + 1 if len(fids) > 0 else 0
+        self._rows = np.full(size, -1, dtype='int32')
+        self._rows[fids] = np.arange(len(fids), dtype='int32')
+
+    def __contains__(self, fid):
+        """Returns True if a place with the fid is in the table."""
+        return self.row(fid) >= 0
+
+    def __len__(self):
+        """Returns the number of places."""
+        return len(self.fids)
+
+    def __repr__(self):
+        """Returns a string representation of the PlaceTable."""
+        return (
+            f"PlaceTable({len(self)} places, {self.memory_usage()} bytes)"
+        )
+
+    @classmethod
+    def from_geodataframe(cls, gdf) -> 'PlaceTable':
+        """Creates a PlaceTable from a place layer.
+
+        Args:
+            gdf (GeoDataFrame): The layer, indexed by fid, as returned
+                by LodgingLog.geodata().
+        """
+        points = shapely.get_geometry(gdf.geometry.values, 0)
+        columns = {}
+        dtypes = {}
+        for column in gdf.columns:
+            if column == gdf.geometry.name:
+                continue
+            values = gdf[column]
+            dtypes[column] = values.dtype
+            if column.endswith('_fid'):
+                columns[column] = pd.to_numeric(values) \
+                    .fillna(NULL_FID).to_numpy(dtype='int32')
+            elif values.dtype == object or pd.api.types.is_string_dtype(
+                values.dtype
+            ):
+                # Repeated values (such as types and brands) are stored
+                # once as categories; mostly distinct values (such as
+                # names) are kept as they were read.
+                codes, categories = pd.factorize(values)
+                if len(categories) <= len(values) // 2:
+                    columns[column] = pd.Categorical.from_codes(
+                        codes, categories
+                    )
+                else:
+                    columns[column] = values.array
+            else:
+                columns[column] = values.to_numpy()
+        return cls(
+            gdf.index.to_numpy(dtype='int64'),
+            shapely.get_y(points).astype('float64'),
+            shapely.get_x(points).astype('float64'),
+            columns,
+            dtypes,
+        )
+
+    @property
+    def columns(self) -> list[str]:
+        """The names of the columns other than lat and lon."""
+        return list(self._columns)
+
+    def memory_usage(self) -> int:
+        """Returns the number of bytes used by the arrays."""
+        total = self.fids.nbytes + self.lat.nbytes + self.lon.nbytes
+        total += self._rows.nbytes
+        for values in self._columns.values():
+            if isinstance(values, pd.Categorical):
+                total += values.memory_usage(deep=True)
+            else:
+                total += values.nbytes
+        return int(total)
+
+    def record(self, fid) -> dict:
+        """Returns the values of one place, with lat and lon.
+
+        Null fids are returned as None, and other nulls as pd.NA.
+
+        Args:
+            fid (int): The fid of the place.
+
+        Raises:
+            KeyError: If there is no place with the fid.
+        """
+        row = self.row(fid)
+        if row < 0:
+            raise KeyError(fid)
+        record = {}
+        for column, values in self._columns.items():
+            value = values[row]
+            if column.endswith('_fid'):
+                record[column] = None if value == NULL_FID else int(value)
+            else:
+                record[column] = pd.NA if pd.isna(value) else value
+        record['lat'] = float(self.lat[row])
+        record['lon'] = float(self.lon[row])
+        return record
+
+    def row(self, fid) -> int:
+        """Returns the row number of a fid, or -1 if no place has it.
+
+        Args:
+            fid (int): The fid to look up.
+        """
+        if pd.isna(fid):
+            return -1
+        fid = int(fid)
+        if fid < 0 or fid >= len(self._rows):
+            return -1
+        return int(self._rows[fid])
+
+    def rows(self, fids) -> np.ndarray:
+        """Returns the row number of each fid, with -1 for nulls and
+        fids no place has.
+
+        Args:
+            fids (array-like): The fids to look up, which may include
+                nulls or NULL_FID.
+        """
+        fids = pd.to_numeric(pd.Series(fids)).fillna(NULL_FID) \
+            .to_numpy(dtype='int64')
+        valid = (fids >= 0) & (fids < len(self._rows))
+        rows = np.full(len(fids), -1, dtype='int64')
+        rows[valid] = self._rows[fids[valid]]
+        return rows
+
+    def series(self, column) -> pd.Series:
+        """Returns a column as a Series indexed by fid, with the dtype
+        it was read with, for mapping fids to values.
+
+        Args:
+            column (str): A column name, or lat or lon.
+        """
+        index = pd.Index(self.fids, name='fid')
+        if column in ['lat', 'lon']:
+            return pd.Series(getattr(self, column), index=index, name=column)
+        if column not in self._columns:
+            raise ValueError(f"Invalid column: {column}")
+        values = self._columns[column]
+        if column.endswith('_fid'):
+            values = pd.array(
+                np.where(values == NULL_FID, pd.NA, values.astype(object)),
+                dtype='Int64',
+            )
+        series = pd.Series(values, index=index, name=column)
+        return series.astype(self._dtypes[column])
+
+    def take(self, column, fids) -> np.ndarray:
+        """Returns a column's values for each fid, as an object array
+        with pd.NA for nulls and fids no place has.
+
+        Args:
+            column (str): A column name, or lat or lon.
+            fids (array-like): The fids to look up.
+        """
+        rows = self.rows(fids)
+        found = rows >= 0
+        output = np.full(len(rows), pd.NA, dtype=object)
+        if column in ['lat', 'lon']:
+            values = getattr(self, column)[rows[found]]
+            output[found] = np.where(np.isnan(values), pd.NA, values)
+        elif column not in self._columns:
+            raise ValueError(f"Invalid column: {column}")
+        elif column.endswith('_fid'):
+            values = self._columns[column][rows[found]]
+            output[found] = np.where(
+                values == NULL_FID, pd.NA, values.astype(object)
+            )
+        else:
+            values = np.asarray(
+                self._columns[column][rows[found]], dtype=object
+            )
+            output[found] = np.where(pd.isna(values), pd.NA, values)
+        return output
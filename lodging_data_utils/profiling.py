@@ -0,0 +1,229 @@
+"""Timing and memory instrumentation for LodgingLog stages and scripts.
+
+Profiling is disabled by default, and spans cost only a flag check when
+disabled. It is enabled by setting the LODGING_PROFILE environment
+variable (to `1`, or to the path of a JSON trace file), or by the
+`--profile` argument of each script. When enabled, each span records its
+wall time, row count, and tracemalloc peak, and at exit a JSON trace is
+written and a summary table is printed to standard error.
+
+tracemalloc has one peak for the whole process, so memory peaks are only
+recorded for spans on the thread that enabled profiling; spans on other
+threads have a peak of None. Wrap functions run in thread pools with
+carry_spans(), so that their spans are recorded under the span that
+started them.
+"""
+
+# Standard library imports
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+ENV_VAR = 'LODGING_PROFILE'
+DEFAULT_TRACE_PATH = Path("lodging_profile.json")
+
+class _State:
+    """Holds the profiling state for the process."""
+    enabled = False
+    trace_path = None
+    origin = None
+    memory_thread = None # The thread whose spans record memory peaks.
+    spans = []
+    threads = threading.local() # Holds each thread's stack of open spans.
+
+class Span:
+    """A named, timed section of code. Set `rows` to record the number
+    of rows the section produced.
+    """
+    __slots__ = ['name', 'rows', '_start', '_memory_start', '_peak']
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+
+    def __enter__(self):
+        if not _State.enabled:
+            return self
+        stack = _stack()
+        if _tracks_memory():
+            # Fold the peak so far into the enclosing span before
+            # resetting.
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                parent = stack[-1]
+                parent._peak = max(parent._peak, peak)
+            tracemalloc.reset_peak()
+            self._memory_start = current
+            self._peak = current
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stack = _stack()
+        if not _State.enabled or self not in stack:
+            return False
+        end = time.perf_counter()
+        stack.remove(self)
+        peak_mib = None
+        if _tracks_memory():
+            peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                parent = stack[-1]
+                parent._peak = max(parent._peak, peak)
+            peak_mib = round((peak - self._memory_start) / 2**20, 3)
+        _State.spans.append({
+            'name': self.name,
+            'parent': stack[-1].name if stack else None,
+            'depth': len(stack),
+            'thread': threading.current_thread().name,
+            'start_seconds': round(self._start - _State.origin, 6),
+            'wall_seconds': round(end - self._start, 6),
+            'rows': self.rows,
+            'peak_mib': peak_mib,
+            'error': None if exc_type is None else exc_type.__name__,
+        })
+        return False
+
+def span(name) -> Span:
+    """Returns a span context manager.
+
+    Usage:
+        with profiling.span("load") as s:
+            df = load()
+            s.rows = len(df)
+    """
+    return Span(name)
+
+def profiled(func):
+    """Decorates a function or method to record a span named after its
+    qualified name, with the length of its result as the row count.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _State.enabled:
+            return func(*args, **kwargs)
+        with Span(func.__qualname__) as s:
+            result = func(*args, **kwargs)
+            try:
+                s.rows = len(result)
+            except TypeError:
+                pass
+        return result
+    return wrapper
+
+def carry_spans(func):
+    """Returns a function that runs func under the spans open on the
+    current thread, for submitting to a thread pool. Spans func records
+    on another thread then have the right parent and depth.
+
+    Usage:
+        pool.submit(profiling.carry_spans(read), layer)
+    """
+    if not _State.enabled:
+        return func
+    parents = list(_stack())
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = _stack()
+        previous = stack[:]
+        stack[:] = parents
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stack[:] = previous
+    return wrapper
+
+def enable(trace_path=None) -> None:
+    """Enables profiling, and writes a trace and summary at exit.
+
+    Args:
+        trace_path (Path): The JSON trace file to write. Defaults to
+            lodging_profile.json in the current folder.
+    """
+    if _State.enabled:
+        return
+    _State.enabled = True
+    _State.trace_path = Path(trace_path or DEFAULT_TRACE_PATH)
+    _State.origin = time.perf_counter()
+    _State.memory_thread = threading.get_ident()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    atexit.register(report)
+
+def is_enabled() -> bool:
+    """Returns True if profiling is enabled."""
+    return _State.enabled
+
+def add_argument(parser) -> None:
+    """Adds a `--profile [FILE]` argument to an argument parser."""
+    parser.add_argument('--profile',
+        help=(
+            "record stage timings and memory, and write a JSON trace "
+            f"(default: {DEFAULT_TRACE_PATH})"
+        ),
+        nargs='?',
+        const=DEFAULT_TRACE_PATH,
+        type=Path,
+        metavar='FILE',
+    )
+
+def enable_from_args(args) -> None:
+    """Enables profiling if the `--profile` argument was used."""
+    if getattr(args, 'profile', None) is not None:
+        enable(args.profile)
+
+def report() -> None:
+    """Writes the JSON trace and prints a summary table."""
+    if not _State.spans:
+        return
+    with open(_State.trace_path, 'w', encoding='utf-8') as f:
+        json.dump({'spans': _State.spans}, f, indent=2)
+
+    # Summarize spans by name, in order of first appearance.
+    summary = {}
+    for s in sorted(_State.spans, key=lambda s: s['start_seconds']):
+        entry = summary.setdefault(s['name'], {
+            'depth': s['depth'], 'calls': 0, 'wall_seconds': 0.0,
+            'rows': None, 'peak_mib': None,
+        })
+        entry['calls'] += 1
+        entry['wall_seconds'] += s['wall_seconds']
+        if s['peak_mib'] is not None:
+            entry['peak_mib'] = max(entry['peak_mib'] or 0.0, s['peak_mib'])
+        if s['rows'] is not None:
+            entry['rows'] = (entry['rows'] or 0) + s['rows']
+    lines = [f"{'span':<48} {'calls':>5} {'seconds':>9} {'rows':>9} "
+        f"{'peak MiB':>9}"]
+    for name, entry in summary.items():
+        label = ("  " * entry['depth'] + name)[:48]
+        rows = "" if entry['rows'] is None else entry['rows']
+        peak = "" if entry['peak_mib'] is None else f"{entry['peak_mib']:.1f}"
+        lines.append(
+            f"{label:<48} {entry['calls']:>5} "
+            f"{entry['wall_seconds']:>9.3f} {rows:>9} {peak:>9}"
+        )
+    print("\n".join(lines), file=sys.stderr)
+    print(f"Saved profile trace to {_State.trace_path}", file=sys.stderr)
+
+def _stack() -> list:
+    """Returns the current thread's stack of open spans."""
+    if not hasattr(_State.threads, 'stack'):
+        _State.threads.stack = []
+    return _State.threads.stack
+
+def _tracks_memory() -> bool:
+    """Returns True if spans on the current thread record memory
+    peaks.
+    """
+    return threading.get_ident() == _State.memory_thread
+
+if os.environ.get(ENV_VAR, '') not in ['', '0']:
+    _env_value = os.environ[ENV_VAR]
+    enable(None if _env_value.lower() in ['1', 'true'] else _env_value)
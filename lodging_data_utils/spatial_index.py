@@ -0,0 +1,230 @@
+"""Defines the SpatialIndex class for finding the places near a point.
+"""
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Geod
+
+# First-party imports
+from .compact_mornings import CompactMornings
+from .distances import KM_PER_MILE
+
+# Mapping of indexable place layers to the mornings column counted for
+# each place, and the place columns included in results.
+LAYERS = {
+    'stay_locations': ('stay_location_fid', ['name', 'type']),
+    'cities': ('city_fid', ['key', 'name']),
+}
+# Radius in miles of a sphere no larger than the WGS84 ellipsoid (its
+# semi-minor axis), less a margin, so that bounding boxes computed on it
+# contain every place within a geodesic distance.
+BOUNDING_RADIUS_MI = 6356.752 / KM_PER_MILE * 0.99
+MAX_DISTANCE_MI = 12451 # Half the Earth's circumference.
+NEAREST_START_MI = 25 # Initial search radius for nearest().
+
+class SpatialIndex:
+    """An index of the places in a layer by location, with the nights
+    spent at each place.
+
+    The points of the places are kept in a shapely STRtree (a packed
+    R-tree) of longitude and latitude. Each query finds the candidate
+    places in one or two bounding boxes, and only measures geodesic
+    distances (on the WGS84 ellipsoid) to those candidates, so queries
+    stay fast with tens of thousands of places. Places without a point
+    are not indexed.
+
+    Results are DataFrames with the fid and columns of each place (see
+    LAYERS), its lat and lon, its distance_mi from the query point (for
+    within() and nearest()), and its night_count, first_morning, and
+    last_morning (NaT if it has no nights).
+    """
+
+    def __init__(self, places, mornings, layer):
+        """Initializes the SpatialIndex.
+
+        Args:
+            places (PlaceTable): The places to index.
+            mornings (DataFrame | CompactMornings): The mornings to
+                count, as returned by LodgingLog.mornings() or
+                LodgingLog.compact_mornings().
+            layer (str): The name of the place layer, one of LAYERS.
+        """
+        if layer not in LAYERS:
+            raise ValueError(f"Invalid layer: {layer}")
+        self.places = places
+        self.fid_column, self._columns = LAYERS[layer]
+        self._geod = Geod(ellps='WGS84')
+
+        # Count the nights at each place, and find its first and last
+        # mornings. Mornings are sorted, so the first and last positions
+        # of each place's row hold its first and last mornings.
+        mornings = CompactMornings.of(mornings)
+        rows = places.rows(getattr(mornings, self.fid_column))
+        days = mornings.days[rows >= 0].astype('datetime64[D]')
+        rows = rows[rows >= 0]
+        self.night_count = np.bincount(rows, minlength=len(places))
+        self.first_morning = np.full(len(places), 'NaT', 'datetime64[D]')
+        self.last_morning = np.full(len(places), 'NaT', 'datetime64[D]')
+        unique_rows, first_positions = np.unique(rows, return_index=True)
+        self.first_morning[unique_rows] = days[first_positions]
+        last_positions = len(rows) - 1 - np.unique(
+            rows[::-1], return_index=True
+        )[1]
+        self.last_morning[unique_rows] = days[last_positions]
+
+        self._tree_rows = np.flatnonzero(
+            ~np.isnan(places.lat) & ~np.isnan(places.lon)
+        )
+        self._tree = shapely.STRtree(shapely.points(
+            places.lon[self._tree_rows], places.lat[self._tree_rows]
+        ))
+
+    def __len__(self):
+        """Returns the number of indexed places."""
+        return len(self._tree_rows)
+
+    def in_bbox(self,
+        min_lat, min_lon, max_lat, max_lon, min_nights=0
+    ) -> pd.DataFrame:
+        """Returns the places in a bounding box, with the most nights
+        first.
+
+        Args:
+            min_lat (float): The southern edge, in degrees.
+            min_lon (float): The western edge, in degrees.
+            max_lat (float): The northern edge, in degrees.
+            max_lon (float): The eastern edge, in degrees. If less than
+                min_lon, the box crosses the antimeridian.
+            min_nights (int): Only return places with at least this
+                many nights.
+        """
+        if min_lat > max_lat:
+            raise ValueError("min_lat must not be greater than max_lat")
+        if min_lon <= max_lon:
+            boxes = [(min_lon, min_lat, max_lon, max_lat)]
+        else:
+            boxes = [
+                (min_lon, min_lat, 180, max_lat),
+                (-180, min_lat, max_lon, max_lat),
+            ]
+        rows = self._candidates(boxes, min_nights)
+        order = np.lexsort(
+            (self.places.fids[rows], -self.night_count[rows])
+        )
+        return self._results(rows[order])
+
+    def nearest(self, lat, lon, k=1, min_nights=0) -> pd.DataFrame:
+        """Returns the k places nearest to a point, nearest first.
+
+        The search radius starts at NEAREST_START_MI and grows until k
+        places are found, so only the places near the point are
+        measured.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            k (int): The number of places to return.
+            min_nights (int): Only return places with at least this
+                many nights.
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        radius_mi = NEAREST_START_MI
+        while True:
+            rows, distances = self._within(lat, lon, radius_mi, min_nights)
+            if len(rows) >= k or radius_mi >= MAX_DISTANCE_MI:
+                return self._results(rows[:k], distances[:k])
+            radius_mi = min(radius_mi * 4, MAX_DISTANCE_MI)
+
+    def within(self, lat, lon, radius_mi, min_nights=0) -> pd.DataFrame:
+        """Returns the places within a distance of a point, nearest
+        first.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            radius_mi (float): The distance in miles.
+            min_nights (int): Only return places with at least this
+                many nights.
+        """
+        if radius_mi < 0:
+            raise ValueError("radius_mi must not be negative")
+        return self._results(*self._within(lat, lon, radius_mi, min_nights))
+
+    def _bounding_boxes(self, lat, lon, radius_mi) -> list[tuple]:
+        """Returns one or two (min_lon, min_lat, max_lon, max_lat) boxes
+        containing every point within a distance of a point.
+        """
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Invalid point: {lat}, {lon}")
+        angle = min(radius_mi / BOUNDING_RADIUS_MI, np.pi)
+        dlat = np.degrees(angle)
+        min_lat = max(lat - dlat, -90)
+        max_lat = min(lat + dlat, 90)
+        if min_lat == -90 or max_lat == 90:
+            # The circle contains a pole, so it spans every longitude.
+            return [(-180, min_lat, 180, max_lat)]
+        dlon = np.degrees(np.arcsin(
+            min(np.sin(angle) / np.cos(np.radians(lat)), 1)
+        ))
+        if lon - dlon < -180:
+            return [
+                (-180, min_lat, lon + dlon, max_lat),
+                (lon - dlon + 360, min_lat, 180, max_lat),
+            ]
+        if lon + dlon > 180:
+            return [
+                (lon - dlon, min_lat, 180, max_lat),
+                (-180, min_lat, lon + dlon - 360, max_lat),
+            ]
+        return [(lon - dlon, min_lat, lon + dlon, max_lat)]
+
+    def _candidates(self, boxes, min_nights) -> np.ndarray:
+        """Returns the sorted rows of the places in any of the boxes
+        with at least min_nights nights.
+        """
+        indexes = np.unique(np.concatenate([
+            self._tree.query(shapely.box(*box)) for box in boxes
+        ]).astype('int64'))
+        rows = self._tree_rows[indexes]
+        return rows[self.night_count[rows] >= min_nights]
+
+    def _results(self, rows, distances=None) -> pd.DataFrame:
+        """Returns a DataFrame of results for rows of places."""
+        places = self.places
+        fids = places.fids[rows]
+        output = pd.DataFrame({self.fid_column: fids})
+        for column in self._columns:
+            output[column] = places.take(column, fids)
+        output['lat'] = places.lat[rows]
+        output['lon'] = places.lon[rows]
+        if distances is not None:
+            output['distance_mi'] = distances
+        output['night_count'] = self.night_count[rows]
+        output['first_morning'] = self.first_morning[rows] \
+            .astype('datetime64[ns]')
+        output['last_morning'] = self.last_morning[rows] \
+            .astype('datetime64[ns]')
+        return output
+
+    def _within(self, lat, lon, radius_mi, min_nights) -> tuple:
+        """Returns the rows of the places within a distance of a point,
+        and their distances in miles, nearest first.
+        """
+        rows = self._candidates(
+            self._bounding_boxes(lat, lon, radius_mi), min_nights
+        )
+        meters = self._geod.inv(
+            np.full(len(rows), lon, dtype=float),
+            np.full(len(rows), lat, dtype=float),
+            self.places.lon[rows],
+            self.places.lat[rows],
+        )[2]
+        distances = np.asarray(meters) / (1000 * KM_PER_MILE)
+        inside = distances <= radius_mi
+        rows = rows[inside]
+        distances = distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return rows[order], distances[order]
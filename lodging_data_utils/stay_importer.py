@@ -0,0 +1,349 @@
+"""Defines the StayImporter class for bulk importing stays from CSV or
+JSON records into the lodging GeoPackage.
+"""
+
+# Standard library imports
+import csv
+import json
+import math
+import sqlite3
+import struct
+import time
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+
+# Third-party imports
+import pandas as pd
+
+# First-party imports
+from .overlap_finder import OverlapFinder
+from .validator import Validator, failure_message
+
+BATCH_SIZE = 5000 # Records inserted per executemany call.
+MATCH_DISTANCE_KM = 1.0 # Maximum distance to match a location by name.
+SRS_ID = 4326
+STAY_COLUMNS = [
+    'check_in_date', 'nights', 'portfolio', 'brand', 'stay_location_fid',
+    'purpose', 'room', 'comments', 'absence_flags',
+]
+# Record fields used to find or create a stay location.
+LOCATION_FIELDS = [
+    'stay_location_fid', 'portfolio_code', 'location_name', 'lat', 'lon',
+    'location_type', 'city_fid', 'address',
+]
+
+class StayImporter:
+    """Imports stays into a lodging GeoPackage in one transaction.
+
+    Each record's stay location is resolved by stay_location_fid, by
+    portfolio and portfolio_code, or by location name within
+    MATCH_DISTANCE_KM of its coordinates; otherwise a new stay location
+    is created. Stays (and new locations) are inserted with executemany
+    in batches, and the validation rules are run against the staged rows
+    (and the rows that reference them) before committing, so an import
+    either succeeds as a whole or leaves the GeoPackage unchanged.
+    """
+
+    def __init__(self, lodging_path, batch_size=BATCH_SIZE):
+        """Initializes the StayImporter.
+
+        Args:
+            lodging_path (Path): The GeoPackage to import stays into.
+            batch_size (int): The number of records inserted at once.
+        """
+        self.lodging_path = Path(lodging_path)
+        self.batch_size = batch_size
+
+    def import_records(self, records, dry_run=False) -> dict:
+        """Imports stay records.
+
+        Args:
+            records (iterable[dict]): Stay records, as yielded by
+                read_records(), with the STAY_COLUMNS (or check_out_date
+                instead of nights) and LOCATION_FIELDS keys. Missing or
+                empty values are null.
+            dry_run (bool): If True, stage and validate the records, then
+                roll back.
+
+        Returns:
+            dict: A summary with stays, locations_matched,
+            locations_created, and seconds keys.
+
+        Raises:
+            ValueError: If a record is invalid, or the staged rows fail
+                a validation rule or overlap another stay. Nothing is
+                written.
+        """
+        if not self.lodging_path.exists():
+            raise ValueError(f"GeoPackage not found: {self.lodging_path}")
+        start = time.perf_counter()
+        conn = _connect(self.lodging_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            first_fids = {
+                table: conn.execute(
+                    f"SELECT coalesce(max(fid), 0) + 1 FROM {table}"
+                ).fetchone()[0]
+                for table in ['stays', 'stay_locations']
+            }
+            locations = _LocationMatcher(conn)
+            stays = 0
+            batch = []
+            for line, record in enumerate(records, start=1):
+                try:
+                    batch.append(self._stay_row(record, locations))
+                except ValueError as e:
+                    raise ValueError(f"Record {line}: {e}") from e
+                if len(batch) >= self.batch_size:
+                    stays += self._insert_stays(conn, batch)
+                    batch = []
+            stays += self._insert_stays(conn, batch)
+
+            self._check(conn, first_fids)
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return {
+            'stays': stays,
+            'locations_matched': locations.matched,
+            'locations_created': locations.created,
+            'seconds': time.perf_counter() - start,
+        }
+
+    def _check(self, conn, first_fids) -> None:
+        """Runs the validation rules and the overlap check against the
+        staged stays and stay locations.
+
+        Raises:
+            ValueError: If any rule fails, or a staged stay overlaps
+                another stay.
+        """
+        conn.execute(
+            "CREATE TEMP TABLE staged_rows (table_name TEXT, fid INTEGER)"
+        )
+        for table, first_fid in first_fids.items():
+            conn.execute(
+                f"INSERT INTO staged_rows SELECT '{table}', fid FROM {table} "
+                "WHERE fid >= ?", (first_fid,)
+            )
+        results = Validator(self.lodging_path).check_rows(conn, 'staged_rows')
+        if any(result['status'] == 'failed' for result in results):
+            raise ValueError(failure_message(results))
+
+        # Check the staged stays against every stay in their date range.
+        first, last = conn.execute("""
+            SELECT min(check_in_date), max(date(check_in_date, '+' || nights
+            || ' days')) FROM stays WHERE fid >= ?
+        """, (first_fids['stays'],)).fetchone()
+        if first is None:
+            return
+        stays = pd.read_sql_query("""
+            SELECT fid AS stay_fid, check_in_date, nights, absence_flags
+            FROM stays
+            WHERE check_in_date <= ?
+            AND date(check_in_date, '+' || nights || ' days') >= ?
+        """, conn, params=[last, first], parse_dates=['check_in_date'])
+        overlaps = OverlapFinder(stays).overlaps()
+        staged = (overlaps['stay_fid'] >= first_fids['stays']) | (
+            overlaps['other_stay_fid'] >= first_fids['stays']
+        )
+        if staged.any():
+            raise ValueError(
+                "Imported stays overlap other stays (set absence_flags to "
+                "resolve them):\n"
+                f"{overlaps[staged].to_string(index=False)}"
+            )
+
+    def _insert_stays(self, conn, rows) -> int:
+        """Inserts a batch of stay rows and returns the number inserted.
+        """
+        conn.executemany(
+            f"INSERT INTO stays ({', '.join(STAY_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(STAY_COLUMNS))})",
+            rows,
+        )
+        return len(rows)
+
+    def _stay_row(self, record, locations) -> tuple:
+        """Returns the stays row for a record, resolving (or creating)
+        its stay location.
+        """
+        record = {
+            key: None if value is None or value == "" else value
+            for key, value in record.items()
+        }
+        if record.get('check_in_date') is None:
+            raise ValueError("Missing check_in_date")
+        check_in = date.fromisoformat(str(record['check_in_date'])[:10])
+        if record.get('nights') is not None:
+            nights = int(record['nights'])
+        elif record.get('check_out_date') is not None:
+            check_out = date.fromisoformat(
+                str(record['check_out_date'])[:10]
+            )
+            nights = (check_out - check_in).days
+        else:
+            raise ValueError("Missing nights or check_out_date")
+        record['check_in_date'] = check_in.isoformat()
+        record['nights'] = nights
+        record['stay_location_fid'] = locations.resolve(record)
+        return tuple(record.get(column) for column in STAY_COLUMNS)
+
+class _LocationMatcher:
+    """Finds or creates the stay location of each record."""
+
+    def __init__(self, conn):
+        """Loads the existing stay locations from a connection."""
+        self.conn = conn
+        self.matched = 0
+        self.created = 0
+        self._fids = set()
+        self._by_code = {}
+        self._by_name = defaultdict(list)
+        for fid, name, portfolio, code, geom in conn.execute(
+            "SELECT fid, name, portfolio, portfolio_code, geom "
+            "FROM stay_locations"
+        ):
+            self._add(fid, name, portfolio, code, _point_coords(geom))
+
+    def resolve(self, record) -> int:
+        """Returns the fid of a record's stay location, creating it if
+        no existing location matches.
+        """
+        fid = record.get('stay_location_fid')
+        if fid is not None:
+            if int(fid) not in self._fids:
+                raise ValueError(f"Unknown stay_location_fid: {fid}")
+            self.matched += 1
+            return int(fid)
+
+        code = record.get('portfolio_code')
+        key = (record.get('portfolio'), code)
+        if code is not None and key in self._by_code:
+            self.matched += 1
+            return self._by_code[key]
+
+        name = record.get('location_name')
+        if name is None or record.get('lat') is None \
+            or record.get('lon') is None:
+            raise ValueError(
+                "Stay location not found; provide stay_location_fid, "
+                "portfolio_code, or location_name, lat, and lon"
+            )
+        lat, lon = float(record['lat']), float(record['lon'])
+        for fid, coords in self._by_name[name]:
+            if coords is not None and _distance_km(
+                (lon, lat), coords
+            ) <= MATCH_DISTANCE_KM:
+                self.matched += 1
+                return fid
+
+        cursor = self.conn.execute("""
+            INSERT INTO stay_locations (geom, name, type, city_fid, address,
+            is_approximate, brand, portfolio, portfolio_code)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+        """, (
+            _gpkg_point(lon, lat), name, record.get('location_type'),
+            record.get('city_fid'), record.get('address'),
+            record.get('brand'), record.get('portfolio'), code,
+        ))
+        self.created += 1
+        self._add(
+            cursor.lastrowid, name, record.get('portfolio'), code,
+            (lon, lat),
+        )
+        return cursor.lastrowid
+
+    def _add(self, fid, name, portfolio, code, coords) -> None:
+        """Adds a stay location to the lookups."""
+        self._fids.add(fid)
+        if code is not None:
+            self._by_code.setdefault((portfolio, code), fid)
+        if name is not None:
+            self._by_name[name].append((fid, coords))
+
+def read_records(path):
+    """Yields stay records from a CSV, JSON (an array of objects), or
+    JSON Lines (.jsonl) file.
+
+    Args:
+        path (Path): The file to read.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    with open(path, encoding='utf-8', newline='') as f:
+        if suffix == '.csv':
+            yield from csv.DictReader(f)
+        elif suffix == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif suffix == '.json':
+            yield from json.load(f)
+        else:
+            raise ValueError(f"Unsupported file type: {path.suffix}")
+
+def _connect(path) -> sqlite3.Connection:
+    """Returns a connection to a GeoPackage with the spatial functions
+    used by its R-tree triggers registered.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.create_function('ST_IsEmpty', 1, lambda geom: int(
+        _point_coords(geom) is None
+    ))
+    for i, name in enumerate(['ST_MinX', 'ST_MaxX', 'ST_MinY', 'ST_MaxY']):
+        conn.create_function(
+            name, 1, lambda geom, i=i: _coord(geom, i // 2)
+        )
+    return conn
+
+def _coord(geom, axis) -> float | None:
+    """Returns the x (axis 0) or y (axis 1) coordinate of a point
+    geometry, or None if it is empty.
+    """
+    coords = _point_coords(geom)
+    return None if coords is None else coords[axis]
+
+def _distance_km(a, b) -> float:
+    """Returns the great circle distance between two (lon, lat) points
+    in kilometers.
+    """
+    lon1, lat1, lon2, lat2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) \
+        * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+def _gpkg_point(lon, lat) -> bytes:
+    """Returns a GeoPackage binary point geometry with an envelope."""
+    # Header: magic, version 0, flags (little endian, XY envelope), SRS.
+    header = b"GP" + bytes([0, 0b00000011]) + struct.pack('<i', SRS_ID)
+    envelope = struct.pack('<4d', lon, lon, lat, lat)
+    wkb = struct.pack('<BIdd', 1, 1, lon, lat)
+    return header + envelope + wkb
+
+def _point_coords(geom) -> tuple[float, float] | None:
+    """Returns the (lon, lat) of a GeoPackage binary point (or the first
+    point of a multipoint), or None if it is null or empty.
+    """
+    if geom is None or geom[:2] != b"GP" or geom[3] & 0b00010000:
+        return None
+    envelope_size = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}[(geom[3] >> 1) & 7]
+    offset = 8 + envelope_size
+    order = '<' if geom[offset] == 1 else '>'
+    geometry_type = struct.unpack_from(f'{order}I', geom, offset + 1)[0]
+    if geometry_type % 1000 == 4: # Multipoint: skip to its first point.
+        if struct.unpack_from(f'{order}I', geom, offset + 5)[0] == 0:
+            return None
+        offset += 9
+        order = '<' if geom[offset] == 1 else '>'
+    lon, lat = struct.unpack_from(f'{order}2d', geom, offset + 5)
+    if math.isnan(lon) or math.isnan(lat):
+        return None
+    return lon, lat
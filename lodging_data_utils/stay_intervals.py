@@ -0,0 +1,229 @@
+"""Defines the StayIntervals class for counting nights directly from
+stay intervals.
+"""
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+# First-party imports
+from .compact_mornings import day_ordinal
+
+class StayIntervals:
+    """Counts present nights from stay intervals without expanding the
+    log to one row per morning.
+
+    Each stay is represented by the day ordinals (days since 1970-01-01)
+    of its first and last mornings. Absence flags are stored as a single
+    prefix sum of presence over all flagged nights, so the present
+    nights of any stay within any window can be found in constant time,
+    and totals over the whole log in O(stays).
+
+    Stays must not overlap (as required by the data structure), or
+    overlapping nights will be counted more than once. Use verify() to
+    check results against LodgingLog.mornings().
+    """
+
+    def __init__(self, stays):
+        """Initializes the StayIntervals.
+
+        Args:
+            stays (DataFrame): A DataFrame of stays, as returned by
+                LodgingLog.stays().
+        """
+        self.stays = stays.reset_index(drop=True)
+        check_in = self.stays['check_in_date'].to_numpy(
+            dtype='datetime64[D]'
+        ).astype('int64')
+        nights = self.stays['nights'].to_numpy(dtype='int64')
+        self.first_morning = check_in + 1
+        self.last_morning = check_in + nights
+
+        # Store presence prefix sums for stays with absence flags. Each
+        # flagged stay has an offset into the concatenated flags, and
+        # stays without flags have an offset of -1.
+        flags = self.stays['absence_flags']
+        has_flags = flags.notna().to_numpy()
+        flag_strings = flags[has_flags].astype(str).tolist()
+        lengths = np.array([len(f) for f in flag_strings], dtype='int64')
+        self._flag_offsets = np.full(len(self.stays), -1, dtype='int64')
+        self._flag_offsets[has_flags] = np.cumsum(lengths) - lengths
+        presence = np.frombuffer(
+            ''.join(flag_strings).encode('ascii'), dtype=np.uint8
+        ) == ord('P')
+        self._presence_sums = np.concatenate([[0], np.cumsum(presence)])
+
+    def __len__(self):
+        """Returns the number of stays."""
+        return len(self.stays)
+
+    def present_nights(self, start_morning=None, thru_morning=None):
+        """Returns an array of the number of present nights of each stay
+        with mornings in the window.
+
+        Args:
+            start_morning (date): The earliest morning to count.
+            thru_morning (date): The latest morning to count.
+        """
+        lo = self.first_morning
+        hi = self.last_morning
+        if start_morning is not None:
+            lo = np.maximum(lo, day_ordinal(start_morning))
+        if thru_morning is not None:
+            hi = np.minimum(hi, day_ordinal(thru_morning))
+        return self._present_nights(np.arange(len(self.stays)), lo, hi)
+
+    def nights(self,
+        start_morning=None,
+        thru_morning=None,
+        by=None,
+    ):
+        """Returns the number of present nights in a window.
+
+        Args:
+            start_morning (date): The earliest morning to count.
+            thru_morning (date): The latest morning to count.
+            by (str or list[str]): Stay columns (such as `purpose` or
+                `type`) to group the counts by. Stays with null values
+                are counted under a null key, as in nights_by_year().
+
+        Returns:
+            int if by is None, otherwise a Series of night counts
+            indexed by the by columns.
+        """
+        counts = self.present_nights(start_morning, thru_morning)
+        if by is None:
+            return int(counts.sum())
+        grouped = pd.Series(counts, index=self.stays.index).groupby(
+            [self.stays[col] for col in _as_list(by)], dropna=False
+        ).sum()
+        return grouped[grouped > 0].rename('night_count')
+
+    def nights_by_year(self,
+        start_morning=None,
+        thru_morning=None,
+        by=None,
+    ) -> pd.DataFrame:
+        """Returns a DataFrame of present nights for each year.
+
+        Stays with mornings in more than one year are split at year
+        boundaries, so the work is proportional to the number of stays
+        plus the number of year boundaries they cross.
+
+        Args:
+            start_morning (date): The earliest morning to count.
+            thru_morning (date): The latest morning to count.
+            by (str or list[str]): Stay columns to group the counts by.
+
+        Returns:
+            DataFrame: A DataFrame with year, by, and night_count
+            columns.
+        """
+        by = _as_list(by)
+        lo = self.first_morning
+        hi = self.last_morning
+        if start_morning is not None:
+            lo = np.maximum(lo, day_ordinal(start_morning))
+        if thru_morning is not None:
+            hi = np.minimum(hi, day_ordinal(thru_morning))
+        in_window = np.flatnonzero(lo <= hi)
+        lo = lo[in_window]
+        hi = hi[in_window]
+
+        # Repeat each stay once for each year its window touches, and
+        # clip each repeat to its year.
+        first_year = lo.astype('datetime64[D]').astype('datetime64[Y]') \
+            .astype('int64')
+        last_year = hi.astype('datetime64[D]').astype('datetime64[Y]') \
+            .astype('int64')
+        spans = last_year - first_year + 1
+        stay_idx = np.repeat(in_window, spans)
+        years = np.repeat(first_year, spans) + (
+            np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+        )
+        year_start = years.astype('datetime64[Y]').astype('datetime64[D]') \
+            .astype('int64')
+        year_end = (years + 1).astype('datetime64[Y]') \
+            .astype('datetime64[D]').astype('int64') - 1
+        piece_lo = np.maximum(np.repeat(lo, spans), year_start)
+        piece_hi = np.minimum(np.repeat(hi, spans), year_end)
+        counts = self._present_nights(stay_idx, piece_lo, piece_hi)
+
+        output = pd.DataFrame({'year': years + 1970})
+        for col in by:
+            output[col] = self.stays[col].to_numpy()[stay_idx]
+        output['night_count'] = counts
+        output = output.groupby(['year'] + by, dropna=False, sort=True) \
+            .sum().reset_index()
+        return output[output['night_count'] > 0].reset_index(drop=True)
+
+    def verify(self, mornings) -> bool:
+        """Checks interval counts against a mornings DataFrame.
+
+        Args:
+            mornings (DataFrame): A DataFrame of mornings for the same
+                stays, as returned by LodgingLog.mornings().
+
+        Raises:
+            ValueError: If the present nights of any stay or the total
+                nights of any year differ.
+        """
+        # Compare present nights for each stay.
+        expected = mornings.groupby('stay_fid').size()
+        actual = pd.Series(
+            self.present_nights(), index=self.stays['stay_fid']
+        )
+        actual = actual[actual > 0]
+        stay_diffs = pd.concat(
+            [expected.rename('mornings'), actual.rename('intervals')],
+            axis=1,
+        ).fillna(0)
+        stay_diffs = stay_diffs[
+            stay_diffs['mornings'] != stay_diffs['intervals']
+        ]
+        if not stay_diffs.empty:
+            raise ValueError(
+                "Stay interval night counts differ from mornings:\n"
+                f"{stay_diffs.to_string()}"
+            )
+
+        # Compare total nights for each year.
+        expected = mornings.groupby(mornings.index.year).size()
+        actual = self.nights_by_year().set_index('year')['night_count']
+        year_diffs = pd.concat(
+            [expected.rename('mornings'), actual.rename('intervals')],
+            axis=1,
+        ).fillna(0)
+        year_diffs = year_diffs[
+            year_diffs['mornings'] != year_diffs['intervals']
+        ]
+        if not year_diffs.empty:
+            raise ValueError(
+                "Stay interval annual night counts differ from mornings:\n"
+                f"{year_diffs.to_string()}"
+            )
+        return True
+
+    def _present_nights(self, stay_idx, lo, hi) -> np.ndarray:
+        """Returns the number of present nights for each stay index
+        between the lo and hi day ordinals (inclusive).
+        """
+        counts = np.maximum(hi - lo + 1, 0)
+        offsets = self._flag_offsets[stay_idx]
+        flagged = (offsets >= 0) & (counts > 0)
+        if flagged.any():
+            first = self.first_morning[stay_idx][flagged]
+            start = offsets[flagged] + lo[flagged] - first
+            end = offsets[flagged] + hi[flagged] - first + 1
+            counts[flagged] = (
+                self._presence_sums[end] - self._presence_sums[start]
+            )
+        return counts
+
+def _as_list(by) -> list:
+    """Returns a list of column names from a column name or list."""
+    if by is None:
+        return []
+    if isinstance(by, str):
+        return [by]
+    return list(by)
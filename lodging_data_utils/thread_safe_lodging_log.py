@@ -0,0 +1,85 @@
+"""Defines the ThreadSafeLodgingLog class, a CachedLodgingLog for sharing
+between the threads of a threaded server.
+"""
+
+# Standard library imports
+import sqlite3
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+
+# First-party imports
+from .cached_lodging_log import CachedLodgingLog
+
+class ThreadSafeLodgingLog(CachedLodgingLog):
+    """A CachedLodgingLog whose methods can be called from many threads
+    at once.
+
+    - Each thread reads the GeoPackage through its own read-only SQLite
+      connection, which is opened on the thread's first query and
+      reused, since SQLite connections must not be shared between
+      threads.
+    - As in CachedLodgingLog, each result is built once, under a lock
+      for its key.
+    - Cached DataFrames are returned as shallow copies, which pandas'
+      copy-on-write makes read-only views: a caller can add or change
+      columns of its copy without copying the data up front, and without
+      affecting the cache or other threads.
+    - places is a read-only mapping, replaced as a whole when refresh()
+      reloads places. Its PlaceTables are shared by every thread, and
+      must not be modified in place.
+
+    Derived indexes (such as the NightCounter returned by
+    night_counter()) are shared objects, which are safe to query from
+    many threads.
+    """
+
+    def __init__(self, lodging_path=None):
+        """Initializes the ThreadSafeLodgingLog.
+
+        Args:
+            lodging_path (Path): The lodging GeoPackage. Defaults to the
+                lodging_gpkg data source in config/data_sources.toml.
+        """
+        self._local = threading.local()
+        self._generation = 0
+        super().__init__(lodging_path)
+
+    @property
+    def places(self) -> MappingProxyType:
+        """A read-only mapping of layer names to PlaceTables."""
+        return self._places
+
+    @places.setter
+    def places(self, layers):
+        self._places = MappingProxyType(dict(layers))
+
+    def refresh(self, changes, mornings_range=None) -> None:
+        """Updates the cached results after the GeoPackage changes, as
+        CachedLodgingLog.refresh() does, and has each thread reopen its
+        connection before its next query.
+        """
+        with self._lock:
+            super().refresh(changes, mornings_range)
+            self._generation += 1
+
+    @contextmanager
+    def _connection(self):
+        """Returns a context manager for this thread's read-only SQLite
+        connection to the GeoPackage, opening it if needed. The
+        connection stays open on exit.
+        """
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            if getattr(local, 'conn', None) is not None:
+                local.conn.close()
+            local.conn = sqlite3.connect(
+                f"{self.lodging_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+            )
+            local.generation = self._generation
+        yield local.conn
+
+    def _copy(self, frame):
+        """Returns a copy-on-write view of a cached DataFrame."""
+        return frame.copy(deep=False)
@@ -0,0 +1,365 @@
+"""Defines the Validator class for checking a lodging GeoPackage against
+the rules in config/validations.toml, and optional change tracking so
+that only rows changed since the last passing validation are checked.
+"""
+
+# Standard library imports
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+# Third-party imports
+import tomllib
+import pandas as pd
+
+VALIDATIONS_PATH = (
+    Path(__file__).parent.parent / "config" / "validations.toml"
+)
+
+CHANGES_TABLE = 'validation_changes'
+_CREATE_CHANGES_TABLE = f"""
+CREATE TABLE {CHANGES_TABLE} (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    table_name TEXT NOT NULL,
+    fid INTEGER NOT NULL,
+    UNIQUE (table_name, fid)
+)
+"""
+
+# The foreign key columns of each validated table, and the tables they
+# reference. A change to a referenced row can make its referencing rows
+# invalid, so those rows are checked too.
+REFERENCES = {
+    'stays': [('stay_location_fid', 'stay_locations')],
+    'homes': [('stay_location_fid', 'stay_locations')],
+    'stay_locations': [('city_fid', 'cities')],
+    'cities': [('metro_fid', 'metros'), ('region_fid', 'regions')],
+    'metros': [],
+    'regions': [('parent_region_fid', 'regions')],
+}
+
+# Logs the fids of changed rows to the changes table. Replacing an
+# existing entry gives it a new seq, so a row changed again during a
+# validation is still checked by the next one.
+_LOG_CHANGE = """
+INSERT OR REPLACE INTO validation_changes (table_name, fid)
+SELECT '{table}', value FROM ({values}) WHERE value IS NOT NULL;
+"""
+_EVENT_ROWS = {'insert': ['NEW'], 'update': ['OLD', 'NEW'], 'delete': ['OLD']}
+# A region's parent gains or loses a child when the region changes,
+# which affects the cities assigned to the parent, so the parent is
+# logged as changed too.
+_LOGGED_COLUMNS = {table: ['fid'] for table in REFERENCES} | {
+    'regions': ['fid', 'parent_region_fid'],
+}
+
+# Trigger names, events, and bodies.
+TRIGGERS = {
+    f"{CHANGES_TABLE}_{table}_{event}": (
+        f"AFTER {event.upper()} ON {table}",
+        _LOG_CHANGE.format(table=table, values=" UNION ".join(
+            f"SELECT {row}.{column} AS value"
+            for row in rows for column in columns
+        )),
+    )
+    for table, columns in _LOGGED_COLUMNS.items()
+    for event, rows in _EVENT_ROWS.items()
+}
+
+class Validator:
+    """Runs validation rules concurrently, each on its own read-only
+    connection, and collects every violation with each rule's run time.
+
+    If change tracking is enabled on the GeoPackage, each rule is only
+    run against the rows changed since the last passing validation and
+    the rows that reference them, so the cost of a validation grows with
+    the size of the edit rather than the size of the log.
+    """
+
+    def __init__(self, lodging_path, validations_path=VALIDATIONS_PATH):
+        """Initializes the Validator.
+
+        Args:
+            lodging_path (Path): The GeoPackage to validate.
+            validations_path (Path): The TOML file of rules, each with a
+                table, an error message, and a query returning the rows
+                that violate the rule.
+        """
+        self.lodging_path = Path(lodging_path)
+        with open(validations_path, 'rb') as vf:
+            self.validations = tomllib.load(vf)['validations']
+
+    def check_rows(self, conn, changes) -> list[dict]:
+        """Runs every rule on an open connection, limited to the rows
+        listed in a changes table and the rows that reference them.
+
+        This checks uncommitted changes, which are only visible to the
+        connection that made them, so the rules run one at a time.
+
+        Args:
+            conn (sqlite3.Connection): A connection to the GeoPackage.
+            changes (str): The name of a table (such as a temporary
+                table) with table_name and fid columns, listing the rows
+                to check.
+
+        Returns:
+            list[dict]: A list of results, as returned by run().
+        """
+        results = []
+        for validation in self.validations:
+            start = time.perf_counter()
+            violations = pd.read_sql_query(
+                self._changed_rows_query(validation, changes), conn,
+                dtype={'fid': 'int64'},
+            )
+            results.append({
+                'table': validation['table'],
+                'error': validation['error'],
+                'status': 'passed' if violations.empty else 'failed',
+                'seconds': time.perf_counter() - start,
+                'violations': violations,
+            })
+        return results
+
+    def pending_changes(self) -> int | None:
+        """Returns the number of rows logged as changed since the last
+        passing validation, or None if change tracking is not enabled.
+        """
+        conn = self._connect()
+        try:
+            if not has_change_tracking(conn):
+                return None
+            return conn.execute(
+                f"SELECT count(*) FROM {CHANGES_TABLE}"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def run(self,
+        fail_fast=False, jobs=None, full=False, clear=False
+    ) -> list[dict]:
+        """Runs every rule and returns the results.
+
+        If change tracking is enabled, only changed rows and the rows
+        that reference them are checked (unless full is True). The
+        GeoPackage is only read, unless clear is True.
+
+        Args:
+            fail_fast (bool): If True, stop at the first failed rule.
+                Rules still running are interrupted, and rules not yet
+                started are skipped.
+            jobs (int): The number of rules to run at once. Defaults to
+                the number of rules.
+            full (bool): If True, check every row even if change
+                tracking is enabled.
+            clear (bool): If True, clear the logged changes once every
+                rule passes, so later validations skip them. This writes
+                to the GeoPackage.
+
+        Returns:
+            list[dict]: A list of dicts, in the order of the rules, with
+            table, error, status ('passed', 'failed', or 'skipped'),
+            seconds, and violations (a DataFrame of the rows returned by
+            the rule's query, or None if skipped) keys.
+        """
+        if not self.lodging_path.exists():
+            raise ValueError(f"GeoPackage not found: {self.lodging_path}")
+        conn = self._connect()
+        try:
+            seq = None
+            if has_change_tracking(conn):
+                # Changes logged after this point are left for the next
+                # validation.
+                seq = conn.execute(
+                    f"SELECT coalesce(max(seq), 0) FROM {CHANGES_TABLE}"
+                ).fetchone()[0]
+        finally:
+            conn.close()
+        stop = threading.Event()
+        connections = set()
+        lock = threading.Lock()
+
+        def check(validation):
+            """Runs one rule and returns its result."""
+            result = {
+                'table': validation['table'],
+                'error': validation['error'],
+                'status': 'skipped',
+                'seconds': 0.0,
+                'violations': None,
+            }
+            if stop.is_set():
+                return result
+            query, params = validation['query'], None
+            if seq is not None and not full:
+                query = self._changed_rows_query(validation,
+                    f"(SELECT table_name, fid FROM {CHANGES_TABLE} "
+                    "WHERE seq <= :seq)"
+                )
+                params = {'seq': seq}
+            conn = self._connect()
+            with lock:
+                connections.add(conn)
+            start = time.perf_counter()
+            try:
+                violations = pd.read_sql_query(query, conn,
+                    params=params,
+                    dtype={'fid': 'int64'},
+                )
+            except (sqlite3.OperationalError, pd.errors.DatabaseError):
+                if not stop.is_set():
+                    raise
+                return result
+            finally:
+                with lock:
+                    connections.discard(conn)
+                conn.close()
+            result['seconds'] = time.perf_counter() - start
+            result['violations'] = violations
+            result['status'] = 'passed' if violations.empty else 'failed'
+            return result
+
+        jobs = jobs or len(self.validations) or 1
+        results = [None] * len(self.validations)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(check, validation): i
+                for i, validation in enumerate(self.validations)
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if fail_fast and result['status'] == 'failed':
+                    stop.set()
+                    with lock:
+                        for conn in connections:
+                            conn.interrupt()
+        if clear and seq and all(
+            result['status'] == 'passed' for result in results
+        ):
+            self._clear_changes(seq)
+        return results
+
+    def _changed_rows_query(self, validation, changes) -> str:
+        """Returns a rule's query limited to the rows of its table listed
+        in a changes table or subquery (with table_name and fid columns),
+        or that reference a listed row. Rules on tables that are not
+        tracked are not limited.
+        """
+        table = validation['table']
+        if table not in REFERENCES:
+            return validation['query']
+        changed = f"SELECT fid FROM {changes} WHERE table_name = '{{table}}'"
+        fids = [changed.format(table=table)] + [
+            f"SELECT fid FROM {table} WHERE {column} IN ("
+            f"{changed.format(table=referenced)})"
+            for column, referenced in REFERENCES[table]
+        ]
+        query = validation['query'].strip().rstrip(';')
+        return (
+            f"SELECT * FROM ({query}) "
+            f"WHERE fid IN ({' UNION '.join(fids)})"
+        )
+
+    def _clear_changes(self, seq) -> None:
+        """Removes logged changes up to a seq, after they have passed
+        validation. If the GeoPackage cannot be written, the changes are
+        left to be checked again.
+        """
+        conn = sqlite3.connect(self.lodging_path)
+        try:
+            with conn:
+                conn.execute(
+                    f"DELETE FROM {CHANGES_TABLE} WHERE seq <= ?", (seq,)
+                )
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns a read-only connection to the GeoPackage."""
+        return sqlite3.connect(
+            f"{self.lodging_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+
+def disable_change_tracking(lodging_path) -> None:
+    """Removes the validation_changes table and its triggers, so every
+    validation checks every row.
+
+    Args:
+        lodging_path (Path): The GeoPackage to modify.
+    """
+    conn = sqlite3.connect(lodging_path)
+    try:
+        with conn:
+            _drop_change_tracking(conn)
+    finally:
+        conn.close()
+
+def enable_change_tracking(lodging_path) -> None:
+    """Creates (or recreates) the validation_changes table and the
+    triggers that log the fids of inserted, updated, and deleted rows to
+    it.
+
+    Since rows that are not logged are assumed to be valid, this should
+    only be enabled after a full validation passes. The foreign key
+    columns in REFERENCES are indexed (with the same names as
+    GeoPackageOptimizer uses), so finding the rows that reference a
+    changed row does not scan their tables.
+
+    Args:
+        lodging_path (Path): The GeoPackage to modify.
+    """
+    conn = sqlite3.connect(lodging_path)
+    try:
+        with conn:
+            _drop_change_tracking(conn)
+            conn.execute(_CREATE_CHANGES_TABLE)
+            for table, references in REFERENCES.items():
+                for column, _ in references:
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} "
+                        f"ON {table} ({column})"
+                    )
+            for name, (event, body) in TRIGGERS.items():
+                conn.execute(
+                    f"CREATE TRIGGER {name} {event} BEGIN {body} END"
+                )
+    finally:
+        conn.close()
+
+def failure_message(results) -> str:
+    """Returns a message describing every failed rule in a list of
+    results from Validator.run().
+    """
+    return "\n\n".join(
+        f"Invalid data found in table '{result['table']}' "
+        f"({result['error']}):\n"
+        f"{result['violations'].to_string(index=False)}"
+        for result in results if result['status'] == 'failed'
+    )
+
+def has_change_tracking(conn) -> bool:
+    """Returns True if the validation_changes table and all of its
+    triggers exist.
+
+    Args:
+        conn (sqlite3.Connection): A connection to the GeoPackage.
+    """
+    names = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        )
+    }
+    return {CHANGES_TABLE, *TRIGGERS} <= names
+
+def _drop_change_tracking(conn) -> None:
+    """Drops the validation_changes table and triggers, if they exist."""
+    for name in TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(f"DROP TABLE IF EXISTS {CHANGES_TABLE}")
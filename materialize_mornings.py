@@ -0,0 +1,87 @@
+"""
+Creates, checks, or removes a stay_mornings table inside the lodging
+GeoPackage, with a row for each morning away from home. SQLite triggers
+keep the table consistent as stays are edited, and LodgingLog reads
+mornings from it when it is present.
+"""
+
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+from lodging_data_utils.materialized_mornings import (
+    TABLE, check_stay_mornings, create_stay_mornings, drop_stay_mornings
+)
+
+@profiling.profiled
+def materialize_mornings(action, log=None) -> bool:
+    """Creates, checks, or removes the stay_mornings table.
+
+    Args:
+        action (str): 'create' (which recreates the table if it exists),
+            'check', or 'drop'.
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+
+    Returns:
+        bool: False if the check found differences, otherwise True.
+    """
+    log = LodgingLog() if log is None else log
+    if action == 'create':
+        count = create_stay_mornings(log.lodging_path)
+        print(f"Created {TABLE} with {count} mornings in {log.lodging_path}")
+    elif action == 'drop':
+        drop_stay_mornings(log.lodging_path)
+        print(f"Removed {TABLE} from {log.lodging_path}")
+    elif action == 'check':
+        differences = check_stay_mornings(log.lodging_path)
+        if not differences.empty:
+            print(
+                f"{TABLE} differs from the stays table "
+                "(run create to rebuild it):\n"
+                f"{differences.to_string(index=False)}"
+            )
+            return False
+        print(f"{TABLE} is consistent with the stays table.")
+    else:
+        raise ValueError(f"Invalid action: {action}")
+    return True
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    parser = argparse.ArgumentParser(
+        description="Manage a materialized mornings table in the GeoPackage."
+    )
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    subparsers.add_parser('create',
+        help="create (or rebuild) the table and its triggers",
+    )
+    subparsers.add_parser('check',
+        help="compare the table to the stays table",
+    )
+    subparsers.add_parser('drop',
+        help="remove the table and its triggers",
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    if args.lodging_path is not None:
+        log = LodgingLog(args.lodging_path)
+    if not materialize_mornings(args.action, log=log):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,84 @@
 """Shows dates for stay milestones."""
-from lodging_data_utils import LodgingLog
-
-MILESTONES = [50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000]
-TRANSIT = ['Flight']
-
-def milestones():
-    log = LodgingLog()
-    mornings = log.mornings()
-    mornings = mornings[~mornings['type'].isin(TRANSIT)]
-    print(f"Excludes: {TRANSIT}")
-    locations = log.geodata_cache['stay_locations']
-    mornings = mornings.join(
-        locations,
-        on='stay_location_fid',
-        rsuffix='_loc'
-    )
 
-    # Nights
-    nights = mornings.copy()
-    total_nights = len(nights)
-    nights['night_number'] = range(1, len(nights) + 1)
-    nights = nights[nights['night_number'].isin(MILESTONES)]
-    print("\nNIGHTS AWAY FROM HOME")
-    print(nights[['type', 'stay_location_fid', 'name', 'night_number']])
-    print(f"Total nights away from home: {total_nights}")
-
-    # Unique uniq_props
-    uniq_props = mornings.copy()
-    uniq_props = uniq_props.drop_duplicates(subset='stay_location_fid')
-    total_props = len(uniq_props)
-    uniq_props['property_number'] = range(1, len(uniq_props) + 1)
-    uniq_props = uniq_props[uniq_props['property_number'].isin(MILESTONES)]
-    print("\nUNIQUE LODGING PROPERTIES")
-    print(uniq_props[['type', 'stay_location_fid', 'name', 'property_number']])
-    print(f"Total unique lodging properties: {total_props}")
+# Third-party imports
+import argparse
+import pandas as pd
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+from lodging_data_utils.lodging_log import TRANSIT_TYPES
+from lodging_data_utils.milestone_finder import DIMENSIONS
+
+TITLES = {
+    'night': "NIGHTS AWAY FROM HOME",
+    'property': "UNIQUE LODGING PROPERTIES",
+    'city': "UNIQUE CITIES",
+    'metro': "UNIQUE METRO AREAS",
+    'region': "UNIQUE REGIONS",
+    'country': "UNIQUE COUNTRIES",
+    'brand': "UNIQUE BRANDS",
+    'portfolio': "UNIQUE PORTFOLIOS",
+}
+
+@profiling.profiled
+def milestones(by=None, window_days=365, log=None):
+    """Prints milestone dates and next milestone predictions."""
+    by = ['night', 'property'] if by is None else by
+    log = LodgingLog() if log is None else log
+    finder = log.milestone_finder(exclude_transit=True)
+    print(f"Excludes: {TRANSIT_TYPES}")
+
+    found = finder.find(by)
+    predictions = finder.predict(by, window_days=window_days)
+    predictions = predictions.set_index('dimension')
+    for dim in by:
+        print(f"\n{TITLES[dim]}")
+        dim_found = found[found['dimension'] == dim]
+        columns = ['milestone', 'morning', 'stay_fid']
+        if dim != 'night':
+            columns += ['key', 'name']
+        print(dim_found[columns].to_string(index=False))
+        prediction = predictions.loc[dim]
+        print(f"Total: {int(prediction['total'])}")
+        if pd.notna(prediction['next_milestone']):
+            predicted = prediction['predicted_morning']
+            if pd.isna(predicted):
+                predicted_str = "no recent activity to predict from"
+            else:
+                predicted_str = (
+                    f"predicted {predicted.date()} at the trailing "
+                    f"{window_days}-day rate"
+                )
+            print(
+                f"Next milestone: {int(prediction['next_milestone'])} "
+                f"({predicted_str})"
+            )
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    parser = argparse.ArgumentParser(
+        description="Show dates for stay milestones."
+    )
+    parser.add_argument('--by',
+        help="milestone dimensions to show",
+        choices=list(DIMENSIONS),
+        nargs='+',
+        default=['night', 'property'],
+    )
+    parser.add_argument('--window_days',
+        help="trailing window (in days) used to predict the next milestone",
+        type=int,
+        default=365,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    milestones(by=args.by, window_days=args.window_days, log=log)
 
 if __name__ == "__main__":
-    milestones()
\ No newline at end of file
+    main()
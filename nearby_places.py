@@ -0,0 +1,149 @@
+"""
+Lists the stay locations or cities near a point (within a distance, or
+the nearest few) or in a bounding box, with the nights spent at each.
+"""
+
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+from lodging_data_utils.distances import DECIMAL_PLACES
+from lodging_data_utils.spatial_index import LAYERS
+
+@profiling.profiled
+def nearby_places(
+    layer='stay_locations',
+    point=None,
+    radius_mi=None,
+    nearest=None,
+    bbox=None,
+    min_nights=1,
+    exclude_transit=False,
+    output_csv=None,
+    log=None,
+):
+    """Prints (or saves) the places near a point or in a bounding box.
+
+    Exactly one of radius_mi, nearest, and bbox must be provided.
+
+    Args:
+        layer (str): `stay_locations` or `cities`.
+        point (tuple[float, float]): The latitude and longitude to
+            search around, for radius_mi and nearest.
+        radius_mi (float): List the places within this many miles of
+            the point.
+        nearest (int): List this many places nearest to the point.
+        bbox (tuple[float, float, float, float]): List the places in a
+            box given as min_lat, min_lon, max_lat, max_lon. If max_lon
+            is less than min_lon, the box crosses the antimeridian.
+        min_nights (int): Only list places with at least this many
+            nights.
+        exclude_transit (bool): If True, nights in transit (flights)
+            are not counted.
+        output_csv (Path): If provided, write the places to this CSV
+            file instead of printing them.
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    queries = [q for q in [radius_mi, nearest, bbox] if q is not None]
+    if len(queries) != 1:
+        raise ValueError("Provide exactly one of radius_mi, nearest, or bbox")
+    if bbox is None and point is None:
+        raise ValueError("A point is required for radius_mi and nearest")
+    log = LodgingLog() if log is None else log
+    index = log.spatial_index(layer, exclude_transit=exclude_transit)
+    if radius_mi is not None:
+        places = index.within(*point, radius_mi, min_nights=min_nights)
+    elif nearest is not None:
+        places = index.nearest(*point, nearest, min_nights=min_nights)
+    else:
+        places = index.in_bbox(*bbox, min_nights=min_nights)
+    if 'distance_mi' in places.columns:
+        places['distance_mi'] = places['distance_mi'].round(DECIMAL_PLACES)
+    if output_csv is not None:
+        places.to_csv(output_csv, index=False)
+        print(f"Saved {len(places)} places to {output_csv}")
+    elif places.empty:
+        print("No places found.")
+    else:
+        print(places.to_string(index=False))
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    parser = argparse.ArgumentParser(
+        description="List the places near a point, with nights spent."
+    )
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument('--radius_mi',
+        help="list the places within this many miles of --point",
+        type=float,
+    )
+    query.add_argument('--nearest',
+        help="list this many places nearest to --point",
+        type=int,
+    )
+    query.add_argument('--bbox',
+        help="list the places in a bounding box",
+        type=float,
+        nargs=4,
+        metavar=('MIN_LAT', 'MIN_LON', 'MAX_LAT', 'MAX_LON'),
+    )
+    parser.add_argument('--point',
+        help="latitude and longitude to search around",
+        type=float,
+        nargs=2,
+        metavar=('LAT', 'LON'),
+    )
+    parser.add_argument('--layer',
+        help="places to list",
+        choices=list(LAYERS),
+        default='stay_locations',
+    )
+    parser.add_argument('--min_nights',
+        help="only list places with at least this many nights (default: "
+            "1; use 0 to include places never stayed at)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument('--exclude_transit',
+        help="do not count nights in transit (flights)",
+        action='store_true',
+    )
+    parser.add_argument('--output_csv',
+        help="CSV file to write the places to",
+        type=Path,
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    if args.bbox is None and args.point is None:
+        parser.error("--point is required with --radius_mi or --nearest")
+    profiling.enable_from_args(args)
+    if args.lodging_path is not None:
+        log = LodgingLog(args.lodging_path)
+    nearby_places(
+        layer=args.layer,
+        point=args.point,
+        radius_mi=args.radius_mi,
+        nearest=args.nearest,
+        bbox=args.bbox,
+        min_nights=args.min_nights,
+        exclude_transit=args.exclude_transit,
+        output_csv=args.output_csv,
+        log=log,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Creates a table of night counts bucketed by calendar period and split by
+any combination of stay attributes.
+"""
+
+# Standard library imports
+import datetime
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+from lodging_data_utils.night_counter import DIMENSIONS, PERIODS
+
+@profiling.profiled
+def night_counts(
+    output_file,
+    period='year',
+    by=None,
+    start_morning=None,
+    thru_morning=None,
+    exclude_transit=False,
+    fill=False,
+    log=None,
+):
+    """Create a CSV or Parquet file of night counts."""
+    log = LodgingLog() if log is None else log
+    counter = log.night_counter(exclude_transit=exclude_transit)
+    counts = counter.count(
+        period=None if period == 'all' else period,
+        by=by,
+        start_morning=start_morning,
+        thru_morning=thru_morning,
+        fill=fill,
+    )
+
+    output_file = Path(output_file)
+    if output_file.suffix.lower() == '.parquet':
+        counts.to_parquet(output_file, index=False)
+    else:
+        counts.to_csv(output_file, index=False)
+    print(f"Night counts saved to {output_file}")
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    parser = argparse.ArgumentParser(
+        description="Create a CSV or Parquet file of night counts."
+    )
+    parser.add_argument('output_file',
+        help="output file (.csv or .parquet)",
+        type=Path,
+    )
+    parser.add_argument('--period',
+        help="calendar period to bucket nights by",
+        choices=PERIODS + ['all'],
+        default='year',
+    )
+    parser.add_argument('--by',
+        help="stay attributes to split the counts by",
+        choices=DIMENSIONS,
+        nargs='*',
+        default=[],
+    )
+    parser.add_argument('--start_morning',
+        help="the earliest morning to count (inclusive) in YYYY-MM-DD format",
+        type=datetime.date.fromisoformat,
+    )
+    parser.add_argument('--thru_morning',
+        help="the latest morning to count (inclusive) in YYYY-MM-DD format",
+        type=datetime.date.fromisoformat,
+    )
+    parser.add_argument('--exclude_transit',
+        help="do not include nights on flights",
+        action='store_true',
+    )
+    parser.add_argument('--fill',
+        help="include periods and categories with no nights",
+        action='store_true',
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    night_counts(
+        args.output_file,
+        period=args.period,
+        by=args.by,
+        start_morning=args.start_morning,
+        thru_morning=args.thru_morning,
+        exclude_transit=args.exclude_transit,
+        fill=args.fill,
+        log=log,
+    )
+
+if __name__ == "__main__":
+    main()
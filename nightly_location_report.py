@@ -11,21 +11,24 @@ from tinyhtml import html, h
 import pandas as pd
 
 # First-party imports
-from lodging_data_utils import LodgingLog
+from lodging_data_utils import LodgingLog, profiling
 
-def nightly_location_report(output_html_path):
+@profiling.profiled
+def nightly_location_report(output_html_path, log=None):
     """Creates an HTML table of homes and stays by night."""
 
-    log = LodgingLog()
+    log = LodgingLog() if log is None else log
     homes = log.home_locations()
     stay_mornings = log.mornings()
 
     # Build locations table.
-    locations = log.geodata_cache['stay_locations']
-    cities = log.geodata_cache['cities'][['key']]
-    cities = cities.rename(columns={'key': "city_key"})
-    loc_data = locations.join(cities, on='city_fid', how='left')
-    loc_data = loc_data[['name', 'type', 'city_key']]
+    locations = log.places['stay_locations']
+    cities = log.places['cities']
+    loc_data = pd.DataFrame({
+        'name': locations.series('name'),
+        'type': locations.series('type'),
+        'city_key': locations.series('city_fid').map(cities.series('key')),
+    })
 
     # Calculate date range.
     min_home = homes['move_in_date'].min().date()
@@ -161,13 +164,18 @@ span.city {
         ),
     )
 
-    with open(output_html_path, 'w', encoding='utf-8') as file:
-        file.write(output.render())
+    with profiling.span("nightly_location_report.write"):
+        with open(output_html_path, 'w', encoding='utf-8') as file:
+            file.write(output.render())
     print(f"Saved HTML to {output_html_path}")
 
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
 
-
-if __name__ == "__main__":
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
     parser = argparse.ArgumentParser(
         description="Create an HTML table of homes and stays"
     )
@@ -175,5 +183,10 @@ if __name__ == "__main__":
         help="Output HTML file",
         type=Path,
     )
-    args = parser.parse_args()
-    nightly_location_report(args.output_html)
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    nightly_location_report(args.output_html, log=log)
+
+if __name__ == "__main__":
+    main()
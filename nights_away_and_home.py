@@ -14,7 +14,7 @@ from dateutil import rrule
 from lxml import etree as xml
 
 # First-party imports
-from lodging_data_utils import LodgingLog
+from lodging_data_utils import LodgingLog, profiling
 
 # Define classes.
 
@@ -26,9 +26,9 @@ class GroupedStayCollection:
         """
     END_DATE = date.today()
 
-    def __init__(self, start_evening=None, thru_morning=None):
+    def __init__(self, start_evening=None, thru_morning=None, log=None):
         """Initialize a GroupedStayCollection."""
-        self.log = LodgingLog()
+        self.log = LodgingLog() if log is None else log
 
         if start_evening is None:
             # Use the first morning in the log as the start date.
@@ -62,6 +62,7 @@ class GroupedStayCollection:
         else:
             raise ValueError("Type must be 'away' or 'home'.")
 
+    @profiling.profiled
     def _group_stays(self):
         """Groups consecutive away-from-home stays."""
 
@@ -238,7 +239,7 @@ class SVGChart:
             'text_offset': [5, 15] # [x, y] px
         }
     }
-    _STYLES_PATH = "styles/svg_chart.svg.css"
+    _STYLES_PATH = Path(__file__).parent / "styles" / "svg_chart.svg.css"
 
     def __init__(self, grouped_stay_collection):
         self.start_evening = grouped_stay_collection.start_evening
@@ -266,6 +267,7 @@ class SVGChart:
 
         self._g = {} # Holds SVG groups for chart elements.
 
+    @profiling.profiled
     def _calculate_chart_values(self):
         """Returns chart element dimensions and [x, y] coordinates."""
         params = self._PARAMS
@@ -805,6 +807,7 @@ class SVGChart:
         ]
         return inclusive_date_range[1:]
 
+    @profiling.profiled
     def export(self, output_path):
         """Generates an SVG chart based on the away/home row values."""
 
@@ -829,12 +832,14 @@ class SVGChart:
 
 # Main function to generate the nights away and home chart.
 
+@profiling.profiled
 def nights_away_and_home(
-    output_svg_file, output_stats_file, start_evening=None, thru_morning=None
+    output_svg_file, output_stats_file, start_evening=None, thru_morning=None,
+    log=None,
 ):
     """Main function to generate nights away and home chart."""
 
-    gsc = GroupedStayCollection(start_evening, thru_morning)
+    gsc = GroupedStayCollection(start_evening, thru_morning, log=log)
 
     svg = SVGChart(gsc)
     svg.export(output_svg_file)
@@ -852,7 +857,13 @@ def nights_away_and_home(
                 f.write(f"  #{i + 1}\t{stay}\n")
         print(f"Wrote statistics to {output_stats_file}")
 
-if __name__ == "__main__":
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
     parser = argparse.ArgumentParser(
         description="Generate a chart of nights away and home."
     )
@@ -874,11 +885,17 @@ if __name__ == "__main__":
         help="The last morning to include in the chart (YYYY-MM-DD).",
         type=date.fromisoformat,
     )
-    args = parser.parse_args()
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
 
     nights_away_and_home(
         args.output_svg,
         args.output_stats,
         start_evening=args.start_evening,
         thru_morning=args.thru_morning,
+        log=log,
     )
+
+if __name__ == "__main__":
+    main()
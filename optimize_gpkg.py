@@ -0,0 +1,105 @@
+"""
+Adds the indexes (and a generated check_out_date column) that the
+lodging log's queries use to the lodging GeoPackage, updates its query
+planner statistics, and reports the query plans and timings of each
+built-in query before and after.
+"""
+
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+from lodging_data_utils.gpkg_optimizer import GeoPackageOptimizer
+
+@profiling.profiled
+def optimize_gpkg(dry_run=False, add_check_out_date=True, log=None):
+    """Optimizes the lodging GeoPackage and prints a report.
+
+    Args:
+        dry_run (bool): If True, print the changes without making them.
+        add_check_out_date (bool): If True, add a generated
+            check_out_date column on stays.
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    log = LodgingLog() if log is None else log
+    optimizer = GeoPackageOptimizer(log.lodging_path)
+    before = optimizer.query_plans()
+    if dry_run:
+        statements = optimizer.changes(add_check_out_date)
+        print("Changes (dry run):")
+        for statement in statements or ["(none)"]:
+            print(f"  {statement}")
+        print_plans(before)
+        return
+
+    statements = optimizer.optimize(add_check_out_date)
+    print(f"Optimized {log.lodging_path}:")
+    for statement in statements:
+        print(f"  {statement}")
+    after = optimizer.query_plans()
+    print_plans(before, after)
+
+def print_plans(before, after=None):
+    """Prints the timing and query plan of each query, before and (if
+    provided) after optimizing.
+    """
+    print(f"\n{'query':<60} {'before ms':>10} {'after ms':>10}")
+    for name, plan in before.items():
+        after_ms = "" if after is None else (
+            f"{after[name]['seconds'] * 1000:>10.3f}"
+        )
+        print(f"{name[:60]:<60} {plan['seconds'] * 1000:>10.3f} {after_ms}")
+    for name, plan in before.items():
+        print(f"\n{name}")
+        if after is not None and after[name]['plan'] != plan['plan']:
+            print("  before:")
+            for line in plan['plan']:
+                print(f"    {line}")
+            print("  after:")
+            for line in after[name]['plan']:
+                print(f"    {line}")
+        else:
+            for line in plan['plan']:
+                print(f"    {line}")
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    parser = argparse.ArgumentParser(
+        description="Add indexes to the lodging GeoPackage."
+    )
+    parser.add_argument('--dry_run',
+        help="print the changes and current query plans without making "
+            "changes",
+        action='store_true',
+    )
+    parser.add_argument('--skip_check_out_date',
+        help="do not add a generated check_out_date column to stays",
+        action='store_true',
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    if args.lodging_path is not None:
+        log = LodgingLog(args.lodging_path)
+    optimize_gpkg(
+        dry_run=args.dry_run,
+        add_check_out_date=not args.skip_check_out_date,
+        log=log,
+    )
+
+if __name__ == "__main__":
+    main()
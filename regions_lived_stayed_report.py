@@ -7,12 +7,13 @@ import argparse
 import pandas as pd
 
 # First party imports
-from lodging_data_utils import LodgingLog
+from lodging_data_utils import LodgingLog, profiling
 
-def create_regions_report(output_csv) -> None:
+@profiling.profiled
+def create_regions_report(output_csv, log=None) -> None:
     """Creates a CSV report of regions lived or stayed in."""
 
-    log = LodgingLog()
+    log = LodgingLog() if log is None else log
 
     # Load all regions from the lodging GeoPackage.
     regions_df = log.geodata("regions").drop(columns=['geometry'])
@@ -52,13 +53,24 @@ def roll_up_regions(fid_list, regions_df) -> list[int]:
             fid_list.append(int(parent_fid))
     return fid_list
 
-if __name__ == "__main__":
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
     parser = argparse.ArgumentParser(description=(
         "Create a CSV report of regions lived or stayed in by a traveler."
     ))
     parser.add_argument("output_csv", help="Path to the output CSV file")
 
-    args = parser.parse_args()
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
 
-    create_regions_report(args.output_csv)
+    create_regions_report(args.output_csv, log=log)
     print(f"Regions report created at {args.output_csv}")
+
+if __name__ == "__main__":
+    main()
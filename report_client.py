@@ -0,0 +1,115 @@
+"""
+Forwards a report script and its arguments to a running report_server.py,
+and prints the script's output, authenticating with the token the server
+wrote for its port. If the server is not running, the script is run
+locally instead.
+"""
+
+# Standard library imports
+import importlib
+import io
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+DEFAULT_PORT = 8765
+TOKEN_DIR = Path.home() / ".lodging_data_utils"
+STDIN_SCRIPTS = ['where_was_i']
+
+def report_client(script, argv, port=DEFAULT_PORT, local=True) -> int:
+    """Runs a script on the report server and prints its output.
+
+    Args:
+        script (str): The script name, with or without the .py
+            extension.
+        argv (list[str]): The script's command line arguments.
+        port (int): The localhost port of the report server.
+        local (bool): If True, run the script locally if the server is
+            not running.
+
+    Returns:
+        int: The script's exit code.
+    """
+    script = script.removesuffix('.py')
+    stdin = ""
+    if script in STDIN_SCRIPTS and not sys.stdin.isatty():
+        stdin = sys.stdin.read()
+    try:
+        token = (TOKEN_DIR / f"report_server_{port}.token").read_text() \
+            .strip()
+    except FileNotFoundError:
+        # A running server always has a token file.
+        token = None
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/run",
+        data=json.dumps({
+            'script': script,
+            'argv': argv,
+            'cwd': os.getcwd(),
+            'stdin': stdin,
+        }).encode('utf-8'),
+        headers={
+            'Content-Type': 'application/json',
+            'X-Report-Token': token or "",
+        },
+    )
+    try:
+        if token is None:
+            raise urllib.error.URLError("No token file")
+        with urllib.request.urlopen(request) as response:
+            result = json.load(response)
+    except urllib.error.HTTPError as e:
+        print(f"Report server error: {e.reason}", file=sys.stderr)
+        return 1
+    except urllib.error.URLError:
+        if not local:
+            print(f"No report server on port {port}.", file=sys.stderr)
+            return 1
+        print(
+            f"No report server on port {port}; running {script} locally.",
+            file=sys.stderr,
+        )
+        if stdin:
+            sys.stdin = io.StringIO(stdin)
+        try:
+            importlib.import_module(script).main(argv)
+        except SystemExit as e:
+            return 0 if e.code is None else e.code
+        return 0
+    sys.stdout.write(result['stdout'])
+    sys.stderr.write(result['stderr'])
+    return result['exit_code']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a report script on the report server."
+    )
+    parser.add_argument('--port',
+        help=f"localhost port of the report server (default: {DEFAULT_PORT})",
+        type=int,
+        default=DEFAULT_PORT,
+    )
+    parser.add_argument('--no_local',
+        help="fail instead of running locally if the server is not running",
+        action='store_true',
+    )
+    parser.add_argument('script',
+        help="script to run, such as frequency_table",
+    )
+    parser.add_argument('script_args',
+        help="arguments for the script",
+        nargs=argparse.REMAINDER,
+    )
+    args = parser.parse_args()
+    sys.exit(report_client(
+        args.script,
+        args.script_args,
+        port=args.port,
+        local=not args.no_local,
+    ))
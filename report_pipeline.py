@@ -0,0 +1,231 @@
+"""
+Runs a pipeline of report scripts listed in a TOML file, loading the
+lodging log and its shared intermediate results once for all outputs.
+"""
+
+# Standard library imports
+import contextlib
+import importlib
+import threading
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Third-party imports
+import argparse
+import matplotlib
+
+# First-party imports
+from lodging_data_utils import CachedLodgingLog, profiling
+from report_server import SCRIPTS
+
+matplotlib.use('Agg')
+
+DEFAULT_PIPELINE = Path(__file__).parent / "config" / "report_pipeline.toml"
+
+# Scripts that draw with pyplot's global state, which is not thread-safe,
+# and so must not run at the same time as each other.
+PYPLOT_SCRIPTS = ['distance_from_home_by_day']
+
+def load_pipeline(pipeline_toml, only=None) -> list[dict]:
+    """Returns the outputs listed in a pipeline TOML file.
+
+    Args:
+        pipeline_toml (Path): The pipeline file. Each `[[outputs]]`
+            table has a `script` (such as `frequency_table`), a list of
+            command line `args`, an optional unique `name`, which
+            defaults to the script name, an optional inclusive range
+            of `years` the output covers, which report_watch.py uses to
+            skip outputs unaffected by a change, and an optional list
+            of the output `files` passed as positional arguments.
+        only (list[str]): If provided, only return outputs with these
+            names.
+
+    Returns:
+        list[dict]: A list of dicts with name, script, args, years
+        (None if not provided), and files keys. The files are the
+        listed files and the values of `--output_*` options.
+    """
+    with open(pipeline_toml, 'rb') as f:
+        pipeline = tomllib.load(f)
+    outputs = []
+    for output in pipeline.get('outputs', []):
+        script = output.get('script')
+        if script not in SCRIPTS:
+            raise ValueError(f"Invalid script in pipeline: {script}")
+        args = [str(arg) for arg in output.get('args', [])]
+        outputs.append({
+            'name': output.get('name', script),
+            'script': script,
+            'args': args,
+            'years': output.get('years'),
+            'files': [
+                *(str(path) for path in output.get('files', [])),
+                *output_options(args),
+            ],
+        })
+    names = [output['name'] for output in outputs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate output names in pipeline: {duplicates}")
+    if only is not None:
+        for name in only:
+            if name not in names:
+                raise ValueError(f"Invalid output name: {name}")
+        outputs = [output for output in outputs if output['name'] in only]
+    return outputs
+
+def report_pipeline(
+    pipeline_toml, jobs=None, only=None, lodging_path=None
+) -> list[dict]:
+    """Runs the outputs of a pipeline and prints a timing summary.
+
+    The log is loaded once, and its stays, mornings, and homes are built
+    before any output runs. Other intermediate results (such as mornings
+    grouped by place, and distance matrices) are built by the first
+    output that needs them, and shared with the rest.
+
+    Args:
+        pipeline_toml (Path): The pipeline file.
+        jobs (int): The number of outputs to run at once. Defaults to
+            the number of processors.
+        only (list[str]): If provided, only run outputs with these
+            names.
+        lodging_path (Path): The lodging GeoPackage. Defaults to the
+            lodging_gpkg data source.
+
+    Returns:
+        list[dict]: A list of dicts with name, script, seconds, and
+        error (None if the output succeeded) keys, one for each output.
+    """
+    outputs = load_pipeline(pipeline_toml, only)
+    start = time.perf_counter()
+    log = CachedLodgingLog(lodging_path)
+    log.warm()
+    shared_seconds = time.perf_counter() - start
+    results = run_outputs(outputs, log, jobs)
+    print_summary(
+        results,
+        "(load log and shared results)",
+        shared_seconds,
+        time.perf_counter() - start,
+    )
+    return results
+
+def make_output_folders(files):
+    """Creates the parent folders of an output's files.
+
+    Args:
+        files (list[str]): The files the output writes, as returned by
+            load_pipeline().
+    """
+    for file in files:
+        Path(file).parent.mkdir(parents=True, exist_ok=True)
+
+def output_options(args) -> list[str]:
+    """Returns the values of the `--output_*` options in command line
+    arguments, given as `--output_csv PATH` or `--output_csv=PATH`.
+    """
+    values = []
+    for i, arg in enumerate(args):
+        option, equals, value = arg.partition('=')
+        if not option.startswith('--output_'):
+            continue
+        if equals:
+            values.append(value)
+        elif i + 1 < len(args) and not args[i + 1].startswith('-'):
+            values.append(args[i + 1])
+    return values
+
+def print_summary(results, shared_label, shared_seconds, total_seconds):
+    """Prints a table of output run times."""
+    print(f"\n{'output':<40} {'seconds':>9}  status")
+    print(f"{shared_label:<40} {shared_seconds:>9.3f}")
+    for result in results:
+        status = "ok" if result['error'] is None else result['error']
+        print(f"{result['name']:<40} {result['seconds']:>9.3f}  {status}")
+    print(f"{'total':<40} {total_seconds:>9.3f}")
+
+def run_outputs(outputs, log, jobs=None) -> list[dict]:
+    """Runs outputs in parallel with a shared log.
+
+    Args:
+        outputs (list[dict]): The outputs, as returned by
+            load_pipeline().
+        log (CachedLodgingLog): The log to share.
+        jobs (int): The number of outputs to run at once. Defaults to
+            the number of processors.
+
+    Returns:
+        list[dict]: A list of dicts with name, script, seconds, and
+        error (None if the output succeeded) keys, one for each output.
+    """
+    # Import scripts before starting threads.
+    modules = {
+        script: importlib.import_module(script)
+        for script in {output['script'] for output in outputs}
+    }
+
+    pyplot_lock = threading.Lock()
+    def run(output):
+        """Runs an output and returns its timing and status."""
+        output_start = time.perf_counter()
+        error = None
+        if output['script'] in PYPLOT_SCRIPTS:
+            lock = pyplot_lock
+        else:
+            lock = contextlib.nullcontext()
+        try:
+            make_output_folders(output['files'])
+            with lock:
+                modules[output['script']].main(output['args'], log=log)
+        except SystemExit as e:
+            if e.code not in [None, 0]:
+                error = f"exit code {e.code}"
+        except Exception as e: # pylint: disable=broad-except
+            error = f"{type(e).__name__}: {e}"
+        return {
+            'name': output['name'],
+            'script': output['script'],
+            'seconds': time.perf_counter() - output_start,
+            'error': error,
+        }
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(profiling.carry_spans(run), outputs))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a pipeline of report scripts with one log load."
+    )
+    parser.add_argument('pipeline_toml',
+        help=f"pipeline TOML file (default: {DEFAULT_PIPELINE.name})",
+        type=Path,
+        nargs='?',
+        default=DEFAULT_PIPELINE,
+    )
+    parser.add_argument('--jobs',
+        help="number of outputs to run at once (default: processor count)",
+        type=int,
+    )
+    parser.add_argument('--only',
+        help="names of outputs to run (default: all)",
+        nargs='+',
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+    profiling.enable_from_args(args)
+    pipeline_results = report_pipeline(
+        args.pipeline_toml,
+        jobs=args.jobs,
+        only=args.only,
+        lodging_path=args.lodging_path,
+    )
+    if any(result['error'] is not None for result in pipeline_results):
+        raise SystemExit(1)
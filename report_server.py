@@ -0,0 +1,322 @@
+"""
+Runs report scripts in a long-running process that holds a warm
+LodgingLog, so that each request skips the imports, validation, and log
+load. The log is reloaded when the GeoPackage changes. Use
+report_client.py to send requests.
+
+Each server writes a random token to a file only its user can read, and
+only accepts JSON requests that include the token, so that other users
+and web pages cannot run scripts. Scripts only run in folders inside the
+server's root folder, and cannot write outside it.
+"""
+
+# Standard library imports
+import contextlib
+import hmac
+import importlib
+import io
+import json
+import os
+import secrets
+import sys
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+# Third-party imports
+import argparse
+import matplotlib
+
+# First-party imports
+from lodging_data_utils import CachedLodgingLog
+
+matplotlib.use('Agg')
+
+DEFAULT_PORT = 8765
+TOKEN_DIR = Path.home() / ".lodging_data_utils"
+SCRIPTS = [
+    'annual_night_counts',
+    'distance_from_home_by_day',
+    'export_tables',
+    'frequency_table',
+    'milestones',
+    'nearby_places',
+    'night_counts',
+    'nightly_location_report',
+    'nights_away_and_home',
+    'regions_lived_stayed_report',
+    'where_was_i',
+]
+
+def token_path(port=DEFAULT_PORT) -> Path:
+    """Returns the path of the token file for a port."""
+    return TOKEN_DIR / f"report_server_{port}.token"
+
+class ReportServer(HTTPServer):
+    """An HTTP server that runs report scripts with a warm log.
+
+    Requests are handled one at a time, so the log is never used by two
+    scripts at once.
+    """
+
+    def __init__(self, port=DEFAULT_PORT, lodging_path=None, root=None):
+        """Initializes the ReportServer on localhost.
+
+        Args:
+            port (int): The localhost port to listen on.
+            lodging_path (Path): The lodging GeoPackage. Defaults to the
+                lodging_gpkg data source.
+            root (Path): The folder scripts may run and write in.
+                Defaults to the current folder.
+        """
+        super().__init__(('127.0.0.1', port), ReportRequestHandler)
+        self.lodging_path = lodging_path
+        self.root = Path.cwd() if root is None else Path(root)
+        self.root = self.root.resolve()
+        self.log = None
+        self.requests = 0
+        self.token = secrets.token_urlsafe(32)
+        self.token_path = token_path(self.server_address[1])
+
+    def check_paths(self, argv, cwd):
+        """Checks that a request's folder is inside the root folder, and
+        that its arguments do not refer to paths outside it.
+
+        Every argument (and every value after `=` in an option) is
+        resolved from the folder as a path, following any symlinks in
+        the part of it that exists, and must be inside the root folder.
+        Arguments that are not paths, such as `metro` or `2024`, resolve
+        to paths inside the folder, so they always pass.
+
+        Args:
+            argv (list[str]): The script's command line arguments.
+            cwd (str): The folder to resolve relative paths from.
+
+        Raises:
+            ValueError: If the folder or an argument is outside the root
+                folder.
+        """
+        if cwd is None or not Path(cwd).is_absolute():
+            raise ValueError("cwd must be an absolute path")
+        folder = Path(cwd).resolve()
+        if not folder.is_relative_to(self.root):
+            raise ValueError(f"cwd is outside {self.root}: {cwd}")
+        for arg in argv:
+            for value in [arg, arg.partition('=')[2]]:
+                if value and not (folder / value).resolve().is_relative_to(
+                    self.root
+                ):
+                    raise ValueError(f"Path is outside {self.root}: {value}")
+
+    def check_token(self, token) -> bool:
+        """Returns True if a token matches the server's token."""
+        return hmac.compare_digest(
+            (token or "").encode('utf-8'), self.token.encode('utf-8')
+        )
+
+    def current_log(self) -> CachedLodgingLog:
+        """Returns the warm log, reloading it if the GeoPackage has
+        changed.
+        """
+        if self.log is None or self.log.is_stale():
+            start = time.perf_counter()
+            self.log = None
+            log = CachedLodgingLog(self.lodging_path)
+            log.warm()
+            self.log = log
+            print(
+                f"Loaded {log.lodging_path} "
+                f"({time.perf_counter() - start:.3f} s)"
+            )
+        return self.log
+
+    def remove_token(self):
+        """Removes the token file, if it still holds this server's
+        token.
+        """
+        with contextlib.suppress(OSError):
+            if self.check_token(self.token_path.read_text().strip()):
+                self.token_path.unlink()
+
+    def run_script(self, script, argv, cwd=None, stdin="") -> dict:
+        """Runs a script's main function with the warm log.
+
+        Args:
+            script (str): The script name, without the .py extension.
+            argv (list[str]): The script's command line arguments.
+            cwd (str): The absolute folder to resolve relative paths
+                from, inside the root folder.
+            stdin (str): Text to provide to the script as standard input.
+
+        Returns:
+            dict: A dict with exit_code, stdout, stderr, and seconds.
+
+        Raises:
+            ValueError: If the script is not in SCRIPTS, or the folder or
+                an argument is outside the root folder.
+        """
+        if script not in SCRIPTS:
+            raise ValueError(f"Invalid script: {script}")
+        if not isinstance(argv, list) or not all(
+            isinstance(arg, str) for arg in argv
+        ):
+            raise ValueError("argv must be a list of strings")
+        self.check_paths(argv, cwd)
+        start = time.perf_counter()
+        try:
+            log = self.current_log()
+        except Exception: # pylint: disable=broad-except
+            return {
+                'exit_code': 1,
+                'stdout': "",
+                'stderr': traceback.format_exc(),
+                'seconds': time.perf_counter() - start,
+            }
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        exit_code = 0
+        previous_cwd = os.getcwd()
+        previous_stdin = sys.stdin
+        previous_argv = sys.argv
+        try:
+            with (contextlib.redirect_stdout(stdout),
+                contextlib.redirect_stderr(stderr)):
+                try:
+                    os.chdir(cwd)
+                    sys.stdin = io.StringIO(stdin)
+                    sys.argv = [f"{script}.py"] + list(argv)
+                    importlib.import_module(script).main(argv, log=log)
+                except SystemExit as e:
+                    if e.code is None:
+                        exit_code = 0
+                    else:
+                        exit_code = e.code if isinstance(e.code, int) else 1
+                except Exception: # pylint: disable=broad-except
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            os.chdir(previous_cwd)
+            sys.stdin = previous_stdin
+            sys.argv = previous_argv
+        self.requests += 1
+        return {
+            'exit_code': exit_code,
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+            'seconds': time.perf_counter() - start,
+        }
+
+    def write_token(self):
+        """Writes the token to a file that only the current user can
+        read.
+        """
+        TOKEN_DIR.mkdir(mode=0o700, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            self.token_path.unlink()
+        fd = os.open(
+            self.token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600
+        )
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.token)
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """Handles `POST /run` and `GET /status` requests.
+
+    Requests must include the server's token in an `X-Report-Token`
+    header, and `POST /run` requests must be `application/json`, which
+    browsers cannot send to another origin without permission.
+    """
+
+    def do_GET(self): # pylint: disable=invalid-name
+        """Returns the server status."""
+        if self.path != '/status':
+            self.send_error(404)
+            return
+        if not self.server.check_token(self.headers.get('X-Report-Token')):
+            self.send_error(403, "Missing or invalid token")
+            return
+        log = self.server.log
+        self._send_json({
+            'lodging_path': None if log is None else str(log.lodging_path),
+            'loaded': log is not None,
+            'stale': log is not None and log.is_stale(),
+            'requests': self.server.requests,
+        })
+
+    def do_POST(self): # pylint: disable=invalid-name
+        """Runs a script and returns its exit code and output."""
+        if self.path != '/run':
+            self.send_error(404)
+            return
+        content_type = self.headers.get('Content-Type', "")
+        if content_type.split(';')[0].strip().lower() != 'application/json':
+            self.send_error(415, "Content-Type must be application/json")
+            return
+        if not self.server.check_token(self.headers.get('X-Report-Token')):
+            self.send_error(403, "Missing or invalid token")
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+            result = self.server.run_script(
+                request['script'],
+                request.get('argv', []),
+                cwd=request.get('cwd'),
+                stdin=request.get('stdin', ""),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_error(400, str(e))
+            return
+        print(
+            f"{request['script']} {' '.join(request.get('argv', []))}: "
+            f"exit {result['exit_code']}, {result['seconds']:.3f} s"
+        )
+        self._send_json(result)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        """Suppresses the default request logging."""
+
+    def _send_json(self, value):
+        """Sends a JSON response."""
+        body = json.dumps(value).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def report_server(port=DEFAULT_PORT, lodging_path=None, root=None):
+    """Loads the log and serves requests until interrupted."""
+    server = ReportServer(port, lodging_path, root)
+    server.current_log()
+    server.write_token()
+    print(f"Serving reports on http://127.0.0.1:{port} from {server.root}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.remove_token()
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve report scripts from a warm LodgingLog."
+    )
+    parser.add_argument('--port',
+        help=f"localhost port to listen on (default: {DEFAULT_PORT})",
+        type=int,
+        default=DEFAULT_PORT,
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    parser.add_argument('--root',
+        help="folder scripts may run and write in (default: current folder)",
+        type=Path,
+    )
+    args = parser.parse_args()
+    report_server(args.port, args.lodging_path, args.root)
@@ -0,0 +1,251 @@
+"""
+Watches the lodging GeoPackage for changes, and regenerates only the
+pipeline outputs affected by each change.
+"""
+
+# Standard library imports
+import sqlite3
+import time
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import CachedLodgingLog
+from lodging_data_utils.log_snapshot import LogSnapshot, overlaps_years
+from report_pipeline import (
+    DEFAULT_PIPELINE, load_pipeline, print_summary, run_outputs
+)
+
+# The tables each script reads. Mornings come from STAYS_QUERY, which
+# joins stays to stay_locations, so every script reading them depends
+# on both.
+DEPENDENCIES = {
+    'annual_night_counts': {'stays', 'stay_locations'},
+    'distance_from_home_by_day': {
+        'stays', 'homes', 'stay_locations', 'cities', 'metros', 'regions',
+    },
+    'export_tables': {
+        'stays', 'homes', 'stay_locations', 'cities', 'metros', 'regions',
+    },
+    'frequency_table': {
+        'stays', 'stay_locations', 'cities', 'metros', 'regions',
+    },
+    'milestones': {'stays', 'stay_locations', 'cities', 'metros', 'regions'},
+    'nearby_places': {'stays', 'stay_locations', 'cities'},
+    'night_counts': {'stays', 'stay_locations', 'cities', 'regions'},
+    'nightly_location_report': {
+        'stays', 'homes', 'stay_locations', 'cities',
+    },
+    'nights_away_and_home': {'stays', 'stay_locations'},
+    'regions_lived_stayed_report': {
+        'stays', 'homes', 'stay_locations', 'cities', 'regions',
+    },
+    'where_was_i': {'stays', 'homes', 'stay_locations', 'cities'},
+}
+
+def affected_outputs(outputs, changes, mornings_range) -> list[dict]:
+    """Returns the outputs affected by a set of changes.
+
+    An output is affected if its script reads a changed table, and (if
+    the output covers a range of years) the range of affected mornings
+    overlaps its years.
+
+    Args:
+        outputs (list[dict]): The outputs, as returned by
+            load_pipeline().
+        changes (dict): Changed fids by table, as returned by
+            LogSnapshot.changes().
+        mornings_range (tuple): The affected mornings, as returned by
+            LogSnapshot.changed_mornings().
+    """
+    affected = []
+    for output in outputs:
+        if not DEPENDENCIES[output['script']] & changes.keys():
+            continue
+        years = output_years(output)
+        if years is not None and not overlaps_years(mornings_range, *years):
+            continue
+        affected.append(output)
+    return affected
+
+def output_years(output) -> tuple | None:
+    """Returns the inclusive range of years an output covers, or None if
+    it covers all years.
+
+    The years are taken from the output's `years` if provided, or from
+    the arguments of distance_from_home_by_day outputs.
+    """
+    if output['years'] is not None:
+        return tuple(output['years'])
+    if output['script'] != 'distance_from_home_by_day':
+        return None
+    args = output['args']
+    def arg_value(flag):
+        """Returns the integer value of an argument, or None."""
+        if flag in args and args.index(flag) + 1 < len(args):
+            return int(args[args.index(flag) + 1])
+        return None
+    if 'single' in args:
+        year = arg_value('--year')
+        earliest_prior_year = arg_value('--earliest_prior_year')
+        if year is None:
+            return None
+        return (earliest_prior_year or year, year)
+    start_year = arg_value('--start_year')
+    thru_year = arg_value('--thru_year')
+    if start_year is None or thru_year is None:
+        return None
+    return (start_year, thru_year)
+
+def report_watch(
+    pipeline_toml,
+    interval=1.0,
+    debounce=2.0,
+    jobs=None,
+    only=None,
+    skip_initial=False,
+    lodging_path=None,
+):
+    """Watches the GeoPackage and regenerates affected outputs until
+    interrupted.
+
+    The GeoPackage is polled for changes to its modification time or its
+    `PRAGMA data_version` (which changes when another connection commits
+    to it, even if the file's modification time does not). Regeneration
+    waits until no changes have been seen for the debounce time, so a
+    burst of saves triggers one rebuild.
+
+    Args:
+        pipeline_toml (Path): The pipeline file.
+        interval (float): Seconds between polls.
+        debounce (float): Seconds without changes to wait before
+            regenerating.
+        jobs (int): The number of outputs to run at once.
+        only (list[str]): If provided, only watch outputs with these
+            names.
+        skip_initial (bool): If True, do not regenerate all outputs at
+            startup.
+        lodging_path (Path): The lodging GeoPackage. Defaults to the
+            lodging_gpkg data source.
+    """
+    outputs = load_pipeline(pipeline_toml, only)
+    start = time.perf_counter()
+    log = CachedLodgingLog(lodging_path)
+    log.warm()
+    snapshot = LogSnapshot(log.lodging_path)
+    if not skip_initial:
+        load_seconds = time.perf_counter() - start
+        results = run_outputs(outputs, log, jobs)
+        print_summary(
+            results,
+            "(load log and shared results)",
+            load_seconds,
+            time.perf_counter() - start,
+        )
+
+    conn = sqlite3.connect(log.lodging_path)
+    def version():
+        """Returns the modification time and data version of the file."""
+        return (
+            log.lodging_path.stat().st_mtime_ns,
+            conn.execute("PRAGMA data_version").fetchone()[0],
+        )
+    last_version = version()
+    last_change = None
+    print(f"\nWatching {log.lodging_path}. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(interval)
+            current_version = version()
+            if current_version != last_version:
+                last_version = current_version
+                last_change = time.monotonic()
+                continue
+            if last_change is None:
+                continue
+            if time.monotonic() - last_change < debounce:
+                continue
+            last_change = None
+
+            # Find the changed rows, and update the log.
+            start = time.perf_counter()
+            new_snapshot = LogSnapshot(log.lodging_path)
+            changes = new_snapshot.changes(snapshot)
+            if not changes:
+                continue
+            mornings_range = new_snapshot.changed_mornings(snapshot, changes)
+            try:
+                log.refresh(changes, mornings_range)
+            except ValueError as e:
+                print(f"\n{e}\nWaiting for the next change.")
+                continue
+            snapshot = new_snapshot
+            refresh_seconds = time.perf_counter() - start
+
+            changed_str = ", ".join(
+                f"{len(fids)} {table}" for table, fids in changes.items()
+            )
+            print(f"\nChanged: {changed_str}")
+            affected = affected_outputs(outputs, changes, mornings_range)
+            results = run_outputs(affected, log, jobs)
+            print_summary(
+                results,
+                "(refresh log)",
+                refresh_seconds,
+                time.perf_counter() - start,
+            )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Regenerate pipeline outputs when the log changes."
+    )
+    parser.add_argument('pipeline_toml',
+        help=f"pipeline TOML file (default: {DEFAULT_PIPELINE.name})",
+        type=Path,
+        nargs='?',
+        default=DEFAULT_PIPELINE,
+    )
+    parser.add_argument('--interval',
+        help="seconds between checks for changes (default: 1)",
+        type=float,
+        default=1.0,
+    )
+    parser.add_argument('--debounce',
+        help="seconds without changes to wait before regenerating "
+            "(default: 2)",
+        type=float,
+        default=2.0,
+    )
+    parser.add_argument('--jobs',
+        help="number of outputs to run at once (default: processor count)",
+        type=int,
+    )
+    parser.add_argument('--only',
+        help="names of outputs to watch (default: all)",
+        nargs='+',
+    )
+    parser.add_argument('--skip_initial',
+        help="do not regenerate all outputs at startup",
+        action='store_true',
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    args = parser.parse_args()
+    report_watch(
+        args.pipeline_toml,
+        interval=args.interval,
+        debounce=args.debounce,
+        jobs=args.jobs,
+        only=args.only,
+        skip_initial=args.skip_initial,
+        lodging_path=args.lodging_path,
+    )
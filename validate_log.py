@@ -0,0 +1,173 @@
+"""
+Checks the lodging GeoPackage against every rule in
+config/validations.toml at once, and reports all violations with each
+rule's run time. Can also enable change tracking, so that later
+validations only check rows changed since the last one that passed.
+"""
+
+# Standard library imports
+import json
+from pathlib import Path
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import profiling
+from lodging_data_utils.lodging_log import SOURCES
+from lodging_data_utils.validator import (
+    Validator, disable_change_tracking, enable_change_tracking
+)
+
+@profiling.profiled
+def validate_log(
+    fail_fast=False,
+    jobs=None,
+    output_json=None,
+    lodging_path=None,
+    full=False,
+    track_changes=None,
+) -> bool:
+    """Validates the lodging GeoPackage and prints a report.
+
+    Args:
+        fail_fast (bool): If True, stop at the first failed rule.
+        jobs (int): The number of rules to run at once. Defaults to the
+            number of rules.
+        output_json (Path): If provided, write the results to this JSON
+            file.
+        lodging_path (Path): The GeoPackage to validate. Defaults to the
+            lodging_gpkg data source.
+        full (bool): If True, check every row even if change tracking
+            is enabled.
+        track_changes (bool): If True, enable change tracking after a
+            full validation passes. If False, disable change tracking.
+            If None, leave it as it is.
+
+    Returns:
+        bool: True if every rule that ran passed.
+    """
+    if lodging_path is None:
+        lodging_path = Path(SOURCES['lodging_gpkg']).expanduser()
+    if track_changes is False:
+        disable_change_tracking(lodging_path)
+        print(f"Disabled change tracking in {lodging_path}.")
+    validator = Validator(lodging_path)
+    full = full or bool(track_changes)
+    pending = None if full else validator.pending_changes()
+    results = validator.run(
+        fail_fast=fail_fast, jobs=jobs, full=full, clear=True
+    )
+
+    if pending is not None:
+        print(f"Checked {pending} changed rows and the rows that "
+            "reference them.\n")
+
+    print(f"{'table':<16} {'rule':<50} {'ms':>8}  status")
+    for result in results:
+        violations = result['violations']
+        status = result['status']
+        if status == 'failed':
+            status = f"failed ({len(violations)} rows)"
+        print(
+            f"{result['table']:<16} {result['error'][:50]:<50} "
+            f"{result['seconds'] * 1000:>8.1f}  {status}"
+        )
+    for result in results:
+        if result['status'] == 'failed':
+            print(
+                f"\n{result['table']}: {result['error']}\n"
+                f"{result['violations'].to_string(index=False)}"
+            )
+    passed = all(result['status'] != 'failed' for result in results)
+    print("\nAll rules passed." if passed else "\nValidation failed.")
+    if track_changes and passed:
+        enable_change_tracking(lodging_path)
+        print(f"Enabled change tracking in {lodging_path}.")
+
+    if output_json is not None:
+        output = {
+            'lodging_path': str(lodging_path),
+            'passed': passed,
+            'rules': [
+                {
+                    'table': result['table'],
+                    'error': result['error'],
+                    'status': result['status'],
+                    'seconds': result['seconds'],
+                    'violations': (
+                        None if result['violations'] is None
+                        else json.loads(
+                            result['violations'].to_json(orient='records')
+                        )
+                    ),
+                }
+                for result in results
+            ],
+        }
+        with open(output_json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2)
+        print(f"Saved results to {output_json}.")
+    return passed
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): If provided, validate this log's GeoPackage.
+    """
+    parser = argparse.ArgumentParser(
+        description="Check the lodging GeoPackage against all validations."
+    )
+    parser.add_argument('--fail_fast',
+        help="stop at the first failed rule",
+        action='store_true',
+    )
+    parser.add_argument('--jobs',
+        help="number of rules to run at once (default: all)",
+        type=int,
+    )
+    parser.add_argument('--output_json',
+        help="JSON file to write results to",
+        type=Path,
+    )
+    parser.add_argument('--full',
+        help="check every row, even if change tracking is enabled",
+        action='store_true',
+    )
+    tracking = parser.add_mutually_exclusive_group()
+    tracking.add_argument('--track_changes',
+        help="enable change tracking if a full validation passes",
+        action='store_true',
+        default=None,
+    )
+    tracking.add_argument('--stop_tracking',
+        help="disable change tracking",
+        action='store_false',
+        dest='track_changes',
+    )
+    parser.add_argument('--lodging_path',
+        help="lodging GeoPackage (default: lodging_gpkg in "
+            "config/data_sources.toml)",
+        type=Path,
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    lodging_path = args.lodging_path
+    if lodging_path is None and log is not None:
+        lodging_path = log.lodging_path
+    passed = validate_log(
+        fail_fast=args.fail_fast,
+        jobs=args.jobs,
+        output_json=args.output_json,
+        lodging_path=lodging_path,
+        full=args.full,
+        track_changes=args.track_changes,
+    )
+    if not passed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
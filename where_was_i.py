@@ -0,0 +1,89 @@
+"""
+Looks up the stay or home for the night before each of a list of
+mornings, reading dates from the arguments or from standard input.
+"""
+
+# Standard library imports
+import csv
+import json
+import sys
+
+# Third-party imports
+import argparse
+
+# First-party imports
+from lodging_data_utils import LodgingLog, profiling
+from lodging_data_utils.locator import COLUMNS
+
+@profiling.profiled
+def where_was_i(
+    mornings, output_format='csv', output=sys.stdout, log=None
+):
+    """Write the stay or home for each morning as it is read.
+
+    Args:
+        mornings (iterable[str]): Mornings in YYYY-MM-DD format. Blank
+            lines are skipped.
+        output_format (str): `csv` or `jsonl`.
+        output (file): The file to write results to.
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    log = LodgingLog() if log is None else log
+    locator = log.locator()
+    writer = None
+    if output_format == 'csv':
+        writer = csv.DictWriter(output, fieldnames=COLUMNS)
+        writer.writeheader()
+        output.flush()
+    for line in mornings:
+        line = line.strip()
+        if line == "":
+            continue
+        try:
+            result = locator.where(line)
+        except ValueError:
+            print(f"Invalid date: {line}", file=sys.stderr)
+            continue
+        result['morning'] = result['morning'].isoformat()
+        if writer is not None:
+            writer.writerow(result)
+        else:
+            output.write(json.dumps(result, default=str) + "\n")
+        output.flush()
+
+def main(argv=None, log=None):
+    """Parses command line arguments and runs the script.
+
+    Args:
+        argv (list[str]): The arguments. Defaults to sys.argv[1:].
+        log (LodgingLog): The log to use. Defaults to a new LodgingLog.
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Look up the stay or home for the night before each morning."
+        )
+    )
+    parser.add_argument('mornings',
+        help=(
+            "mornings to look up in YYYY-MM-DD format; if omitted, "
+            "mornings are read from standard input, one per line"
+        ),
+        nargs='*',
+    )
+    parser.add_argument('--format',
+        help="output format",
+        choices=['csv', 'jsonl'],
+        default='csv',
+    )
+    profiling.add_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.enable_from_args(args)
+    where_was_i(
+        args.mornings if args.mornings else sys.stdin,
+        output_format=args.format,
+        output=sys.stdout,
+        log=log,
+    )
+
+if __name__ == "__main__":
+    main()